@@ -0,0 +1,119 @@
+"""Access log asincrono in formato JSON (una riga per richiesta).
+
+Il thread della richiesta mette solo il record in coda; un thread in
+background formatta le righe e le scrive a blocchi su stdout o su file.
+Con la coda piena i record vengono scartati (ACCESS_LOG_FULL_POLICY=drop)
+oppure la richiesta attende che si liberi spazio (block).
+"""
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from metrics import METRICS
+
+# '-' = stdout, un percorso = file (in append), 'off' = disattivato
+ACCESS_LOG = os.getenv('ACCESS_LOG', '-')
+ACCESS_LOG_QUEUE_SIZE = int(os.getenv('ACCESS_LOG_QUEUE_SIZE', '10000'))
+ACCESS_LOG_FULL_POLICY = os.getenv('ACCESS_LOG_FULL_POLICY', 'drop')       # 'drop' oppure 'block'
+ACCESS_LOG_BATCH = int(os.getenv('ACCESS_LOG_BATCH', '256'))
+ACCESS_LOG_FLUSH_INTERVAL = float(os.getenv('ACCESS_LOG_FLUSH_MS', '200')) / 1000
+# quota di richieste a file statici (css, js, uploads) che viene registrata
+ACCESS_LOG_STATIC_SAMPLE = float(os.getenv('ACCESS_LOG_STATIC_SAMPLE', '1.0'))
+# attesa massima con la policy 'block', poi il record viene comunque scartato
+ACCESS_LOG_BLOCK_TIMEOUT = 1.0
+
+METRICS.counter('access_log_dropped_total', 'Record di access log scartati per coda piena')
+
+_STOP = object()
+
+
+class AccessLogger:
+    def __init__(self, destination, maxsize, policy, formatter=None, name='access-log'):
+        self.destination = destination
+        # nome del thread di scrittura (distingue i writer nei dump del profiler)
+        self.name = name
+        # formatter(record) -> testo da scrivere (una o piu' righe senza '\n' finale)
+        self.formatter = formatter or _format
+        self.policy = policy
+        self.queue = queue.Queue(maxsize)
+        self.dropped = 0
+        self.worker = None
+        self.lock = threading.Lock()
+
+    def log(self, record):
+        """accoda un record (dict); 'ts' e' un timestamp time.time(), formattato dal writer"""
+        if self.destination == 'off':
+            return
+        if self.worker is None:
+            self._start()
+        try:
+            if self.policy == 'block':
+                self.queue.put(record, timeout=ACCESS_LOG_BLOCK_TIMEOUT)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            METRICS.inc('access_log_dropped_total')
+
+    def _start(self):
+        with self.lock:
+            if self.worker is None:
+                self.worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self.worker.start()
+                atexit.register(self.close)
+
+    def _open(self):
+        if self.destination == '-':
+            return sys.stdout
+        Path(self.destination).parent.mkdir(parents=True, exist_ok=True)
+        return open(self.destination, 'a', encoding='utf-8', buffering=1 << 16)
+
+    def _run(self):
+        out = self._open()
+        while True:
+            # una scrittura ogni ACCESS_LOG_BATCH righe o ogni ACCESS_LOG_FLUSH_INTERVAL secondi
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + ACCESS_LOG_FLUSH_INTERVAL
+            while len(batch) < ACCESS_LOG_BATCH and batch[-1] is not _STOP:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            stop = _STOP in batch
+            lines = [self.formatter(record) for record in batch if record is not _STOP]
+            try:
+                if lines:
+                    out.write('\n'.join(lines) + '\n')
+                    out.flush()
+            except (OSError, ValueError) as e:
+                print(f"Errore scrittura access log: {e}", file=sys.stderr)
+            if stop:
+                return
+
+    def close(self, timeout=2.0):
+        """svuota la coda prima dell'uscita del processo"""
+        if self.worker is not None and self.worker.is_alive():
+            try:
+                self.queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                return
+            self.worker.join(timeout)
+
+
+def _format(record):
+    record['ts'] = datetime.fromtimestamp(record['ts']).isoformat(timespec='milliseconds')
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+
+
+ACCESS_LOGGER = AccessLogger(ACCESS_LOG, ACCESS_LOG_QUEUE_SIZE, ACCESS_LOG_FULL_POLICY)
+METRICS.gauge('access_log_queue_size', 'Record di access log in attesa di scrittura',
+              callback=ACCESS_LOGGER.queue.qsize)
@@ -0,0 +1,145 @@
+"""Controllo di ammissione delle richieste con scarto del carico in eccesso.
+
+Al massimo ADMISSION_MAX_CONCURRENCY richieste vengono gestite insieme; le
+altre aspettano in coda un posto libero. La coda segue l'idea di CoDel
+(e del "adaptive LIFO"): se per un intero ADMISSION_INTERVAL l'attesa minima
+resta sopra ADMISSION_TARGET, il server e' in sovraccarico e da quel momento
+le richieste in coda aspettano al massimo ADMISSION_TARGET e vengono servite
+dall'ultima arrivata (chi aspetta da piu' tempo ha probabilmente gia'
+rinunciato). Chi non ottiene un posto riceve un 503 con Retry-After.
+
+Le priorita' si contendono lo stesso limite: le richieste critiche (login,
+statici, dashboard) possono occupare tutti i posti, quelle costose solo una
+parte, e quando si libera un posto passa prima la priorita' piu' alta.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from metrics import METRICS
+
+# 0 = controllo di ammissione disattivato
+ADMISSION_MAX_CONCURRENCY = int(os.getenv('ADMISSION_MAX_CONCURRENCY', '64'))
+ADMISSION_MAX_QUEUE = int(os.getenv('ADMISSION_MAX_QUEUE', '256'))
+# attesa massima in coda senza sovraccarico
+ADMISSION_MAX_WAIT = float(os.getenv('ADMISSION_MAX_WAIT_MS', '500')) / 1000
+# CoDel: attesa accettabile e finestra su cui si misura l'attesa minima
+ADMISSION_TARGET = float(os.getenv('ADMISSION_TARGET_MS', '5')) / 1000
+ADMISSION_INTERVAL = float(os.getenv('ADMISSION_INTERVAL_MS', '100')) / 1000
+
+CRITICAL, NORMAL, EXPENSIVE = 0, 1, 2
+PRIORITY_NAMES = ('critical', 'normal', 'expensive')
+# quota del limite utilizzabile da ogni priorita'
+PRIORITY_SHARES = (1.0, 0.8, 0.5)
+
+METRICS.counter('admission_rejected_total', 'Richieste scartate dal controllo di ammissione', ('priority',))
+METRICS.histogram('admission_wait_seconds', 'Attesa in coda delle richieste ammesse',
+                  buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+
+
+class _Waiter:
+    __slots__ = ('event', 'granted')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+
+class AdmissionController:
+    def __init__(self, limit, max_queue, max_wait, target, interval):
+        self.limit = limit
+        self.capacity = tuple(max(1, int(limit * share)) for share in PRIORITY_SHARES)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.target = target
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.queues = tuple(deque() for _ in PRIORITY_SHARES)
+        self.queued = 0
+        self.overloaded = False
+        self.interval_end = time.monotonic() + interval
+        self.min_wait = None        # attesa minima nella finestra corrente
+
+    def acquire(self, priority):
+        """True se la richiesta puo' procedere (poi va chiamato release), False se va scartata"""
+        if self.limit <= 0:
+            return True
+        started = time.monotonic()
+        with self.lock:
+            self._update(started)
+            # nessun sorpasso: con altre richieste della stessa priorita' (o superiore) in coda si accoda
+            if self.in_flight < self.capacity[priority] and not any(self.queues[:priority + 1]):
+                self.in_flight += 1
+                self._record_wait(0.0)
+                return True
+            if self.queued >= self.max_queue:
+                return self._reject(priority)
+            waiter = _Waiter()
+            self.queues[priority].append(waiter)
+            self.queued += 1
+            timeout = self.target if self.overloaded else self.max_wait
+
+        waiter.event.wait(timeout)
+        with self.lock:
+            if waiter.granted:
+                waited = time.monotonic() - started
+                self._record_wait(waited)
+                METRICS.observe('admission_wait_seconds', waited)
+                return True
+            self.queues[priority].remove(waiter)
+            self.queued -= 1
+            self._update(time.monotonic())
+            return self._reject(priority)
+
+    def release(self):
+        if self.limit <= 0:
+            return
+        with self.lock:
+            self.in_flight -= 1
+            self._update(time.monotonic())
+            for priority, waiting in enumerate(self.queues):
+                if waiting and self.in_flight < self.capacity[priority]:
+                    # in sovraccarico si serve l'ultima arrivata (LIFO), altrimenti la prima
+                    waiter = waiting.pop() if self.overloaded else waiting.popleft()
+                    self.queued -= 1
+                    self.in_flight += 1
+                    waiter.granted = True
+                    waiter.event.set()
+                    break
+
+    def _reject(self, priority):
+        METRICS.inc('admission_rejected_total', PRIORITY_NAMES[priority])
+        return False
+
+    def _record_wait(self, waited):
+        if self.min_wait is None or waited < self.min_wait:
+            self.min_wait = waited
+
+    def _update(self, now):
+        """a fine finestra decide se il server e' in sovraccarico (attesa minima sopra il target)"""
+        if now < self.interval_end:
+            return
+        if self.min_wait is None:
+            # nessuna richiesta ammessa nella finestra: sovraccarico solo se c'e' chi aspetta
+            self.overloaded = self.queued > 0
+        else:
+            self.overloaded = self.min_wait > self.target
+        self.min_wait = None
+        self.interval_end = now + self.interval
+
+    def status(self):
+        with self.lock:
+            return {
+                'limit': self.limit, 'in_flight': self.in_flight, 'queued': self.queued,
+                'overloaded': self.overloaded,
+            }
+
+
+ADMISSION = AdmissionController(ADMISSION_MAX_CONCURRENCY, ADMISSION_MAX_QUEUE, ADMISSION_MAX_WAIT,
+                                ADMISSION_TARGET, ADMISSION_INTERVAL)
+METRICS.gauge('admission_in_flight', 'Richieste ammesse in corso', callback=lambda: ADMISSION.in_flight)
+METRICS.gauge('admission_queued', 'Richieste in attesa di ammissione', callback=lambda: ADMISSION.queued)
+METRICS.gauge('admission_overloaded', 'Sovraccarico rilevato (1) dalla coda CoDel',
+              callback=lambda: int(ADMISSION.overloaded))
@@ -0,0 +1,74 @@
+"""Bulkhead per le route costose: generazione PDF e upload dei CV.
+
+Ogni bulkhead ha i suoi posti, una coda corta e un'attesa massima: quando
+e' pieno le richieste della sua route vengono rifiutate, mentre le altre
+route (login, dashboard) non ne risentono.
+"""
+import os
+import threading
+
+from metrics import METRICS
+
+METRICS.gauge('bulkhead_active', 'Richieste in corso per bulkhead', ('bulkhead',))
+METRICS.gauge('bulkhead_queued', 'Richieste in attesa per bulkhead', ('bulkhead',))
+METRICS.counter('bulkhead_rejected_total', 'Richieste rifiutate dal bulkhead', ('bulkhead', 'reason'))
+
+
+class Bulkhead:
+    def __init__(self, name, limit, max_queue, timeout, retry_after, message):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.message = message
+        self.slots = threading.BoundedSemaphore(max(limit, 1))
+        self.lock = threading.Lock()
+        self.queued = 0
+
+    def acquire(self):
+        """True se la richiesta ha un posto (poi va chiamato release), False se va rifiutata"""
+        if self.limit <= 0:
+            return True
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                if self.queued >= self.max_queue:
+                    METRICS.inc('bulkhead_rejected_total', self.name, 'queue_full')
+                    return False
+                self.queued += 1
+            METRICS.inc('bulkhead_queued', self.name)
+            try:
+                admitted = self.slots.acquire(timeout=self.timeout)
+            finally:
+                with self.lock:
+                    self.queued -= 1
+                METRICS.inc('bulkhead_queued', self.name, value=-1)
+            if not admitted:
+                METRICS.inc('bulkhead_rejected_total', self.name, 'timeout')
+                return False
+        METRICS.inc('bulkhead_active', self.name)
+        return True
+
+    def release(self):
+        if self.limit <= 0:
+            return
+        METRICS.inc('bulkhead_active', self.name, value=-1)
+        self.slots.release()
+
+
+def _from_env(prefix, name, limit, max_queue, timeout_ms, message):
+    return Bulkhead(
+        name,
+        int(os.getenv(f'{prefix}_CONCURRENCY', str(limit))),
+        int(os.getenv(f'{prefix}_QUEUE', str(max_queue))),
+        float(os.getenv(f'{prefix}_TIMEOUT_MS', str(timeout_ms))) / 1000,
+        int(os.getenv(f'{prefix}_RETRY_AFTER', '2')),
+        message,
+    )
+
+
+# <PREFIX>_CONCURRENCY (0 = nessun limite), _QUEUE, _TIMEOUT_MS, _RETRY_AFTER
+PDF_BULKHEAD = _from_env('BULKHEAD_PDF', 'generate_cv', 4, 8, 2000,
+                         'Troppe generazioni di CV in corso')
+UPLOAD_BULKHEAD = _from_env('BULKHEAD_UPLOAD', 'upload_cv', 8, 16, 1000,
+                            'Troppi upload in corso')
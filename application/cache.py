@@ -0,0 +1,80 @@
+import threading
+import time
+from collections import OrderedDict
+
+# valore restituito da get() quando la chiave non e' in cache
+MISSING = object()
+
+
+class TTLCache:
+    """Cache in memoria con scadenza (TTL) e numero massimo di voci
+
+    Si possono salvare anche valori None (cache negativa), con un TTL dedicato.
+    Ogni delete() incrementa la generazione delle chiavi: chi legge dal database
+    prende generation(key) prima della query e la passa a set(), che scarta il
+    valore se nel frattempo la chiave e' stata invalidata.
+    """
+
+    def __init__(self, maxsize, ttl, negative_ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.data = OrderedDict()   # chiave -> (scadenza, valore)
+        # chiave -> generazione dell'ultima delete; le piu' vecchie oltre maxsize sono
+        # scartate, e per quelle vale generation_floor (mai minore della loro)
+        self.generations = OrderedDict()
+        self.generation_counter = 0
+        self.generation_floor = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=MISSING):
+        """restituisce il valore salvato, oppure default (MISSING se assente o scaduto)"""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self.data[key]
+                self.misses += 1
+                return default
+            self.data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def generation(self, key):
+        with self.lock:
+            return self.generations.get(key, self.generation_floor)
+
+    def set(self, key, value, generation=None):
+        """salva il valore; se generation non e' piu' quella corrente non salva nulla"""
+        ttl = self.negative_ttl if value is None else self.ttl
+        with self.lock:
+            if generation is not None and generation != self.generations.get(key, self.generation_floor):
+                return
+            self.data[key] = (time.monotonic() + ttl, value)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.data.pop(key, None)
+                self.generation_counter += 1
+                self.generations[key] = self.generation_counter
+                self.generations.move_to_end(key)
+            while len(self.generations) > self.maxsize:
+                self.generation_floor = self.generations.popitem(last=False)[1]
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.generation_counter += 1
+            self.generation_floor = self.generation_counter
+            self.generations.clear()
+
+    def __len__(self):
+        return len(self.data)
+
@@ -0,0 +1,200 @@
+import multiprocessing
+import os
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from database import get_db_connection
+from pdf_generator import generate_cv_pdf
+
+BASE_DIR = Path(__file__).parent
+
+# Configurazione export (tramite environment)
+EXPORT_WORKERS = int(os.getenv('EXPORT_WORKERS', str(os.cpu_count() or 1)))
+# numero massimo di PDF in volo: limita la memoria usata dall'export
+EXPORT_MAX_INFLIGHT = int(os.getenv('EXPORT_MAX_INFLIGHT', str(EXPORT_WORKERS * 2)))
+# dimensione dei blocchi inviati al client
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# i worker non nascono con fork dal server multithread (erediterebbero i lock
+# presi dagli altri thread: coda dell'access log, shard delle metriche, logging)
+_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# pool di processi condiviso tra gli export: creato all'import (i processi partono
+# solo al primo submit), cosi' due export in parallelo non ne creano due
+_POOL = ProcessPoolExecutor(max_workers=EXPORT_WORKERS,
+                            mp_context=multiprocessing.get_context(_START_METHOD))
+
+
+class _StreamWriter:
+    """Bufferizza le scritture di zipfile e le inoltra al socket a blocchi"""
+
+    def __init__(self, raw, chunk_size=EXPORT_CHUNK_SIZE):
+        self.raw = raw
+        self.chunk_size = chunk_size
+        self.buffer = bytearray()
+        self.bytes_written = 0
+
+    def write(self, data):
+        self.buffer += data
+        self.bytes_written += len(data)
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if self.buffer:
+            self.raw.write(bytes(self.buffer))
+            self.buffer.clear()
+        self.raw.flush()
+
+
+def _safe_name(text):
+    """pulisce un nome per usarlo come percorso nell'archivio"""
+    return re.sub(r'[^A-Za-z0-9._-]', '_', str(text or '')).strip('_') or 'x'
+
+
+def student_filter(search=''):
+    """(WHERE, parametri) sugli studenti con gli stessi criteri della lista admin (alias u e cv)"""
+    where = "WHERE u.role = 'student'"
+    params = ()
+    search = (search or '').strip()
+    if search:
+        like = f"%{search}%"
+        where += """
+            AND (CAST(u.id AS CHAR) LIKE %s OR u.nome LIKE %s OR u.cognome LIKE %s
+                 OR u.email LIKE %s OR CAST(cv.data_nascita AS CHAR) LIKE %s)"""
+        params = (like, like, like, like, like)
+    return where, params
+
+
+def get_export_students(search=''):
+    """ricava gli studenti da esportare con gli stessi criteri della lista admin"""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    where, params = student_filter(search)
+
+    cursor.execute(
+        f"""
+        SELECT u.id, u.nome, u.cognome
+        FROM users u
+        LEFT JOIN cv_data cv ON u.id = cv.user_id
+        {where}
+        ORDER BY u.id
+        """,
+        params
+    )
+    students = cursor.fetchall()
+
+    # tutti i CV caricati degli studenti selezionati in una sola query
+    cursor.execute(
+        f"""
+        SELECT ucv.user_id, ucv.cv_file_path
+        FROM user_cvs ucv
+        JOIN users u ON u.id = ucv.user_id
+        LEFT JOIN cv_data cv ON u.id = cv.user_id
+        {where}
+        ORDER BY ucv.uploaded_at DESC
+        """,
+        params
+    )
+    uploaded = {}
+    for row in cursor.fetchall():
+        uploaded.setdefault(row['user_id'], []).append(row['cv_file_path'])
+
+    conn.close()
+
+    for student in students:
+        student['uploaded_cvs'] = uploaded.get(student['id'], [])
+    return students
+
+
+def _render_pdfs(user_ids, engine=None):
+    """genera i PDF in parallelo restituendoli nell'ordine di user_ids
+
+    Al massimo EXPORT_MAX_INFLIGHT documenti sono in memoria allo stesso tempo.
+    """
+    if EXPORT_WORKERS <= 1:
+        for user_id in user_ids:
+            try:
+                yield user_id, generate_cv_pdf(user_id, engine), None
+            except Exception as e:
+                yield user_id, None, str(e)
+        return
+
+    pending = deque()
+    ids = iter(user_ids)
+
+    for user_id in ids:
+        pending.append((user_id, _POOL.submit(generate_cv_pdf, user_id, engine)))
+        if len(pending) >= EXPORT_MAX_INFLIGHT:
+            break
+
+    while pending:
+        user_id, future = pending.popleft()
+        try:
+            yield user_id, future.result(), None
+        except Exception as e:
+            yield user_id, None, str(e)
+        next_id = next(ids, None)
+        if next_id is not None:
+            pending.append((next_id, _POOL.submit(generate_cv_pdf, next_id, engine)))
+
+
+def _resolve_upload(cv_path):
+    """percorso su disco di un CV caricato (come in _handle_download_cv)"""
+    file_path = Path(cv_path)
+    if not file_path.is_absolute():
+        file_path = BASE_DIR / cv_path
+    return file_path
+
+
+def stream_cv_zip(wfile, students, engine=None):
+    """scrive l'archivio ZIP su wfile man mano che le voci vengono prodotte
+
+    Per ogni studente: il CV generato e i CV caricati in user_cvs.
+    Restituisce il numero di byte scritti.
+    """
+    out = _StreamWriter(wfile)
+    by_id = {s['id']: s for s in students}
+
+    # i PDF sono gia' compressi: ZIP_STORED evita lavoro inutile
+    with zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_STORED) as zf:
+        for user_id, pdf_bytes, error in _render_pdfs([s['id'] for s in students], engine):
+            student = by_id[user_id]
+            folder = f"{user_id}_{_safe_name(student.get('cognome'))}_{_safe_name(student.get('nome'))}"
+
+            if pdf_bytes is not None:
+                zf.writestr(f"{folder}/cv_generato.pdf", pdf_bytes)
+            else:
+                zf.writestr(f"{folder}/ERRORE_cv_generato.txt", error or 'errore sconosciuto',
+                            compress_type=zipfile.ZIP_DEFLATED)
+
+            used_names = set()
+            for cv_path in student['uploaded_cvs']:
+                file_path = _resolve_upload(cv_path)
+                if not file_path.is_file():
+                    continue
+                name = _safe_name(os.path.basename(cv_path))
+                base, ext = os.path.splitext(name)
+                counter = 1
+                while name in used_names:
+                    name = f"{base}_{counter}{ext}"
+                    counter += 1
+                used_names.add(name)
+
+                with open(file_path, 'rb') as src, zf.open(f"{folder}/caricati/{name}", 'w') as dst:
+                    while True:
+                        chunk = src.read(EXPORT_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        dst.write(chunk)
+
+            # ogni studente arriva al client appena completato
+            out.flush()
+
+    out.flush()
+    return out.bytes_written
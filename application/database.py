@@ -1,18 +1,44 @@
 import os
 import hashlib
+import hmac
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from db_instrument import QUERY_OBSERVERS, InstrumentedConnection
 
-# MySQL configurazioni tramite environment
-import mysql.connector
 
+# backend del database: 'mysql' (default) oppure 'sqlite' (file locale, vedi db_sqlite.py)
+DB_BACKEND = os.getenv('DB_BACKEND', 'mysql').lower()
+
+# MySQL configurazioni tramite environment
 MYSQL_HOST = os.getenv('DB_HOST') 
 MYSQL_PORT = int(os.getenv('DB_PORT', '3306')) 
 MYSQL_USER = os.getenv('DB_USER')              
 MYSQL_PASSWORD = os.getenv('DB_PASSWORD')     
 MYSQL_DB = os.getenv('DB_NAME') 
 
-def get_db_connection():
+# iniezione di latenza/errori per i test di degrado (vedi db_faults.py), disattivata se vuota
+DB_FAULTS = os.getenv('DB_FAULTS', '')
+
+if DB_BACKEND == 'sqlite':
+    import db_sqlite
+    # errore sollevato dalla violazione di un vincolo (es. email UNIQUE)
+    IntegrityError = db_sqlite.IntegrityError
+    OperationalError = db_sqlite.OperationalError
+else:
+    import mysql.connector
+    IntegrityError = mysql.connector.IntegrityError
+    OperationalError = mysql.connector.OperationalError
+
+FAULT_INJECTOR = None
+if DB_FAULTS:
+    from db_faults import FaultInjector
+    FAULT_INJECTOR = FaultInjector.from_spec(DB_FAULTS, OperationalError)
+
+
+def _open_connection():
+    if DB_BACKEND == 'sqlite':
+        return db_sqlite.connect()
     conn = mysql.connector.connect(
         host=MYSQL_HOST,
         user=MYSQL_USER,
@@ -22,25 +48,96 @@ def get_db_connection():
         autocommit=False
     )
     return conn
+
+
+def get_db_connection():
+    if FAULT_INJECTOR is not None:
+        conn = FAULT_INJECTOR.connect(_open_connection)
+    else:
+        conn = _open_connection()
+    # tempi delle query per metriche e profiler, solo se qualcuno li osserva
+    if QUERY_OBSERVERS:
+        return InstrumentedConnection(conn)
+    return conn
         
 # genera salt randomico
 def salt_generation (length=16):     
     return os.urandom(length).hex()
 
 
+# Configurazione hashing password (tramite environment)
+PASSWORD_KDF = os.getenv('PASSWORD_KDF', 'scrypt')          # 'scrypt' oppure 'pbkdf2_sha256'
+SCRYPT_N = int(os.getenv('SCRYPT_N', '16384'))
+SCRYPT_R = int(os.getenv('SCRYPT_R', '8'))
+SCRYPT_P = int(os.getenv('SCRYPT_P', '1'))
+PBKDF2_ITERATIONS = int(os.getenv('PBKDF2_ITERATIONS', '600000'))
+# numero massimo di hash calcolati in parallelo: le altre richieste restano in coda
+HASH_WORKERS = int(os.getenv('HASH_WORKERS', str(max(1, (os.cpu_count() or 2) // 2))))
+
+# creato all'import (i thread partono solo al primo submit): un solo pool anche con i primi login in parallelo
+_HASH_EXECUTOR = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix='password-hash')
+
+
+def _kdf_params():
+    """parametri correnti del KDF, nello stesso formato salvato nell'hash"""
+    if PASSWORD_KDF == 'pbkdf2_sha256':
+        return ('pbkdf2_sha256', PBKDF2_ITERATIONS)
+    return ('scrypt', SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+
+def _derive(password, salt, params):
+    if params[0] == 'pbkdf2_sha256':
+        return hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), params[1]).hex()
+    n, r, p = params[1:]
+    return hashlib.scrypt(password.encode(), salt=salt.encode(), n=n, r=r, p=p,
+                          maxmem=256 * n * r + 1024 * 1024, dklen=32).hex()
+
+
+def _parse_hash(hashed):
+    """restituisce (parametri, digest); i parametri sono None per i vecchi hash SHA-256"""
+    parts = hashed.split('$')
+    if parts[0] == 'scrypt' and len(parts) == 5:
+        return ('scrypt', int(parts[1]), int(parts[2]), int(parts[3])), parts[4]
+    if parts[0] == 'pbkdf2_sha256' and len(parts) == 3:
+        return ('pbkdf2_sha256', int(parts[1])), parts[2]
+    return None, hashed
+
+
 def hash_password(password,salt):
-    """Hash password usando SHA-256 """
-    # Simple hash for demo - in production use bcrypt or argon2
-    return hashlib.sha256((password + salt).encode()).hexdigest()
+    """Hash password con il KDF configurato (scrypt o PBKDF2), parametri salvati nell'hash"""
+    params = _kdf_params()
+    return '$'.join(str(x) for x in params) + '$' + _derive(password, salt, params)
 
 
 def verify_password(password, hashed , salt):
-    """verifica la password"""
-    return hash_password(password,salt) == hashed
+    """verifica la password (accetta anche i vecchi hash SHA-256)"""
+    params, digest = _parse_hash(hashed)
+    if params is None:
+        computed = hashlib.sha256((password + salt).encode()).hexdigest()
+    else:
+        computed = _derive(password, salt, params)
+    return hmac.compare_digest(computed, digest)
+
+
+def needs_rehash(hashed):
+    """True se l'hash salvato usa parametri diversi da quelli correnti"""
+    params, _ = _parse_hash(hashed)
+    return params != _kdf_params()
+
+
+def offload_hash(func, *args):
+    """esegue hash_password / verify_password nell'executor dedicato e ne attende il risultato
+
+    L'executor limita a HASH_WORKERS i calcoli contemporanei: durante i picchi di
+    login le richieste si mettono in coda invece di saturare la CPU.
+    """
+    return _HASH_EXECUTOR.submit(func, *args).result()
 
 
 def create_tables():
     """crea le tabelle del database  in MySQL (se non esistono gia')."""
+    if DB_BACKEND == 'sqlite':
+        return db_sqlite.create_tables()
     conn = get_db_connection()
     cursor = conn.cursor()
 
@@ -54,10 +151,18 @@ def create_tables():
             nome VARCHAR(100) NOT NULL,
             cognome VARCHAR(100) NOT NULL,
             role ENUM('student','admin') DEFAULT 'student',
+            data_version INT NOT NULL DEFAULT 0,
             INDEX idx_email (email),
             INDEX idx_role (role)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
     """)
+    # database creati prima dell'introduzione di data_version
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'users' AND COLUMN_NAME = 'data_version'"
+    )
+    if not cursor.fetchone()[0]:
+        cursor.execute('ALTER TABLE users ADD COLUMN data_version INT NOT NULL DEFAULT 0')
 
     # --- Tabella dati del CV ---
     cursor.execute("""
@@ -171,12 +276,35 @@ def delete_cv(cv_id):
     """Elimina un CV dal database"""
     conn = get_db_connection()
     cursor = conn.cursor()
+    cursor.execute(
+        "UPDATE users SET data_version = data_version + 1 WHERE id = (SELECT user_id FROM user_cvs WHERE id = %s)",
+        (cv_id,)
+    )
     cursor.execute("DELETE FROM user_cvs WHERE id = %s", (cv_id,))
     conn.commit()
     cursor.close()
     conn.close()
 
 
+def bump_data_version(cursor, user_id):
+    """nuova versione dei dati dell'utente, nella stessa transazione della modifica"""
+    cursor.execute('UPDATE users SET data_version = data_version + 1 WHERE id = %s', (user_id,))
+
+
+def get_data_version(user_id, role=None):
+    """versione corrente dei dati dell'utente (None se non esiste): una lettura per chiave primaria"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    if role:
+        cursor.execute('SELECT data_version FROM users WHERE id = %s AND role = %s', (user_id, role))
+    else:
+        cursor.execute('SELECT data_version FROM users WHERE id = %s', (user_id,))
+    row = cursor.fetchone()
+    cursor.close()
+    conn.close()
+    return row[0] if row else None
+
+
 def get_cv_file(user_id):
     """Restituisce l'ultimo CV caricato da un utente (user_cvs)"""
     conn = get_db_connection()
@@ -0,0 +1,184 @@
+"""Iniezione di latenza e di errori nelle connessioni al database (solo per test).
+
+Si attiva con DB_FAULTS: una lista JSON di regole (oppure il percorso di un file
+che la contiene). Ogni regola si applica all'apertura della connessione
+("on": "connect") oppure alle query il cui testo corrisponde a "match"
+(espressione regolare, maiuscole/minuscole indifferenti; i commit valgono come
+query "COMMIT"):
+
+    DB_FAULTS='[
+        {"on": "connect", "latency_ms": "fixed:20"},
+        {"match": "^SELECT", "latency_ms": "lognormal:5:1", "error_rate": 0.01},
+        {"match": "^INSERT INTO user_cvs", "drop_rate": 0.05}
+    ]'
+
+Latenze (millisecondi): fixed:MS, uniform:MIN:MAX, exp:MEDIA, lognormal:MEDIANA:SIGMA.
+error_rate solleva un errore del database, drop_rate simula la caduta della
+connessione (anche le operazioni successive su quella connessione falliscono).
+
+Quanto viene iniettato da ogni regola e' esposto su /metrics:
+db_faults_matched_total, db_faults_delay_seconds_total e
+db_faults_injected_total{kind="error"|"drop"}, con l'etichetta rule.
+"""
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+
+from metrics import METRICS
+
+DB_FAULTS_SEED = os.getenv('DB_FAULTS_SEED')
+
+METRICS.counter('db_faults_matched_total', 'Operazioni a cui si e\' applicata la regola DB_FAULTS', ('rule',))
+METRICS.counter('db_faults_delay_seconds_total', 'Latenza iniettata dalla regola DB_FAULTS', ('rule',))
+METRICS.counter('db_faults_injected_total', 'Errori e cadute di connessione iniettati', ('rule', 'kind'))
+
+
+def parse_latency(spec):
+    """restituisce una funzione rnd -> secondi di attesa"""
+    kind, *args = spec.split(':')
+    values = [float(a) / 1000 for a in args]
+    if kind == 'fixed' and len(values) == 1:
+        return lambda rnd: values[0]
+    if kind == 'uniform' and len(values) == 2:
+        return lambda rnd: rnd.uniform(values[0], values[1])
+    if kind == 'exp' and len(values) == 1:
+        return lambda rnd: rnd.expovariate(1 / values[0]) if values[0] > 0 else 0.0
+    if kind == 'lognormal' and len(args) == 2:
+        median, sigma = values[0], float(args[1])
+        return lambda rnd: rnd.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+    raise ValueError(f'latenza non valida: {spec!r}')
+
+
+class FaultRule:
+    """una regola di DB_FAULTS; label la identifica nelle metriche"""
+
+    def __init__(self, spec, index=0):
+        self.on = spec.get('on', 'query')
+        if self.on not in ('connect', 'query'):
+            raise ValueError(f"'on' deve essere 'connect' o 'query': {self.on!r}")
+        self.match = spec.get('match', '')
+        self.pattern = re.compile(self.match, re.IGNORECASE)
+        self.latency_spec = spec.get('latency_ms')
+        self.latency = parse_latency(self.latency_spec) if self.latency_spec else None
+        self.error_rate = float(spec.get('error_rate', 0))
+        self.drop_rate = float(spec.get('drop_rate', 0))
+        self.label = f'{index}:{self.on}' + (f':{self.match}' if self.match else '')
+
+    def applies(self, event, sql):
+        return self.on == event and (event == 'connect' or self.pattern.search(sql) is not None)
+
+
+class ConnectionDropped(Exception):
+    """interno: la regola ha deciso di far cadere la connessione"""
+
+
+class FaultInjector:
+    """applica le regole e avvolge le connessioni del backend"""
+
+    def __init__(self, rules, error_class, seed=None):
+        self.rules = [FaultRule(rule, i) for i, rule in enumerate(rules)]
+        self.error_class = error_class
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_spec(cls, spec, error_class):
+        """legge le regole da JSON inline oppure da file"""
+        text = spec.strip()
+        if not text.startswith('['):
+            text = Path(text).read_text(encoding='utf-8')
+        return cls(json.loads(text), error_class, DB_FAULTS_SEED)
+
+    def inject(self, event, sql=''):
+        """attende la latenza prevista e solleva l'errore estratto (se c'e')"""
+        delay, error, drop = 0.0, False, False
+        with self.lock:
+            for rule in self.rules:
+                if not rule.applies(event, sql):
+                    continue
+                METRICS.inc('db_faults_matched_total', rule.label)
+                if rule.latency:
+                    wait = rule.latency(self.random)
+                    METRICS.inc('db_faults_delay_seconds_total', rule.label, value=wait)
+                    delay += wait
+                if not drop and self.random.random() < rule.drop_rate:
+                    METRICS.inc('db_faults_injected_total', rule.label, 'drop')
+                    drop = True
+                elif not error and self.random.random() < rule.error_rate:
+                    METRICS.inc('db_faults_injected_total', rule.label, 'error')
+                    error = True
+        if delay:
+            time.sleep(delay)
+        if drop:
+            raise ConnectionDropped()
+        if error:
+            raise self.error_class(f'errore iniettato (DB_FAULTS) su: {sql[:80] or event}')
+
+    def connect(self, open_connection):
+        try:
+            self.inject('connect')
+        except ConnectionDropped:
+            raise self.error_class('connessione rifiutata (DB_FAULTS)') from None
+        return FaultyConnection(open_connection(), self)
+
+
+class FaultyConnection:
+    """connessione che passa ogni query e ogni commit dal FaultInjector"""
+
+    def __init__(self, conn, injector):
+        self._conn = conn
+        self._injector = injector
+        self._dropped = False
+
+    def _check(self, sql):
+        if self._dropped:
+            raise self._injector.error_class('connessione persa (DB_FAULTS)')
+        try:
+            self._injector.inject('query', sql)
+        except ConnectionDropped:
+            self._dropped = True
+            self._conn.close()
+            raise self._injector.error_class('connessione persa durante la query (DB_FAULTS)') from None
+
+    def cursor(self, *args, **kwargs):
+        return FaultyCursor(self._conn.cursor(*args, **kwargs), self)
+
+    def commit(self):
+        self._check('COMMIT')
+        self._conn.commit()
+
+    def rollback(self):
+        if not self._dropped:
+            self._conn.rollback()
+
+    def close(self):
+        if not self._dropped:
+            self._conn.close()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class FaultyCursor:
+    def __init__(self, cursor, conn):
+        self._cursor = cursor
+        self._conn = conn
+
+    def execute(self, sql, *args, **kwargs):
+        self._conn._check(sql)
+        return self._cursor.execute(sql, *args, **kwargs)
+
+    def executemany(self, sql, *args, **kwargs):
+        self._conn._check(sql)
+        return self._cursor.executemany(sql, *args, **kwargs)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
@@ -0,0 +1,112 @@
+"""Osservazione delle query: ogni execute/commit viene passato agli osservatori.
+
+Gli osservatori sono funzioni che ricevono uno Statement, registrate in
+QUERY_OBSERVERS; get_db_connection avvolge la connessione solo se ce n'e'
+almeno uno. Le righe lette con fetch* dopo la notifica vengono comunque
+sommate in Statement.rows.
+"""
+import re
+import time
+from functools import lru_cache
+
+QUERY_OBSERVERS = []
+
+_TABLE_RE = re.compile(r'\b(?:FROM|INTO|UPDATE|JOIN)\s+`?(\w+)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def query_label(sql):
+    """(operazione, tabella) della query, es. ('SELECT', 'users'): poche combinazioni possibili"""
+    words = sql.split(None, 1)
+    operation = words[0].upper() if words else ''
+    match = _TABLE_RE.search(sql)
+    return operation, match.group(1).lower() if match else ''
+
+
+class Statement:
+    """una query eseguita: testo, durata, esito e righe (lette o modificate)"""
+    __slots__ = ('sql', 'elapsed', 'failed', 'rows')
+
+    def __init__(self, sql, elapsed, failed, rows=0):
+        self.sql = sql
+        self.elapsed = elapsed
+        self.failed = failed
+        self.rows = rows
+
+
+def _notify(statement):
+    for observer in QUERY_OBSERVERS:
+        observer(statement)
+
+
+class InstrumentedConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs))
+
+    def commit(self):
+        start = time.perf_counter()
+        failed = True
+        try:
+            self._conn.commit()
+            failed = False
+        finally:
+            _notify(Statement('COMMIT', time.perf_counter() - start, failed))
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class InstrumentedCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._statement = None
+
+    def _timed(self, method, sql, args, kwargs):
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = method(sql, *args, **kwargs)
+            failed = False
+            return result
+        finally:
+            # righe modificate; per le SELECT si contano quelle lette con fetch*
+            rows = 0
+            if not failed and query_label(sql)[0] != 'SELECT':
+                rows = max(self._cursor.rowcount or 0, 0)
+            self._statement = Statement(sql, time.perf_counter() - start, failed, rows)
+            _notify(self._statement)
+
+    def _count(self, rows):
+        if self._statement is not None and rows:
+            self._statement.rows += len(rows)
+        return rows
+
+    def execute(self, sql, *args, **kwargs):
+        return self._timed(self._cursor.execute, sql, args, kwargs)
+
+    def executemany(self, sql, *args, **kwargs):
+        return self._timed(self._cursor.executemany, sql, args, kwargs)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None and self._statement is not None:
+            self._statement.rows += 1
+        return row
+
+    def fetchall(self):
+        return self._count(self._cursor.fetchall())
+
+    def fetchmany(self, *args, **kwargs):
+        return self._count(self._cursor.fetchmany(*args, **kwargs))
+
+    def __iter__(self):
+        for row in self._cursor:
+            if self._statement is not None:
+                self._statement.rows += 1
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
@@ -0,0 +1,193 @@
+"""Backend SQLite: stesso schema e stesse query del backend MySQL.
+
+Le query dell'applicazione usano il dialetto MySQL (parametri %s, cursori
+dictionary=True): qui vengono adattate a sqlite3 senza modificare i chiamanti.
+"""
+import os
+import sqlite3
+from datetime import date, datetime
+from functools import lru_cache
+from pathlib import Path
+
+SQLITE_PATH = os.getenv('SQLITE_PATH', str(Path(__file__).parent / 'data' / 'cv_management.db'))
+SQLITE_TIMEOUT = float(os.getenv('SQLITE_TIMEOUT', '30'))
+
+IntegrityError = sqlite3.IntegrityError
+OperationalError = sqlite3.OperationalError
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email VARCHAR(255) NOT NULL UNIQUE COLLATE NOCASE,
+        password_hash VARCHAR(255) NOT NULL,
+        salt VARCHAR(255) NOT NULL,
+        nome VARCHAR(100) NOT NULL,
+        cognome VARCHAR(100) NOT NULL,
+        role TEXT DEFAULT 'student' CHECK (role IN ('student', 'admin')),
+        data_version INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS idx_users_role ON users (role);
+
+    CREATE TABLE IF NOT EXISTS cv_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        telefono VARCHAR(20),
+        indirizzo VARCHAR(255),
+        data_nascita DATE,
+        citta VARCHAR(100),
+        nazionalita VARCHAR(100),
+        linkedin_url VARCHAR(255),
+        patente VARCHAR(100),
+        hobby TEXT,
+        skills TEXT,
+        languages TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_cv_data_user_id ON cv_data (user_id);
+
+    CREATE TABLE IF NOT EXISTS experiences (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        tipo TEXT NOT NULL CHECK (tipo IN ('lavoro', 'formazione')),
+        titolo VARCHAR(255) NOT NULL,
+        azienda_istituto VARCHAR(255) NOT NULL,
+        data_inizio DATE NOT NULL,
+        data_fine DATE,
+        descrizione TEXT,
+        is_current BOOLEAN DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS idx_experiences_user_id ON experiences (user_id);
+    CREATE INDEX IF NOT EXISTS idx_experiences_tipo ON experiences (tipo);
+
+    CREATE TABLE IF NOT EXISTS user_cvs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        cv_file_path VARCHAR(255),
+        uploaded_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_user_cvs_user_id ON user_cvs (user_id);
+    CREATE INDEX IF NOT EXISTS idx_user_cvs_uploaded_at ON user_cvs (uploaded_at);
+"""
+
+
+# DATE e DATETIME tornano come oggetti date/datetime, come con mysql.connector
+def _convert_date(value):
+    try:
+        return date.fromisoformat(value.decode())
+    except ValueError:
+        return value.decode()
+
+
+def _convert_datetime(value):
+    try:
+        return datetime.fromisoformat(value.decode())
+    except ValueError:
+        return value.decode()
+
+
+sqlite3.register_converter('DATE', _convert_date)
+sqlite3.register_converter('DATETIME', _convert_datetime)
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+
+
+@lru_cache(maxsize=512)
+def _translate(sql):
+    """adatta i segnaposto MySQL (%s) a quelli di sqlite3 (?)"""
+    return sql.replace('%s', '?')
+
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class Cursor:
+    """cursore con la stessa interfaccia usata con mysql.connector"""
+
+    def __init__(self, conn, dictionary):
+        self._conn = conn
+        self._cursor = conn.cursor()
+        if dictionary:
+            self._cursor.row_factory = _dict_row
+
+    def _run(self, method, sql, params):
+        try:
+            method(_translate(sql), params)
+        except sqlite3.Error:
+            # SQLite blocca l'intero file durante una transazione di scrittura: se il
+            # chiamante abbandona la connessione dopo l'errore, nessun altro potrebbe scrivere
+            if self._conn.in_transaction:
+                self._conn.rollback()
+            raise
+        return self
+
+    def execute(self, sql, params=()):
+        return self._run(self._cursor.execute, sql, tuple(params or ()))
+
+    def executemany(self, sql, seq_of_params):
+        return self._run(self._cursor.executemany, sql, [tuple(p) for p in seq_of_params])
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size or self._cursor.arraysize)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+class Connection:
+    """connessione con cursor(dictionary=...) come mysql.connector"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, dictionary=False, **kwargs):
+        return Cursor(self._conn, dictionary)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+
+def connect():
+    conn = sqlite3.connect(SQLITE_PATH, timeout=SQLITE_TIMEOUT, detect_types=sqlite3.PARSE_DECLTYPES)
+    conn.execute('PRAGMA foreign_keys = ON')
+    return Connection(conn)
+
+
+def create_tables():
+    """crea le tabelle del database SQLite (se non esistono gia')"""
+    Path(SQLITE_PATH).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(SQLITE_PATH, timeout=SQLITE_TIMEOUT)
+    # WAL: le letture non si bloccano durante le scritture degli altri thread
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.executescript(SCHEMA)
+    # database creati prima dell'introduzione di data_version
+    if 'data_version' not in {row[1] for row in conn.execute('PRAGMA table_info(users)')}:
+        conn.execute('ALTER TABLE users ADD COLUMN data_version INTEGER NOT NULL DEFAULT 0')
+    conn.commit()
+    conn.close()
@@ -1,14 +1,64 @@
+import html
 import os
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime
+from cache import MISSING, TTLCache
+from registration import REGISTRATION_PIPELINE
 from database import (
-    get_db_connection, hash_password, salt_generation,verify_password,
-    sanitize_input, validate_email, validate_password
+    get_db_connection, hash_password, salt_generation,verify_password, bump_data_version, get_data_version,
+    needs_rehash, offload_hash, sanitize_input, validate_email, validate_password
 )
 
 UPLOAD_DIR = Path(__file__).parent / 'uploads' / 'cv'
 ALLOWED_EXTENSIONS = {'pdf'}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+# operazioni accettate da handle_experience_batch in una richiesta
+EXPERIENCE_BATCH_MAX = int(os.getenv('EXPERIENCE_BATCH_MAX', '100'))
+EXPERIENCE_OPS = ('add', 'update', 'delete')
+
+# campi restituiti dalle API JSON del profilo (/api/me, /api/admin/students/<id>)
+PROFILE_CV_FIELDS = (
+    'telefono', 'indirizzo', 'data_nascita', 'citta', 'nazionalita', 'linkedin_url',
+    'patente', 'hobby', 'skills', 'languages',
+)
+PROFILE_EXPERIENCE_FIELDS = (
+    'id', 'tipo', 'titolo', 'azienda_istituto', 'data_inizio', 'data_fine', 'is_current', 'descrizione',
+)
+
+# cache dei dati di login per email (anche negativa per le email sconosciute)
+AUTH_CACHE = TTLCache(
+    maxsize=int(os.getenv('AUTH_CACHE_SIZE', '10000')),
+    ttl=float(os.getenv('AUTH_CACHE_TTL', '300')),
+    negative_ttl=float(os.getenv('AUTH_CACHE_NEGATIVE_TTL', '30'))
+)
+
+
+def _get_login_user(email):
+    """ricava i soli campi necessari al login, passando dalla cache"""
+    key = email.lower()
+    user = AUTH_CACHE.get(key)
+    if user is not MISSING:
+        return user
+
+    # una registrazione o un cambio email che invalida la chiave durante la query
+    # fa scartare il risultato (altrimenti un None resterebbe in cache)
+    generation = AUTH_CACHE.generation(key)
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(
+        'SELECT id, email, password_hash, salt, nome, cognome, role FROM users WHERE email = %s',
+        (email,)
+    )
+    user = cursor.fetchone()
+    conn.close()
+
+    AUTH_CACHE.set(key, user, generation)
+    return user
+
+
+def invalidate_login_cache(*emails):
+    """rimuove dalla cache di login le email indicate"""
+    AUTH_CACHE.delete(*(e.lower() for e in emails if e))
 
 ############################### Inizio Gestione Login / REGISTRAZIONE###################################################
 
@@ -25,17 +75,24 @@ def handle_login(data):
     if not validate_email(email):
         return {'success': False, 'error': 'Email non valida'}
     
-    # Query con prepared statement
-
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute('SELECT * FROM users WHERE email = %s', (email,))
-    user = cursor.fetchone()
-    conn.close()
+    # Query con prepared statement (risultato in cache per email)
+    user = _get_login_user(email)
     
-    if not user or not verify_password(password, user['password_hash'],user['salt']):
+    if not user or not offload_hash(verify_password, password, user['password_hash'], user['salt']):
         return {'success': False, 'error': 'Email o password non corretti'}
     
+    # aggiorna in modo trasparente gli hash con parametri obsoleti
+    if needs_rehash(user['password_hash']):
+        salt = salt_generation()
+        password_hash = offload_hash(hash_password, password, salt)
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('UPDATE users SET password_hash = %s, salt = %s WHERE id = %s',
+                       (password_hash, salt, user['id']))
+        conn.commit()
+        conn.close()
+        invalidate_login_cache(user['email'])
+    
     # login riuscito
     redirect = '/admin-dashboard' if user['role'] == 'admin' else '/user-dashboard'
     
@@ -77,29 +134,16 @@ def handle_register(data):
     if password != password_confirm:
         return {'success': False, 'error': 'Le password non corrispondono'}
     
-    # Check se la mail esiste 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute('SELECT id FROM users WHERE email = %s', (email,))
-    if cursor.fetchone():
-        conn.close()
-        return {'success': False, 'error': 'Questa email è già registrata'}
-    
-    # inserisci un nuovo utente
+    # nessuna SELECT di controllo: il Bloom filter smista le email e il vincolo
+    # UNIQUE segnala i duplicati; le nuove email sono salvate con commit di gruppo
     salt=salt_generation()
-    password_hash = hash_password(password,salt)
-    cursor.execute(
-        'INSERT INTO users (email, password_hash, salt, nome, cognome, role) VALUES (%s, %s, %s, %s, %s, "student")',
-        (email, password_hash, salt,nome, cognome)
-    )
-    
-    user_id = cursor.lastrowid
-    
-    # crea entry per cv_data
-    cursor.execute('INSERT INTO cv_data (user_id) VALUES (%s)', (user_id,))
-    
-    conn.commit()
-    conn.close()
+    password_hash = offload_hash(hash_password, password, salt)
+    result = REGISTRATION_PIPELINE.register(email, password_hash, salt, nome, cognome)
+    if not result['success']:
+        return result
+
+    # l'email poteva essere in cache come sconosciuta
+    invalidate_login_cache(email)
     
     return {'success': True}
 
@@ -135,9 +179,14 @@ def handle_update_profile(user_id, data):
         conn.close()
         return {'success': False, 'error': 'Questa email è già utilizzata'}
     
-    # aggiorna la tabella users 
+    # email attuale, per invalidare la cache di login
+    cursor.execute('SELECT email FROM users WHERE id = %s', (user_id,))
+    current = cursor.fetchone()
+    old_email = current['email'] if current else None
+
+    # aggiorna la tabella users (e la versione dei dati)
     cursor.execute(
-        'UPDATE users SET nome = %s, cognome = %s, email = %s WHERE id = %s',
+        'UPDATE users SET nome = %s, cognome = %s, email = %s, data_version = data_version + 1 WHERE id = %s',
         (nome, cognome, email, user_id)
     )
     
@@ -158,8 +207,14 @@ def handle_update_profile(user_id, data):
     
     conn.commit()
     conn.close()
+    # nome e cognome sono nei dati di login: si invalida anche se l'email non cambia
+    invalidate_login_cache(old_email, email)
     redirect = '/user-dashboard'
-    return {'success': True, 'message': 'Profilo aggiornato con successo!', 'redirect': redirect}
+    profile = {
+        'nome': nome, 'cognome': cognome, 'email': email, 'telefono': telefono, 'data_nascita': data_nascita,
+        'citta': citta, 'indirizzo': indirizzo, 'linkedin_url': linkedin_url,
+    }
+    return {'success': True, 'message': 'Profilo aggiornato con successo!', 'redirect': redirect, 'profile': profile}
 
 
 def add_cv_content(user_id, data):
@@ -179,81 +234,92 @@ def add_cv_content(user_id, data):
         'UPDATE cv_data SET patente = %s, hobby = %s, skills = %s, languages = %s WHERE user_id = %s',
         (patente, hobby, skills, languages, user_id)
     )
+    bump_data_version(cursor, user_id)
 
     conn.commit()
     conn.close()
 
-    return {'success': True, 'message': 'Contenuto CV aggiornato con successo!'}
+    cv = {'patente': patente, 'hobby': hobby, 'skills': skills, 'languages': languages}
+    return {'success': True, 'message': 'Contenuto CV aggiornato con successo!', 'cv': cv}
 
 
-def handle_add_experience(user_id, data):
-    """gestisce l'aggiunta di nuove esperienze con i prepared statements"""
+def _field(data, *names):
+    """primo campo presente tra names, come stringa senza spazi (anche da JSON con numeri o null)"""
+    for name in names:
+        value = data.get(name)
+        if value is not None and value != '':
+            return str(value).strip()
+    return ''
+
+
+def _flag(value):
+    return value in (True, 1, '1', 'true', 'on')
+
+
+def _experience_values(data, is_current=None):
+    """valida un'esperienza: (tipo, titolo, azienda, inizio, fine, in corso, descrizione) oppure (None, errore)
+
+    is_current None: l'esperienza e' in corso se manca la data di fine (come nel form di aggiunta).
+    """
+    tipo = _field(data, 'tipo')
+    titolo = sanitize_input(_field(data, 'titolo'))
+    azienda_istituto = sanitize_input(_field(data, 'azienda_istituto', 'azienda'))
+    data_inizio = _field(data, 'data_inizio')
+    data_fine = _field(data, 'data_fine')
+    descrizione = sanitize_input(_field(data, 'descrizione'))
+    if is_current is None:
+        is_current = data_fine == ''
 
-    tipo = data.get('tipo', '').strip()
-    titolo = sanitize_input(data.get('titolo', '').strip())
-    azienda_istituto = sanitize_input((data.get('azienda_istituto') or data.get('azienda') or '').strip())
-    data_inizio = data.get('data_inizio', '').strip()
-    data_fine = data.get('data_fine', '').strip()
-    if data_fine == "":
-        is_current = 1
-    else:
-        is_current=0
-    descrizione = sanitize_input(data.get('descrizione', '').strip())
-    
-    # Validation
     if tipo not in ['lavoro', 'formazione']:
-        return {'success': False, 'error': 'Tipo di esperienza non valido'}
-    
+        return None, 'Tipo di esperienza non valido'
+
     if not all([titolo, azienda_istituto, data_inizio]):
-        return {'success': False, 'error': 'Tutti i campi obbligatori devono essere compilati'}
-    
-    if is_current==0 and not data_fine:
-        return {'success': False, 'error': 'Data di fine obbligatoria se non in corso'}
-    
+        return None, 'Tutti i campi obbligatori devono essere compilati'
+
+    if not is_current and not data_fine:
+        return None, 'Data di fine obbligatoria se non in corso'
+
+    try:
+        datetime.strptime(data_inizio, '%Y-%m-%d')
+        if data_fine:
+            datetime.strptime(data_fine, '%Y-%m-%d')
+    except ValueError:
+        return None, 'Date non valide (formato AAAA-MM-GG)'
+
+    if not is_current and data_inizio > data_fine:
+        return None, 'le date non rispettano un intervallo di tempo valido'
 
-    valid_period= data_inizio <= data_fine
-    
-    if not valid_period and not is_current:
-        return {'success' : False, 'error' : 'le date non rispettano un intervallo di tempo valido'}
-    
     if is_current:
         data_fine = None
-    
+    return (tipo, titolo, azienda_istituto, data_inizio, data_fine, int(is_current), descrizione), None
+
+
+def handle_add_experience(user_id, data):
+    """gestisce l'aggiunta di nuove esperienze con i prepared statements"""
+    values, error = _experience_values(data)
+    if error:
+        return {'success': False, 'error': error}
+
     # inserisci nuova esperienza
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     cursor.execute(
         'INSERT INTO experiences (user_id, tipo, titolo, azienda_istituto, data_inizio, data_fine, is_current, descrizione) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)',
-        (user_id, tipo, titolo, azienda_istituto, data_inizio, data_fine, is_current, descrizione)
+        (user_id, *values)
     )
+    bump_data_version(cursor, user_id)
     
     conn.commit()
     conn.close()
     redirect = '/user-dashboard'
-    return {'success': True, 'message': 'esperienza aggiunta con successo!', 'redirect': redirect}
+    return {'success': True, 'message': 'esperienza aggiunta con successo!', 'redirect': redirect, 'tipo': values[0]}
 
 
 def handle_update_experience(user_id, experience_id, data):
     """Aggiorna un'esperienza esistente (proprietà dell'utente obbligatoria)"""
-    titolo = sanitize_input(data.get('titolo', '').strip())
-    azienda_istituto = sanitize_input(data.get('azienda_istituto', '').strip())
-    data_inizio = data.get('data_inizio', '').strip()
-    data_fine = data.get('data_fine', '').strip()
-    is_current = 1 if data.get('is_current') else 0
-    descrizione = sanitize_input(data.get('descrizione', '').strip())
-    tipo = data.get('tipo', '').strip()
-
-    if tipo not in ['lavoro', 'formazione']:
-        return {'success': False, 'error': 'Tipo di esperienza non valido'}
-
-    if not all([titolo, azienda_istituto, data_inizio]):
-        return {'success': False, 'error': 'Titolo, azienda/istituto e data inizio sono obbligatori'}
-
-    if not is_current and not data_fine:
-        return {'success': False, 'error': 'Data di fine obbligatoria se non in corso'}
-
-    if is_current:
-        data_fine = None
+    values, error = _experience_values(data, _flag(data.get('is_current')))
+    if error:
+        return {'success': False, 'error': error}
 
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -266,9 +332,10 @@ def handle_update_experience(user_id, experience_id, data):
 
         # Aggiorno esperienza
         cursor.execute(
-            'UPDATE experiences SET tipo = %s, titolo = %s, azienda_istituto = %s, data_inizio = %s, data_fine = %s, is_current = %s, descrizione = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s AND user_id = %s',
-            (tipo, titolo, azienda_istituto, data_inizio, data_fine, is_current, descrizione, experience_id, user_id)
+            'UPDATE experiences SET tipo = %s, titolo = %s, azienda_istituto = %s, data_inizio = %s, data_fine = %s, is_current = %s, descrizione = %s WHERE id = %s AND user_id = %s',
+            (*values, experience_id, user_id)
         )
+        bump_data_version(cursor, user_id)
 
         conn.commit()
         return {'success': True, 'message': 'Esperienza aggiornata con successo!'}
@@ -279,26 +346,128 @@ def handle_update_experience(user_id, experience_id, data):
         conn.close()
 
 
+def handle_experience_batch(user_id, operations):
+    """aggiunte, modifiche ed eliminazioni di esperienze in un'unica transazione
+
+    operations: lista di {"op": "add" | "update" | "delete", "id": ..., campi}.
+    Le operazioni vengono prima validate tutte (ownership compresa): se una
+    non e' valida non se ne applica nessuna. Il risultato riporta l'esito
+    di ogni operazione nello stesso ordine.
+    """
+    if not isinstance(operations, list) or not operations:
+        return {'success': False, 'error': 'Nessuna operazione da eseguire'}
+    if len(operations) > EXPERIENCE_BATCH_MAX:
+        return {'success': False, 'error': f'Massimo {EXPERIENCE_BATCH_MAX} operazioni per richiesta'}
+
+    results = []
+    adds, updates, deletes = [], [], []
+    targets = {}            # id esperienza -> risultato dell'operazione che la modifica
+    for index, item in enumerate(operations):
+        op = item.get('op') if isinstance(item, dict) else None
+        result = {'index': index, 'op': op, 'success': False}
+        results.append(result)
+        if op not in EXPERIENCE_OPS:
+            result['error'] = 'Operazione non valida'
+            continue
+
+        if op != 'add':
+            try:
+                experience_id = int(item.get('id'))
+            except (TypeError, ValueError):
+                result['error'] = 'ID esperienza non valido'
+                continue
+            result['id'] = experience_id
+            if experience_id in targets:
+                result['error'] = 'Più operazioni sulla stessa esperienza'
+                continue
+            targets[experience_id] = result
+            if op == 'delete':
+                deletes.append(experience_id)
+                continue
+
+        values, error = _experience_values(item, _flag(item.get('is_current')) if op == 'update' else None)
+        if error:
+            result['error'] = error
+        elif op == 'add':
+            adds.append((user_id, *values))
+        else:
+            updates.append((*values, result['id'], user_id))
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        if targets:
+            # una sola query per verificare la proprieta' di tutte le esperienze toccate
+            placeholders = ', '.join(['%s'] * len(targets))
+            cursor.execute(
+                f'SELECT id FROM experiences WHERE user_id = %s AND id IN ({placeholders})',
+                (user_id, *targets)
+            )
+            owned = {row[0] for row in cursor.fetchall()}
+            for experience_id, result in targets.items():
+                if experience_id not in owned and 'error' not in result:
+                    result['error'] = 'Esperienza non trovata o non autorizzato'
+
+        if any('error' in result for result in results):
+            for result in results:
+                result.setdefault('error', 'Non applicata: altre operazioni non sono valide')
+            return {'success': False, 'error': 'Nessuna modifica applicata', 'results': results}
+
+        if deletes:
+            placeholders = ', '.join(['%s'] * len(deletes))
+            cursor.execute(
+                f'DELETE FROM experiences WHERE user_id = %s AND id IN ({placeholders})',
+                (user_id, *deletes)
+            )
+        if updates:
+            cursor.executemany(
+                'UPDATE experiences SET tipo = %s, titolo = %s, azienda_istituto = %s, data_inizio = %s, data_fine = %s, is_current = %s, descrizione = %s WHERE id = %s AND user_id = %s',
+                updates
+            )
+        if adds:
+            cursor.executemany(
+                'INSERT INTO experiences (user_id, tipo, titolo, azienda_istituto, data_inizio, data_fine, is_current, descrizione) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)',
+                adds
+            )
+        bump_data_version(cursor, user_id)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"Errore modifica esperienze a blocchi: {e}")
+        return {'success': False, 'error': 'Errore durante il salvataggio delle esperienze'}
+    finally:
+        conn.close()
+
+    for result in results:
+        result['success'] = True
+    return {
+        'success': True, 'message': 'Esperienze aggiornate con successo!',
+        'added': len(adds), 'updated': len(updates), 'deleted': len(deletes), 'results': results,
+    }
+
+
 def handle_delete_experience(user_id, experience_id):
     """Handle deleting experience with prepared statements"""
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     
-    # Verifica il proprietario
-    cursor.execute('SELECT id FROM experiences WHERE id = %s AND user_id = %s', (experience_id, user_id))
-    if not cursor.fetchone():
+    # Verifica il proprietario (il tipo indica la lista da aggiornare nella dashboard)
+    cursor.execute('SELECT tipo FROM experiences WHERE id = %s AND user_id = %s', (experience_id, user_id))
+    experience = cursor.fetchone()
+    if not experience:
         conn.close()
         return {'success': False, 'error': 'Esperienza non trovata'}
     
     # cancella
     cursor.execute('DELETE FROM experiences WHERE id = %s AND user_id = %s', (experience_id, user_id))
+    bump_data_version(cursor, user_id)
     
     conn.commit()
     conn.close()
 
 
     redirect = '/user-dashboard'
-    return {'success': True, 'message': 'esperienza eliminata con successo!', 'redirect': redirect}
+    return {'success': True, 'message': 'esperienza eliminata con successo!', 'redirect': redirect, 'tipo': experience['tipo']}
 
 
 def _render_experiences(experiences, tipo):
@@ -326,45 +495,65 @@ def _render_experiences(experiences, tipo):
     
     html += '</div>'
     return html
-################################### Fine Gestione DATI DEL USER ########################################################
-
 
 
-######################################## gestione delle Dashboard ######################################################
-def get_user_dashboard_data(user_id):
-    """recupera tutti i dati per la user dashboard"""
+def get_experiences_fragment(user_id, tipo):
+    """solo la lista di esperienze di un tipo, come nella dashboard (una query invece dell'intera pagina)"""
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
-    
-    # recupero dati utente 
-    cursor.execute('SELECT * FROM users WHERE id = %s', (user_id,))
-    user = dict(cursor.fetchone())
-    
-    # recupero dati CV
-    cursor.execute(
-        'SELECT * FROM cv_data WHERE user_id = %s',
-        (user_id,)
-    )
-    cv_data = cursor.fetchone()
-    cv_data = dict(cv_data) if cv_data else {}
-    
-    # recupero esperienze
     cursor.execute(
-        'SELECT * FROM experiences WHERE user_id = %s ORDER BY data_inizio DESC',
-        (user_id,)
+        'SELECT * FROM experiences WHERE user_id = %s AND tipo = %s ORDER BY data_inizio DESC',
+        (user_id, tipo)
     )
     experiences = [dict(row) for row in cursor.fetchall()]
-    
-
     conn.close()
-    
+    return _render_experiences(experiences, tipo)
+
+
+def get_dashboard_delta(result):
+    """campi modificati da update-profile / cv-content, come testo (senza entita' HTML) per i form della dashboard"""
+    delta = {}
+    for key in ('profile', 'cv'):
+        if key in result:
+            delta[key] = {field: _plain(value) for field, value in result[key].items()}
+    return delta
+################################### Fine Gestione DATI DEL USER ########################################################
+
 
-    # Recupera tutti i CV caricati dall’utente
+
+######################################## gestione delle Dashboard ######################################################
+def _load_profile(user_id, role=None):
+    """utente, dati CV, esperienze e CV caricati; None se l'utente (con quel ruolo) non esiste"""
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM user_cvs WHERE user_id = %s ORDER BY uploaded_at DESC", (user_id,))
-    cv_files = cursor.fetchall()
-    conn.close()
+    try:
+        if role:
+            cursor.execute('SELECT * FROM users WHERE id = %s AND role = %s', (user_id, role))
+        else:
+            cursor.execute('SELECT * FROM users WHERE id = %s', (user_id,))
+        user = cursor.fetchone()
+        if not user:
+            return None
+
+        cursor.execute('SELECT * FROM cv_data WHERE user_id = %s', (user_id,))
+        cv_data = cursor.fetchone()
+
+        cursor.execute(
+            'SELECT * FROM experiences WHERE user_id = %s ORDER BY data_inizio DESC',
+            (user_id,)
+        )
+        experiences = [dict(row) for row in cursor.fetchall()]
+
+        cursor.execute("SELECT * FROM user_cvs WHERE user_id = %s ORDER BY uploaded_at DESC", (user_id,))
+        cv_files = cursor.fetchall()
+    finally:
+        conn.close()
+    return dict(user), dict(cv_data) if cv_data else {}, experiences, cv_files
+
+
+def get_user_dashboard_data(user_id):
+    """recupera tutti i dati per la user dashboard"""
+    user, cv_data, experiences, cv_files = _load_profile(user_id)
 
     cv_list_html = '<ul style="list-style:none; padding-left:0;">'
     for cv in cv_files:
@@ -515,38 +704,12 @@ def _render_students_table(students):
 
 def get_admin_view_student_data(student_id):
     """Get detailed data for a single student"""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
-    # Get user data
-    cursor.execute('SELECT * FROM users WHERE id = %s AND role = "student"', (student_id,))
-    user = cursor.fetchone()
-    
-    if not user:
-        conn.close()
+    profile = _load_profile(student_id, 'student')
+    if not profile:
         return None
-    
-    # Get CV data
-    cursor.execute('SELECT * FROM cv_data WHERE user_id = %s', (student_id,))
-    cv_data = cursor.fetchone()
-    cv_data = dict(cv_data) if cv_data else {}
-    
-    # Get experiences
-    cursor.execute(
-        'SELECT * FROM experiences WHERE user_id = %s ORDER BY data_inizio DESC',
-        (student_id,)
-    )
-    experiences = [dict(row) for row in cursor.fetchall()]
-    
-    
+    user, cv_data, experiences, cv_files = profile
 
 ######################################################################################################################## 
-    # Ottieni tutti i CV caricati
-    cursor.execute("SELECT * FROM user_cvs WHERE user_id = %s ORDER BY uploaded_at DESC", (student_id,))
-    cv_files = cursor.fetchall()
-
-    conn.close()
-
     if cv_files:
         cv_section_html = '<div class="cv-list">'
         for cv in cv_files:
@@ -623,6 +786,51 @@ def get_admin_view_student_data(student_id):
 
 
 
+def _plain(value):
+    """valore per JSON: testo senza le entita' HTML di sanitize_input, date in ISO"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, str):
+        return html.unescape(value)
+    return value
+
+
+def get_profile_json(user_id, role=None):
+    """dati strutturati del profilo (gli stessi delle dashboard, senza HTML) con la loro versione"""
+    profile = _load_profile(user_id, role)
+    if not profile:
+        return None
+    user, cv_data, experiences, cv_files = profile
+    return {
+        'id': user['id'],
+        'email': _plain(user['email']),
+        'nome': _plain(user['nome']),
+        'cognome': _plain(user['cognome']),
+        'role': user['role'],
+        'version': user['data_version'],
+        'cv': {field: _plain(cv_data.get(field)) for field in PROFILE_CV_FIELDS},
+        'experiences': [
+            {**{field: _plain(exp.get(field)) for field in PROFILE_EXPERIENCE_FIELDS},
+             'is_current': bool(exp.get('is_current'))}
+            for exp in experiences
+        ],
+        'cv_files': [
+            {
+                'id': cv['id'],
+                'file_name': os.path.basename(cv['cv_file_path'] or ''),
+                'url': f"/{cv['cv_file_path']}",
+                'uploaded_at': _plain(cv['uploaded_at']),
+            }
+            for cv in cv_files
+        ],
+    }
+
+
+def get_profile_version(user_id, role=None):
+    """versione dei dati del profilo, per rispondere 304 senza caricarlo"""
+    return get_data_version(user_id, role)
+
+
 def _render_cv_section(cv_data):
     """Render CV section HTML"""
     cv_path = cv_data.get('cv_file_path', '')
@@ -640,13 +848,87 @@ def _render_cv_section(cv_data):
 
 
 
+def get_admin_sql_profile_data():
+    """dati della pagina del profiler SQL (solo admin)"""
+    from sql_profiler import SQL_PROFILER, SQL_PROFILER_ENABLED, SQL_PROFILER_MAX_DB_MS, SQL_PROFILER_MAX_QUERIES
+    report = SQL_PROFILER.report()
+    if SQL_PROFILER_ENABLED:
+        status = f'Budget per richiesta: {SQL_PROFILER_MAX_QUERIES} query, {SQL_PROFILER_MAX_DB_MS:.0f} ms di DB'
+    else:
+        status = 'Profiler disattivato: avvia il server con SQL_PROFILER=1'
+    return {
+        'profiler_status': status,
+        'flagged_rows': _render_sql_profiles(report['flagged'], 'Nessuna richiesta oltre il budget'),
+        'recent_rows': _render_sql_profiles(report['recent'], 'Nessuna richiesta registrata'),
+        'top_queries_rows': _render_sql_top_queries(report['top_queries']),
+    }
+
+
+def _render_sql_profiles(profiles, empty_message):
+    """righe della tabella delle richieste profilate, con il dettaglio delle query"""
+    if not profiles:
+        return f'<tr><td colspan="6" class="text-center">{empty_message}</td></tr>'
+
+    html = ''
+    for profile in profiles:
+        statements = ''.join(
+            f"<li><code>{sanitize_input(s['sql'])}</code> — {s['count']}x, {s['total_ms']:.2f} ms, "
+            f"{s['rows']} righe<br><small>{sanitize_input(', '.join(s['callers']))}</small></li>"
+            for s in profile['statements']
+        )
+        flags = ''.join(f'<p><strong>⚠ {sanitize_input(flag)}</strong></p>' for flag in profile['flags'])
+        html += f'''
+        <tr>
+            <td>{profile['method']} {sanitize_input(profile['path'])}</td>
+            <td>{profile['status']}</td>
+            <td>{profile['queries']}</td>
+            <td>{profile['db_ms']}</td>
+            <td>{profile['latency_ms']}</td>
+            <td><details><summary>Query</summary>{flags}<ul>{statements}</ul></details></td>
+        </tr>
+        '''
+    return html
+
+
+def _render_sql_top_queries(queries):
+    """righe della tabella delle query piu' costose (tempo totale)"""
+    if not queries:
+        return '<tr><td colspan="6" class="text-center">Nessuna query registrata</td></tr>'
+
+    html = ''
+    for query in queries:
+        html += f'''
+        <tr>
+            <td><code>{sanitize_input(query['sql'])}</code></td>
+            <td>{query['count']}</td>
+            <td>{query['total_ms']}</td>
+            <td>{query['avg_ms']}</td>
+            <td>{query['max_ms']}</td>
+            <td>{query['rows']}</td>
+        </tr>
+        '''
+    return html
+
+
+def handle_admin_import_students(lines, fmt):
+    """import massivo degli studenti da CSV o JSON lines (vedi student_import)"""
+    from student_import import import_students
+
+    def imported(emails):
+        # le email potevano essere in cache come sconosciute
+        invalidate_login_cache(*emails)
+        REGISTRATION_PIPELINE.remember(emails)
+
+    return import_students(lines, fmt, on_imported=imported)
+
+
 def handle_admin_delete_user(user_id):
     """Admin: Delete a student user"""
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     
     # verifica che l'utente esista e non sia uno studente
-    cursor.execute('SELECT id, role FROM users WHERE id = %s', (user_id,))
+    cursor.execute('SELECT id, role, email FROM users WHERE id = %s', (user_id,))
     user = cursor.fetchone()
     
     if not user:
@@ -662,6 +944,7 @@ def handle_admin_delete_user(user_id):
     
     conn.commit()
     conn.close()
+    invalidate_login_cache(user['email'])
     
     return {'success': True, 'message': 'Utente eliminato con successo'}
 
@@ -675,9 +958,9 @@ def handle_admin_delete_user(user_id):
 
 from pdf_generator import generate_cv_pdf
 
-def handle_download_cv(user_id):
+def handle_download_cv(user_id, engine=None):
     try:
-        pdf_bytes = generate_cv_pdf(user_id)
+        pdf_bytes = generate_cv_pdf(user_id, engine)
         return {'success': True, 'pdf_bytes': pdf_bytes}
     except Exception as e:
         return {'success': False, 'error': str(e)}
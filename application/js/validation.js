@@ -334,6 +334,83 @@ function sanitizeInput(str) {
     return div.innerHTML;
 }
 
+/**
+ * Invio di una modifica alla dashboard senza ricaricare la pagina.
+ * Con X-Response-Mode: delta il server risponde con i frammenti HTML da
+ * sostituire (per id) e i campi salvati da riportare nei form.
+ */
+async function postPartial(action, params) {
+    let response;
+    try {
+        response = await fetch(action, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/x-www-form-urlencoded',
+                'X-Response-Mode': 'delta'
+            },
+            body: new URLSearchParams(params),
+            credentials: 'same-origin'
+        });
+    } catch (err) {
+        throw new Error('Errore di connessione al server.');
+    }
+
+    const contentType = response.headers.get('Content-Type') || '';
+    const result = contentType.includes('application/json') ? await response.json() : {};
+    if (!response.ok || !result.success) {
+        throw new Error(result.error || `Errore del server (${response.status})`);
+    }
+    applyDelta(result);
+    return result;
+}
+
+/**
+ * Apply a delta response to the page
+ */
+function applyDelta(delta) {
+    Object.entries(delta.fragments || {}).forEach(([id, html]) => {
+        const target = document.getElementById(id);
+        if (target) {
+            target.innerHTML = html;
+        }
+    });
+
+    // i campi di ogni gruppo vanno nel form con data-delta corrispondente
+    Object.entries(delta.data || {}).forEach(([group, fields]) => {
+        document.querySelectorAll(`form[data-delta="${group}"]`).forEach(form => {
+            Object.entries(fields).forEach(([name, value]) => {
+                const field = form.querySelector(`[data-field="${name}"]`) || form.querySelector(`[name="${name}"]`);
+                if (field) {
+                    field.value = value ?? '';
+                }
+            });
+        });
+    });
+}
+
+/**
+ * Submit a form with postPartial instead of a full page reload
+ */
+function initPartialForm(form) {
+    form.addEventListener('submit', async (e) => {
+        // gia' bloccato dalla validazione
+        if (e.defaultPrevented) return;
+        e.preventDefault();
+
+        const submitButton = form.querySelector('[type="submit"]');
+        if (submitButton) submitButton.disabled = true;
+        try {
+            const result = await postPartial(form.action, new FormData(form));
+            showFormMessage(form, result.message || 'Modifiche salvate', 'success');
+            form.dispatchEvent(new CustomEvent('partial:success', { detail: result }));
+        } catch (err) {
+            showFormMessage(form, err.message, 'error');
+        } finally {
+            if (submitButton) submitButton.disabled = false;
+        }
+    });
+}
+
 /**
  * Initialize all forms on page load
  */
@@ -344,6 +421,11 @@ document.addEventListener('DOMContentLoaded', () => {
         initFormValidation(form);
     });
 
+    // Forms saved without reloading the page (after validation, which may block the submit)
+    document.querySelectorAll('form[data-partial="true"]').forEach(form => {
+        initPartialForm(form);
+    });
+
     // Initialize file inputs
     const fileInputs = document.querySelectorAll('input[type="file"]');
     fileInputs.forEach(input => {
@@ -370,5 +452,7 @@ window.CVValidation = {
     validateForm,
     showFormMessage,
     sanitizeInput,
-    initFormValidation
+    initFormValidation,
+    postPartial,
+    applyDelta
 };
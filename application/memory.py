@@ -0,0 +1,151 @@
+"""Diagnostica della memoria in produzione (solo admin): tracemalloc e strutture dell'app.
+
+tracemalloc si avvia e si ferma a caldo; gli snapshot restano in memoria
+(al massimo MEMORY_MAX_SNAPSHOTS) per confrontarli tra loro o con lo stato
+attuale.
+"""
+import itertools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+
+MEMORY_MAX_SNAPSHOTS = int(os.getenv('MEMORY_MAX_SNAPSHOTS', '5'))
+MEMORY_TRACE_FRAMES = int(os.getenv('MEMORY_TRACE_FRAMES', '10'))
+
+# allocazioni di tracemalloc stesso e degli import: solo rumore
+_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+]
+GROUP_BY = ('lineno', 'filename', 'traceback')
+
+_lock = threading.Lock()
+_snapshots = OrderedDict()      # id -> (etichetta, timestamp, snapshot)
+_ids = itertools.count(1)
+
+
+def start(frames=MEMORY_TRACE_FRAMES):
+    if tracemalloc.is_tracing():
+        return False
+    tracemalloc.start(max(1, min(frames, 100)))
+    return True
+
+
+def stop():
+    """ferma tracemalloc e libera gli snapshot (non piu' confrontabili)"""
+    with _lock:
+        _snapshots.clear()
+    if not tracemalloc.is_tracing():
+        return False
+    tracemalloc.stop()
+    return True
+
+
+def take_snapshot(label=''):
+    """salva uno snapshot e ne restituisce l'id (tracemalloc deve essere attivo)"""
+    snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+    with _lock:
+        snapshot_id = next(_ids)
+        _snapshots[snapshot_id] = (label, time.time(), snapshot)
+        while len(_snapshots) > MEMORY_MAX_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+    return snapshot_id
+
+
+def _get_snapshot(snapshot_id):
+    """snapshot salvato, oppure uno nuovo dello stato attuale se snapshot_id e' None"""
+    if snapshot_id is None:
+        return tracemalloc.take_snapshot().filter_traces(_FILTERS)
+    with _lock:
+        entry = _snapshots.get(snapshot_id)
+    if entry is None:
+        raise KeyError(snapshot_id)
+    return entry[2]
+
+
+def _stat(stat, group_by):
+    frames = [f'{frame.filename}:{frame.lineno}' for frame in stat.traceback]
+    result = {'size_kb': round(stat.size / 1024, 1), 'count': stat.count}
+    if hasattr(stat, 'size_diff'):
+        result['size_diff_kb'] = round(stat.size_diff / 1024, 1)
+        result['count_diff'] = stat.count_diff
+    if group_by == 'traceback':
+        result['traceback'] = frames
+    elif group_by == 'filename':
+        result['site'] = stat.traceback[0].filename
+    else:
+        result['site'] = frames[0]
+    return result
+
+
+def top(limit=20, group_by='lineno', snapshot_id=None):
+    """siti che occupano piu' memoria"""
+    stats = _get_snapshot(snapshot_id).statistics(group_by)
+    return [_stat(stat, group_by) for stat in stats[:limit]]
+
+
+def diff(from_id, to_id=None, limit=20, group_by='lineno'):
+    """siti cresciuti di piu' tra due snapshot (to_id None = adesso)"""
+    old = _get_snapshot(from_id)
+    new = _get_snapshot(to_id)
+    stats = new.compare_to(old, group_by)
+    return [_stat(stat, group_by) for stat in stats[:limit]]
+
+
+def deep_size(obj, limit=1000000):
+    """byte occupati da obj e dal suo contenuto (dict, liste, tuple, set); si ferma dopo limit oggetti"""
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack and len(seen) < limit:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+    return total
+
+
+def process_rss():
+    """memoria residente del processo in byte (None se non disponibile)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        # ru_maxrss e' il picco, non il valore attuale (KB su Linux, byte su macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        return None
+
+
+def status():
+    current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+    with _lock:
+        snapshots = [
+            {'id': snapshot_id, 'label': label, 'ts': ts}
+            for snapshot_id, (label, ts, _) in _snapshots.items()
+        ]
+    return {
+        'tracing': tracemalloc.is_tracing(),
+        'traced_kb': round(current / 1024, 1),
+        'traced_peak_kb': round(peak / 1024, 1),
+        'tracemalloc_overhead_kb': round(tracemalloc.get_tracemalloc_memory() / 1024, 1),
+        'rss_bytes': process_rss(),
+        'snapshots': snapshots,
+    }
@@ -0,0 +1,167 @@
+"""Metriche dell'applicazione in formato Prometheus (endpoint /metrics).
+
+Ogni thread aggiorna un proprio dizionario di valori, senza lock: i valori
+vengono sommati solo quando /metrics viene letto. I dizionari dei thread
+terminati (il server usa un thread per richiesta) vengono accorpati in un
+unico totale.
+"""
+import threading
+
+from db_instrument import QUERY_OBSERVERS, query_label
+from memory import process_rss
+
+# secondi: da 1 ms (cache, static) a 30 s (export e PDF lunghi)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+# oltre questo numero di thread registrati si accorpano quelli terminati
+_MAX_SHARDS = 64
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []           # (thread, valori) dei thread che hanno registrato qualcosa
+        self._retired = {}          # valori dei thread terminati
+        self._families = {}         # nome -> (tipo, descrizione, etichette, bucket)
+        self._callbacks = {}        # nome -> funzione per i gauge letti al momento
+
+    # === definizione ===
+    def counter(self, name, help_text, labels=()):
+        self._families[name] = ('counter', help_text, labels, None)
+
+    def gauge(self, name, help_text, labels=(), callback=None):
+        self._families[name] = ('gauge', help_text, labels, None)
+        if callback is not None:
+            self._callbacks[name] = callback
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self._families[name] = ('histogram', help_text, labels, tuple(buckets))
+
+    # === aggiornamento (senza lock) ===
+    def _values(self):
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._lock:
+                if len(self._shards) >= _MAX_SHARDS:
+                    self._retire_dead()
+                self._shards.append((threading.current_thread(), values))
+            return values
+
+    def inc(self, name, *labels, value=1):
+        """incrementa un counter, o somma value (anche negativo) a un gauge"""
+        values = self._values()
+        key = (name, labels)
+        values[key] = values.get(key, 0) + value
+
+    def observe(self, name, value, *labels):
+        values = self._values()
+        key = (name, labels)
+        entry = values.get(key)
+        buckets = self._families[name][3]
+        if entry is None:
+            entry = values[key] = [0] * (len(buckets) + 2)    # bucket..., count, sum
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                entry[i] += 1
+                break
+        entry[-2] += 1
+        entry[-1] += value
+
+    # === lettura ===
+    def _retire_dead(self):
+        alive = []
+        for thread, values in self._shards:
+            if thread.is_alive():
+                alive.append((thread, values))
+            else:
+                _merge(self._retired, values)
+        self._shards = alive
+
+    def snapshot(self):
+        """somma dei valori di tutti i thread: {(nome, etichette): valore}"""
+        with self._lock:
+            self._retire_dead()
+            total = {}
+            _merge(total, self._retired)
+            for _, values in self._shards:
+                _merge(total, values.copy())
+        return total
+
+    def render(self):
+        """testo nel formato di esposizione di Prometheus"""
+        snapshot = self.snapshot()
+        by_name = {}
+        for (name, labels), value in snapshot.items():
+            by_name.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name, (kind, help_text, label_names, buckets) in self._families.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if name in self._callbacks:
+                lines.append(f'{name} {_format(self._callbacks[name]())}')
+                continue
+            for labels, value in sorted(by_name.get(name, []), key=lambda item: item[0]):
+                if kind != 'histogram':
+                    lines.append(f'{name}{_labels(label_names, labels)} {_format(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets, value):
+                    cumulative += count
+                    bucket_labels = _labels(label_names, labels, 'le="%s"' % bound)
+                    lines.append(f'{name}_bucket{bucket_labels} {cumulative}')
+                bucket_labels = _labels(label_names, labels, 'le="+Inf"')
+                lines.append(f'{name}_bucket{bucket_labels} {value[-2]}')
+                lines.append(f'{name}_count{_labels(label_names, labels)} {value[-2]}')
+                lines.append(f'{name}_sum{_labels(label_names, labels)} {_format(value[-1])}')
+        return '\n'.join(lines) + '\n'
+
+
+def _merge(target, values):
+    for key, value in values.items():
+        if isinstance(value, list):
+            current = target.get(key)
+            target[key] = list(value) if current is None else [a + b for a, b in zip(current, value)]
+        else:
+            target[key] = target.get(key, 0) + value
+
+
+METRICS = MetricsRegistry()
+# il numero di richieste per route e status e' http_request_duration_seconds_count
+METRICS.histogram('http_request_duration_seconds', 'Durata delle richieste HTTP', ('method', 'route', 'status'))
+METRICS.gauge('http_requests_in_flight', 'Richieste HTTP in corso')
+METRICS.histogram('db_query_duration_seconds', 'Durata delle query al database', ('operation', 'table'), DB_BUCKETS)
+METRICS.counter('db_query_errors_total', 'Query al database fallite', ('operation', 'table'))
+METRICS.counter('cv_upload_bytes_total', 'Byte dei CV PDF caricati')
+METRICS.counter('cv_uploads_total', 'CV PDF caricati')
+METRICS.histogram('pdf_generation_duration_seconds', 'Durata della generazione dei CV PDF', ('engine',))
+METRICS.gauge('process_resident_memory_bytes', 'Memoria residente del processo', callback=lambda: process_rss() or 0)
+
+
+def observe_query(statement):
+    operation, table = query_label(statement.sql)
+    METRICS.observe('db_query_duration_seconds', statement.elapsed, operation, table)
+    if statement.failed:
+        METRICS.inc('db_query_errors_total', operation, table)
+
+
+QUERY_OBSERVERS.append(observe_query)
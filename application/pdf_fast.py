@@ -0,0 +1,325 @@
+"""Writer PDF specializzato per il layout fisso del CV a due colonne.
+
+Produce lo stesso layout di pdf_generator (A4, colonna sinistra con sfondo
+grigio, nome centrato, footer) scrivendo direttamente gli oggetti PDF con i
+font standard Helvetica, senza passare da platypus.
+"""
+import html
+import re
+from datetime import datetime
+
+# === Metriche dei font (WinAnsiEncoding, unita' 1/1000 em) ===
+# Helvetica-Oblique ha le stesse larghezze di Helvetica
+_HELVETICA_WIDTHS = (
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584, 350,
+    556, 350, 222, 556, 333, 1000, 556, 556, 333, 1000, 667, 333, 1000, 350, 611, 350,
+    350, 222, 222, 333, 333, 350, 556, 1000, 333, 1000, 500, 333, 944, 350, 500, 667,
+    278, 333, 556, 556, 556, 556, 260, 556, 333, 737, 370, 556, 584, 333, 737, 333,
+    400, 584, 333, 333, 333, 556, 537, 278, 333, 333, 365, 556, 834, 834, 834, 611,
+    667, 667, 667, 667, 667, 667, 1000, 722, 667, 667, 667, 667, 278, 278, 278, 278,
+    722, 722, 778, 778, 778, 778, 778, 584, 778, 722, 722, 722, 722, 667, 667, 611,
+    556, 556, 556, 556, 556, 556, 889, 500, 556, 556, 556, 556, 278, 278, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 584, 611, 556, 556, 556, 556, 500, 556, 500,
+)
+_HELVETICA_BOLD_WIDTHS = (
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584, 350,
+    556, 350, 278, 556, 500, 1000, 556, 556, 333, 1000, 667, 333, 1000, 350, 611, 350,
+    350, 278, 278, 500, 500, 350, 556, 1000, 333, 1000, 556, 333, 944, 350, 500, 667,
+    278, 333, 556, 556, 556, 556, 280, 556, 333, 737, 370, 556, 584, 333, 737, 333,
+    400, 584, 333, 333, 333, 611, 556, 278, 333, 333, 365, 556, 834, 834, 834, 611,
+    722, 722, 722, 722, 722, 722, 1000, 722, 667, 667, 667, 667, 278, 278, 278, 278,
+    722, 722, 778, 778, 778, 778, 778, 584, 778, 722, 722, 722, 722, 667, 667, 611,
+    556, 556, 556, 556, 556, 556, 889, 556, 556, 556, 556, 556, 278, 278, 278, 278,
+    611, 611, 611, 611, 611, 611, 611, 584, 611, 611, 611, 611, 611, 556, 611, 556,
+)
+
+_WIDTHS = {
+    b'F1': _HELVETICA_WIDTHS,        # Helvetica
+    b'F2': _HELVETICA_BOLD_WIDTHS,   # Helvetica-Bold
+    b'F3': _HELVETICA_WIDTHS,        # Helvetica-Oblique
+}
+
+# === Layout (stesse misure di pdf_generator.generate_cv_pdf) ===
+CM = 72.0 / 2.54
+PAGE_WIDTH, PAGE_HEIGHT = 21 * CM, 29.7 * CM
+MARGIN = 1.5 * CM
+LEFT_WIDTH = 6 * CM
+GAP = 0.5 * CM
+RIGHT_WIDTH = PAGE_WIDTH - LEFT_WIDTH - GAP - 2 * MARGIN
+VERTICAL_OFFSET = 4.5 * CM
+FRAME_HEIGHT = PAGE_HEIGHT - 2 * MARGIN - VERTICAL_OFFSET
+
+# (x, top, bottom, larghezza utile) delle due colonne, padding gia' applicato
+FRAMES = (
+    (MARGIN + 10, MARGIN + VERTICAL_OFFSET + FRAME_HEIGHT - 20, MARGIN + VERTICAL_OFFSET + 10, LEFT_WIDTH - 20),
+    (MARGIN + LEFT_WIDTH + GAP + 10, MARGIN + VERTICAL_OFFSET + FRAME_HEIGHT - 10, MARGIN + VERTICAL_OFFSET + 10, RIGHT_WIDTH - 20),
+)
+
+# stili: (font size, leading, colore, space before, space after)
+SECTION_TITLE = (13, 14, b'0.1804 0.5255 0.6706 rg', 10, 6)
+BODY = (10.5, 13, b'0.2 0.2 0.2 rg', 0, 0)
+
+# === Contenuto statico pre-serializzato ===
+_BACKGROUND = b'q 0.9608 0.9608 0.9608 rg %.2f %.2f %.2f %.2f re f Q\n' % (
+    MARGIN, MARGIN + 8 * CM, LEFT_WIDTH, PAGE_HEIGHT - 2 * MARGIN - 6 * CM
+)
+
+_HEADER = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+# oggetti fissi: 1 catalogo, 3-5 font (2 e' l'albero delle pagine, scritto in fondo)
+_STATIC_OBJECTS = (
+    (1, b'<< /Type /Catalog /Pages 2 0 R >>'),
+    (3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>'),
+    (4, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>'),
+    (5, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Oblique /Encoding /WinAnsiEncoding >>'),
+)
+
+
+def _serialize_static():
+    out = bytearray(_HEADER)
+    offsets = {}
+    for num, body in _STATIC_OBJECTS:
+        offsets[num] = len(out)
+        out += b'%d 0 obj\n%s\nendobj\n' % (num, body)
+    return bytes(out), offsets
+
+
+_PREFIX, _PREFIX_OFFSETS = _serialize_static()
+_FIRST_PAGE_OBJ = 6
+_PAGE_DICT = (
+    b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.4f %.4f] '
+    b'/Resources << /Font << /F1 3 0 R /F2 4 0 R /F3 5 0 R >> /ProcSet [/PDF /Text] >> '
+    b'/Contents %%d 0 R >>' % (PAGE_WIDTH, PAGE_HEIGHT)
+)
+
+
+# === Testo ===
+def _clean(text):
+    """come sanitize_input di pdf_generator, ma il testo esce in chiaro: le entita'
+    di database.sanitize_input (&#58;, &#x27;, ...) si decodificano come fa Paragraph"""
+    if not text:
+        return ""
+    return html.unescape(re.sub(r'[\x00-\x1f\x7f]', '', str(text))).strip()
+
+
+def _encode(text):
+    return text.encode('cp1252', 'replace')
+
+
+def _escape(data):
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def _width(data, font, size):
+    return sum(map(_WIDTHS[font].__getitem__, data)) * size / 1000.0
+
+
+def _wrap(runs, size, max_width):
+    """divide i run (font, testo) in righe che stanno in max_width
+
+    Ogni riga e' una lista di (font, bytes) gia' codificati. Le misure sono
+    fatte in unita' del font (1/1000 em) per evitare conversioni per parola.
+    """
+    limit = max_width * 1000.0 / size
+    lines = []
+    line = []
+    line_width = 0
+    for font, text in runs:
+        measure = _WIDTHS[font].__getitem__
+        space_width = measure(32)
+        for word in _encode(text).split():
+            w = sum(map(measure, word))
+            space = space_width if line else 0
+            if line and line_width + space + w > limit:
+                lines.append(line)
+                line, line_width, space = [], 0, 0
+
+            # parole piu' lunghe della colonna (la riga qui e' sempre vuota): spezzate per caratteri
+            while w > limit and len(word) > 1:
+                cut = len(word) - 1
+                while cut > 1 and sum(map(measure, word[:cut])) > limit:
+                    cut -= 1
+                lines.append([(font, word[:cut])])
+                word = word[cut:]
+                w = sum(map(measure, word))
+
+            if line and line[-1][0] == font:
+                line[-1] = (font, line[-1][1] + b' ' + word)
+            else:
+                line.append((font, (b' ' if line else b'') + word))
+            line_width += space + w
+
+    if line:
+        lines.append(line)
+    return lines or [[]]
+
+
+# === Impaginazione ===
+class _Layout:
+    """dispone paragrafi e spazi nelle colonne, aggiungendo pagine se serve"""
+
+    def __init__(self):
+        self.pages = []
+        self.frame = len(FRAMES) - 1
+        self.ops = None
+        self._next_frame()
+
+    def _next_frame(self):
+        self.frame += 1
+        if self.frame == len(FRAMES):
+            self.frame = 0
+            self.ops = bytearray()
+            self.pages.append(self.ops)
+        self.x, self.y, self.bottom, self.avail = FRAMES[self.frame]
+        self.at_top = True
+
+    def frame_break(self):
+        self._next_frame()
+
+    def spacer(self, height):
+        if self.y - height < self.bottom:
+            self._next_frame()
+            return
+        self.y -= height
+        self.at_top = False
+
+    def paragraph(self, runs, style):
+        size, leading, color, space_before, space_after = style
+        lines = _wrap(runs, size, self.avail)
+
+        while lines:
+            before = 0 if self.at_top else space_before
+            fit = int((self.y - before - self.bottom) // leading)
+            if fit <= 0:
+                if self.at_top:
+                    fit = 1   # riga piu' alta della colonna vuota: la disegna comunque
+                else:
+                    self._next_frame()
+                    continue
+
+            chunk, lines = lines[:fit], lines[fit:]
+            y = self.y - before - size
+            ops = self.ops
+            ops += color + b'\nBT\n'
+            for line in chunk:
+                ops += b'1 0 0 1 %.2f %.2f Tm\n' % (self.x, y)
+                for font, data in line:
+                    ops += b'/%s %g Tf (%s) Tj\n' % (font, size, _escape(data))
+                y -= leading
+            ops += b'ET\n'
+
+            self.y -= before + len(chunk) * leading
+            self.at_top = False
+            if lines:
+                self._next_frame()
+
+        self.y -= space_after
+
+
+def _centered(text, font, size, y, color):
+    data = _encode(text)
+    x = PAGE_WIDTH / 2.0 - _width(data, font, size) / 2.0
+    return b'%s\nBT /%s %g Tf 1 0 0 1 %.2f %.2f Tm (%s) Tj ET\n' % (color, font, size, x, y, _escape(data))
+
+
+def _text_or_list(layout, title, text):
+    """equivalente di pdf_generator.add_text_or_list"""
+    layout.paragraph([(b'F1', title)], SECTION_TITLE)
+    if not text:
+        layout.paragraph([(b'F1', "Nessun dato inserito")], BODY)
+        return
+    if ',' in text:
+        for item in [t.strip() for t in text.split(',') if t.strip()]:
+            layout.paragraph([(b'F1', f"• {_clean(item)}")], BODY)
+    else:
+        layout.paragraph([(b'F1', _clean(text))], BODY)
+    layout.spacer(10)
+
+
+def _experiences(layout, title, items, space_before_title):
+    if not items:
+        return
+    if space_before_title:
+        layout.spacer(6)
+    layout.paragraph([(b'F1', title)], SECTION_TITLE)
+    for e in items:
+        periodo = f"{e['data_inizio']} - {'In corso' if e['is_current'] else (e.get('data_fine') or '')}"
+        layout.paragraph([(b'F2', _clean(e.get('titolo'))), (b'F1', f"— {_clean(e.get('azienda_istituto'))}")], BODY)
+        layout.paragraph([(b'F1', periodo)], BODY)
+        if e.get('descrizione'):
+            layout.paragraph([(b'F1', _clean(e['descrizione']))], BODY)
+        layout.spacer(6)
+
+
+def render_cv_pdf(user, cv, experiences):
+    """Genera i bytes del PDF del CV a partire dai dati gia' letti dal DB."""
+    cv = cv or {}
+    experiences = experiences or []
+    layout = _Layout()
+
+    # === COLONNA SINISTRA ===
+    layout.paragraph([(b'F1', "Contatti")], SECTION_TITLE)
+    for value in (cv.get('telefono'), user.get('email'), cv.get('linkedin_url'), cv.get('citta')):
+        if value and value.strip():
+            layout.paragraph([(b'F1', _clean(value))], BODY)
+    layout.spacer(10)
+
+    _text_or_list(layout, "Competenze", cv.get('skills', ''))
+    _text_or_list(layout, "Lingue", cv.get('languages', ''))
+    _text_or_list(layout, "Patenti", cv.get('patente', ''))
+
+    # === COLONNA DESTRA ===
+    layout.frame_break()
+    _experiences(layout, "Formazione", [e for e in experiences if e['tipo'] == 'formazione'], True)
+    _experiences(layout, "Esperienze Lavorative", [e for e in experiences if e['tipo'] == 'lavoro'], False)
+
+    if cv.get('hobby'):
+        layout.spacer(6)
+        layout.paragraph([(b'F1', "Informazioni personali")], SECTION_TITLE)
+        layout.paragraph([(b'F1', _clean(cv['hobby']))], BODY)
+
+    # === Decorazioni di pagina (uguali su ogni pagina) ===
+    full_name = f"{_clean(user.get('nome'))} {_clean(user.get('cognome'))}".strip() or "Utente Sconosciuto"
+    footer_text = f"Generato il {datetime.now().strftime('%d/%m/%Y %H:%M')}"
+    decorations = (
+        _BACKGROUND
+        + _centered(full_name, b'F2', 26, PAGE_HEIGHT - 2 * CM, b'0.1804 0.5255 0.6706 rg')
+        + _centered(footer_text, b'F3', 9, 1.2 * CM, b'0.502 0.502 0.502 rg')
+    )
+
+    # === Serializzazione ===
+    out = bytearray(_PREFIX)
+    offsets = dict(_PREFIX_OFFSETS)
+    kids = []
+    num = _FIRST_PAGE_OBJ
+    for ops in layout.pages:
+        content = decorations + ops
+        offsets[num] = len(out)
+        out += b'%d 0 obj\n' % num + _PAGE_DICT % (num + 1) + b'\nendobj\n'
+        offsets[num + 1] = len(out)
+        out += b'%d 0 obj\n<< /Length %d >>\nstream\n%s\nendstream\nendobj\n' % (num + 1, len(content), content)
+        kids.append(b'%d 0 R' % num)
+        num += 2
+
+    offsets[2] = len(out)
+    out += b'2 0 obj\n<< /Type /Pages /Kids [%s] /Count %d >>\nendobj\n' % (b' '.join(kids), len(kids))
+
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % num
+    for i in range(1, num):
+        out += b'%010d 00000 n \n' % offsets[i]
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (num, xref)
+    return bytes(out)
@@ -1,5 +1,7 @@
 import logging
+import os
 import re
+import time
 from io import BytesIO
 from datetime import datetime
 from reportlab.lib.pagesizes import A4
@@ -10,9 +12,16 @@ from reportlab.platypus import (
     BaseDocTemplate, Frame, PageTemplate, Paragraph, Spacer, FrameBreak
 )
 from database import get_db_connection
+from metrics import METRICS
+from pdf_fast import render_cv_pdf
+from tracing import span
 
 logger = logging.getLogger(__name__)
 
+# motore di rendering: 'reportlab' (platypus) oppure 'fast' (pdf_fast)
+PDF_ENGINES = ('reportlab', 'fast')
+PDF_ENGINE = os.getenv('PDF_ENGINE', 'reportlab')
+
 # === Sanitizzazione ===
 def sanitize_input(text):
     if not text:
@@ -83,134 +92,154 @@ def draw_background_and_footer(canvas, doc):
     canvas.restoreState()
 
 # === Generatore PDF ===
-def generate_cv_pdf(user_id):
-    """Genera un CV in layout a due colonne e restituisce i bytes del PDF."""
+def build_cv_pdf(user, cv, experiences):
+    """Costruisce con platypus il CV a due colonne e restituisce i bytes del PDF."""
+    # === Layout ===
+    buffer = BytesIO()
+    width, height = A4
+    margin = 1.5 * cm
+    left_width = 6 * cm
+    gap = 0.5 * cm
+    right_width = width - left_width - gap - (2 * margin)
+
+    vertical_offset = 4.5 * cm
+
+    left_frame = Frame(
+        margin, margin + vertical_offset, left_width, height - 2 * margin - vertical_offset,
+        leftPadding=10, rightPadding=10, topPadding=20, bottomPadding=10, id='left'
+    )
+    right_frame = Frame(
+        margin + left_width + gap, margin + vertical_offset, right_width, height - 2 * margin - vertical_offset,
+        leftPadding=10, rightPadding=10, topPadding=10, bottomPadding=10, id='right'
+    )
+
+    # === Stili ===
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='Header', fontSize=26, textColor=colors.HexColor('#2E86AB'),
+                              alignment=1, leading=30, spaceAfter=12))
+    styles.add(ParagraphStyle(name='SectionTitle', fontSize=13, textColor=colors.HexColor('#2E86AB'),
+                              spaceBefore=10, spaceAfter=6, leading=14))
+    styles.add(ParagraphStyle(name='Body', fontSize=10.5, textColor=colors.HexColor('#333333'), leading=13))
+
+    doc = BaseDocTemplate(buffer, pagesize=A4,
+                          leftMargin=margin, rightMargin=margin,
+                          topMargin=margin, bottomMargin=margin)
+    template = PageTemplate(id='TwoCol', frames=[left_frame, right_frame], onPage=draw_background_and_footer)
+    doc.addPageTemplates([template])
+
+    story = []
+
+    # === HEADER ===
+    full_name = f"{sanitize_input(user.get('nome'))} {sanitize_input(user.get('cognome'))}".strip()
+
+    # === COLONNA SINISTRA ===
+    left_story = []
+
+    # Contatti
+    left_story.append(Paragraph("Contatti", styles['SectionTitle']))
+    contact_lines = []
+
+    phone = cv.get('telefono')
+    if phone and phone.strip():
+        contact_lines.append(f"{sanitize_input(phone)}")
+
+    email = user.get('email')
+    if email and email.strip():
+        contact_lines.append(f"{sanitize_input(email)}")
+
+    linkedin = cv.get('linkedin_url')
+    if linkedin and linkedin.strip():
+        contact_lines.append(f"{sanitize_input(linkedin)}")
+
+    city = cv.get('citta')
+    if city and city.strip():
+        contact_lines.append(f"{sanitize_input(city)}")
+
+    for line in contact_lines:
+        left_story.append(Paragraph(line, styles['Body']))
+    left_story.append(Spacer(1, 10))
+
+    # Competenze, Lingue, Patenti
+    add_text_or_list(left_story, "Competenze", cv.get('skills', ''), styles)
+    add_text_or_list(left_story, "Lingue", cv.get('languages', ''), styles)
+    add_text_or_list(left_story, "Patenti", cv.get('patente', ''), styles)
+
+    # === COLONNA DESTRA ===
+    right_story = []
+
+    # Formazione
+    edu = [e for e in experiences if e['tipo'] == 'formazione']
+    if edu:
+        right_story.append(Spacer(1, 6))
+        right_story.append(Paragraph("Formazione", styles['SectionTitle']))
+        for e in edu:
+            periodo = f"{e['data_inizio']} - {'In corso' if e['is_current'] else (e.get('data_fine') or '')}"
+            titolo = sanitize_input(e.get('titolo'))
+            istituto = sanitize_input(e.get('azienda_istituto'))
+            right_story.append(Paragraph(f"<b>{titolo}</b> — {istituto}", styles['Body']))
+            right_story.append(Paragraph(periodo, styles['Body']))
+            if e.get('descrizione'):
+                right_story.append(Paragraph(sanitize_input(e['descrizione']), styles['Body']))
+            right_story.append(Spacer(1, 6))
+
+    # Esperienze lavorative
+    work = [e for e in experiences if e['tipo'] == 'lavoro']
+    if work:
+        right_story.append(Paragraph("Esperienze Lavorative", styles['SectionTitle']))
+        for e in work:
+            periodo = f"{e['data_inizio']} - {'In corso' if e['is_current'] else (e.get('data_fine') or '')}"
+            titolo = sanitize_input(e.get('titolo'))
+            azienda = sanitize_input(e.get('azienda_istituto'))
+            right_story.append(Paragraph(f"<b>{titolo}</b> — {azienda}", styles['Body']))
+            right_story.append(Paragraph(periodo, styles['Body']))
+            if e.get('descrizione'):
+                right_story.append(Paragraph(sanitize_input(e['descrizione']), styles['Body']))
+            right_story.append(Spacer(1, 6))
+
+    # Informazioni personali (hobby)
+    if cv.get('hobby'):
+        right_story.append(Spacer(1, 6))
+        right_story.append(Paragraph("Informazioni personali", styles['SectionTitle']))
+        right_story.append(Paragraph(sanitize_input(cv['hobby']), styles['Body']))
+
+    # === Combina ===
+    story.extend(left_story)
+    story.append(FrameBreak())
+    story.extend(right_story)
+
+    # === Build PDF ===
+    doc.user_fullname = full_name or "Utente Sconosciuto"
+    doc.build(story)
+    buffer.seek(0)
+    return buffer.read()
+
+
+def generate_cv_pdf(user_id, engine=None):
+    """Genera un CV in layout a due colonne e restituisce i bytes del PDF.
+
+    engine: 'reportlab' (platypus) o 'fast' (writer diretto di pdf_fast);
+    se non indicato si usa PDF_ENGINE.
+    """
     try:
         if not isinstance(user_id, int):
             raise ValueError(f"user_id non valido: {user_id}")
 
+        engine = engine or PDF_ENGINE
+        if engine not in PDF_ENGINES:
+            raise ValueError(f"motore PDF non valido: {engine}")
+
         user, cv, experiences = _fetch_user_full(user_id)
         if not user:
             raise ValueError(f"Utente non trovato (user_id={user_id})")
 
-        # === Layout ===
-        buffer = BytesIO()
-        width, height = A4
-        margin = 1.5 * cm
-        left_width = 6 * cm
-        gap = 0.5 * cm
-        right_width = width - left_width - gap - (2 * margin)
-
-        vertical_offset = 4.5 * cm
-
-        left_frame = Frame(
-            margin, margin + vertical_offset, left_width, height - 2 * margin - vertical_offset,
-            leftPadding=10, rightPadding=10, topPadding=20, bottomPadding=10, id='left'
-        )
-        right_frame = Frame(
-            margin + left_width + gap, margin + vertical_offset, right_width, height - 2 * margin - vertical_offset,
-            leftPadding=10, rightPadding=10, topPadding=10, bottomPadding=10, id='right'
-        )
-
-        # === Stili ===
-        styles = getSampleStyleSheet()
-        styles.add(ParagraphStyle(name='Header', fontSize=26, textColor=colors.HexColor('#2E86AB'),
-                                  alignment=1, leading=30, spaceAfter=12))
-        styles.add(ParagraphStyle(name='SectionTitle', fontSize=13, textColor=colors.HexColor('#2E86AB'),
-                                  spaceBefore=10, spaceAfter=6, leading=14))
-        styles.add(ParagraphStyle(name='Body', fontSize=10.5, textColor=colors.HexColor('#333333'), leading=13))
-
-        doc = BaseDocTemplate(buffer, pagesize=A4,
-                              leftMargin=margin, rightMargin=margin,
-                              topMargin=margin, bottomMargin=margin)
-        template = PageTemplate(id='TwoCol', frames=[left_frame, right_frame], onPage=draw_background_and_footer)
-        doc.addPageTemplates([template])
-
-        story = []
-
-        # === HEADER ===
-        full_name = f"{sanitize_input(user.get('nome'))} {sanitize_input(user.get('cognome'))}".strip()
-
-        # === COLONNA SINISTRA ===
-        left_story = []
-
-        # Contatti
-        left_story.append(Paragraph("Contatti", styles['SectionTitle']))
-        contact_lines = []
-
-        phone = cv.get('telefono')
-        if phone and phone.strip():
-            contact_lines.append(f"{sanitize_input(phone)}")
-
-        email = user.get('email')
-        if email and email.strip():
-            contact_lines.append(f"{sanitize_input(email)}")
-
-        linkedin = cv.get('linkedin_url')
-        if linkedin and linkedin.strip():
-            contact_lines.append(f"{sanitize_input(linkedin)}")
-
-        city = cv.get('citta')
-        if city and city.strip():
-            contact_lines.append(f"{sanitize_input(city)}")
-
-        for line in contact_lines:
-            left_story.append(Paragraph(line, styles['Body']))
-        left_story.append(Spacer(1, 10))
-
-        # Competenze, Lingue, Patenti
-        add_text_or_list(left_story, "Competenze", cv.get('skills', ''), styles)
-        add_text_or_list(left_story, "Lingue", cv.get('languages', ''), styles)
-        add_text_or_list(left_story, "Patenti", cv.get('patente', ''), styles)
-
-        # === COLONNA DESTRA ===
-        right_story = []
-
-        # Formazione
-        edu = [e for e in experiences if e['tipo'] == 'formazione']
-        if edu:
-            right_story.append(Spacer(1, 6))
-            right_story.append(Paragraph("Formazione", styles['SectionTitle']))
-            for e in edu:
-                periodo = f"{e['data_inizio']} - {'In corso' if e['is_current'] else (e.get('data_fine') or '')}"
-                titolo = sanitize_input(e.get('titolo'))
-                istituto = sanitize_input(e.get('azienda_istituto'))
-                right_story.append(Paragraph(f"<b>{titolo}</b> — {istituto}", styles['Body']))
-                right_story.append(Paragraph(periodo, styles['Body']))
-                if e.get('descrizione'):
-                    right_story.append(Paragraph(sanitize_input(e['descrizione']), styles['Body']))
-                right_story.append(Spacer(1, 6))
-
-        # Esperienze lavorative
-        work = [e for e in experiences if e['tipo'] == 'lavoro']
-        if work:
-            right_story.append(Paragraph("Esperienze Lavorative", styles['SectionTitle']))
-            for e in work:
-                periodo = f"{e['data_inizio']} - {'In corso' if e['is_current'] else (e.get('data_fine') or '')}"
-                titolo = sanitize_input(e.get('titolo'))
-                azienda = sanitize_input(e.get('azienda_istituto'))
-                right_story.append(Paragraph(f"<b>{titolo}</b> — {azienda}", styles['Body']))
-                right_story.append(Paragraph(periodo, styles['Body']))
-                if e.get('descrizione'):
-                    right_story.append(Paragraph(sanitize_input(e['descrizione']), styles['Body']))
-                right_story.append(Spacer(1, 6))
-
-        # Informazioni personali (hobby)
-        if cv.get('hobby'):
-            right_story.append(Spacer(1, 6))
-            right_story.append(Paragraph("Informazioni personali", styles['SectionTitle']))
-            right_story.append(Paragraph(sanitize_input(cv['hobby']), styles['Body']))
-
-        # === Combina ===
-        story.extend(left_story)
-        story.append(FrameBreak())
-        story.extend(right_story)
-
-        # === Build PDF ===
-        doc.user_fullname = full_name or "Utente Sconosciuto"
-        doc.build(story)
-        buffer.seek(0)
-        return buffer.read()
+        started = time.perf_counter()
+        with span('pdf.build', engine=engine):
+            if engine == 'fast':
+                pdf = render_cv_pdf(user, cv, experiences)
+            else:
+                pdf = build_cv_pdf(user, cv, experiences)
+        METRICS.observe('pdf_generation_duration_seconds', time.perf_counter() - started, engine)
+        return pdf
 
     except Exception as e:
         logger.exception(f"Errore generazione PDF per user {user_id}: {e}")
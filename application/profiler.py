@@ -0,0 +1,132 @@
+"""Profilazione in produzione (solo admin).
+
+- campionamento statistico di tutti i thread per N secondi tramite
+  sys._current_frames, con output in formato "collapsed stacks"
+  (una riga per stack: frame;frame;frame conteggio) per i flame graph;
+- cProfile deterministico di una singola richiesta, attivato dall'header
+  X-Profile; il risultato si legge da /api/admin/profile/requests.
+"""
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+PROFILER_MAX_SECONDS = float(os.getenv('PROFILER_MAX_SECONDS', '60'))
+PROFILER_DEFAULT_INTERVAL = float(os.getenv('PROFILER_INTERVAL_MS', '5')) / 1000
+# token per X-Profile da client non admin (es. benchmark); se vuoto solo le sessioni admin
+PROFILER_TOKEN = os.getenv('PROFILER_TOKEN', '')
+PROFILER_HISTORY = int(os.getenv('PROFILER_HISTORY', '20'))
+
+# funzioni in cui un thread e' fermo in attesa di lavoro (escluse salvo idle=1)
+_IDLE_LEAVES = {
+    ('selectors.py', 'select'), ('threading.py', 'wait'), ('queue.py', 'get'),
+    ('socketserver.py', 'serve_forever'), ('thread.py', '_worker'),
+}
+
+_sampling = threading.Lock()
+
+
+def _frame_name(frame, with_lines):
+    # cartella/file invece del percorso assoluto: stack confrontabili tra macchine diverse
+    parts = frame.f_code.co_filename.replace('\\', '/').rsplit('/', 2)
+    name = f"{'/'.join(parts[-2:])}:{frame.f_code.co_name}"
+    return f'{name}:{frame.f_lineno}' if with_lines else name
+
+
+def _thread_label(name):
+    """nome del thread senza numerazione: "Thread-42 (process_request_thread)" -> process_request_thread"""
+    match = re.search(r'\((\w+)\)', name)
+    if match:
+        return match.group(1)
+    return re.sub(r'[-_]\d+$', '', name).replace(' ', '_')
+
+
+def _is_idle(frame):
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_LEAVES
+
+
+def sample_stacks(seconds, interval=PROFILER_DEFAULT_INTERVAL, with_lines=False, idle=False):
+    """campiona gli stack di tutti i thread; restituisce (Counter stack->campioni, numero di campioni)
+
+    Solleva RuntimeError se un altro campionamento e' gia' in corso.
+    """
+    seconds = min(max(seconds, 0.1), PROFILER_MAX_SECONDS)
+    interval = max(interval, 0.001)
+    if not _sampling.acquire(blocking=False):
+        raise RuntimeError('campionamento gia\' in corso')
+    try:
+        me = threading.get_ident()
+        stacks = Counter()
+        samples = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me or (not idle and _is_idle(frame)):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame, with_lines))
+                    frame = frame.f_back
+                stack.append(_thread_label(names.get(ident, 'thread')))
+                stacks[';'.join(reversed(stack))] += 1
+            samples += 1
+            time.sleep(interval)
+        return stacks, samples
+    finally:
+        _sampling.release()
+
+
+def collapsed(stacks):
+    """testo "collapsed stacks" (flamegraph.pl, speedscope), dal piu' frequente"""
+    return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+
+class RequestProfiles:
+    """cProfile di singole richieste: una alla volta, ultime PROFILER_HISTORY conservate"""
+
+    def __init__(self, history):
+        self.results = deque(maxlen=history)
+        self.lock = threading.Lock()
+        self.active = threading.Lock()
+        self.ids = itertools.count(1)
+
+    def start(self):
+        """restituisce (id, profiler) oppure None se un'altra richiesta e' gia' profilata"""
+        if not self.active.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        profile.enable()
+        return next(self.ids), profile
+
+    def finish(self, profile_id, profile, method, path, status, elapsed):
+        profile.disable()
+        self.active.release()
+        out = io.StringIO()
+        stats = pstats.Stats(profile, stream=out)
+        stats.sort_stats('cumulative').print_stats(60)
+        with self.lock:
+            self.results.append({
+                'id': profile_id, 'ts': time.time(), 'method': method, 'path': path,
+                'status': status, 'latency_ms': round(elapsed * 1000, 2), 'stats': out.getvalue(),
+            })
+
+    def get(self, profile_id):
+        with self.lock:
+            for result in self.results:
+                if result['id'] == profile_id:
+                    return result
+        return None
+
+    def summary(self):
+        with self.lock:
+            return [{k: v for k, v in result.items() if k != 'stats'} for result in reversed(self.results)]
+
+
+REQUEST_PROFILES = RequestProfiles(PROFILER_HISTORY)
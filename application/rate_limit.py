@@ -0,0 +1,91 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Configurazione rate limit del login (tramite environment)
+# Il limite per IP e' pensato per un NAT di campus o un laboratorio (centinaia di
+# studenti dietro un solo indirizzo), non per il singolo utente: cosi' non blocca
+# il picco delle iscrizioni agli esami, ma lascia a uno scanner solo pochi tentativi
+# al secondo. Il credential stuffing su un account e' coperto dal limite per email.
+LOGIN_IP_RATE = float(os.getenv('LOGIN_IP_RATE', '300'))         # tentativi al minuto per IP
+LOGIN_IP_BURST = float(os.getenv('LOGIN_IP_BURST', '600'))
+LOGIN_EMAIL_RATE = float(os.getenv('LOGIN_EMAIL_RATE', '5'))     # tentativi al minuto per email
+LOGIN_EMAIL_BURST = float(os.getenv('LOGIN_EMAIL_BURST', '10'))
+RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', '100000'))
+RATE_LIMIT_IDLE_TTL = float(os.getenv('RATE_LIMIT_IDLE_TTL', '900'))  # secondi
+
+
+class TokenBucketLimiter:
+    """Token bucket per chiave (IP, email...) in una struttura limitata
+
+    Le chiavi sono tenute in ordine di ultimo utilizzo: quelle inattive da piu'
+    di idle_ttl secondi vengono scartate, e oltre max_keys si elimina la piu' vecchia.
+    """
+
+    def __init__(self, rate_per_minute, burst, max_keys=RATE_LIMIT_MAX_KEYS, idle_ttl=RATE_LIMIT_IDLE_TTL):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        self.idle_ttl = idle_ttl
+        self.buckets = OrderedDict()   # chiave -> [token, ultimo aggiornamento]
+        self.lock = threading.Lock()
+        self.rejected = 0
+
+    def _expire(self, now):
+        while self.buckets:
+            last = next(iter(self.buckets.values()))[1]
+            if now - last < self.idle_ttl and len(self.buckets) <= self.max_keys:
+                break
+            self.buckets.popitem(last=False)
+
+    def acquire(self, key):
+        """consuma un token: restituisce 0 se consentito, altrimenti i secondi da attendere"""
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = [self.burst, now]
+                self.buckets[key] = bucket
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+                self.buckets.move_to_end(key)
+            self._expire(now)
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0
+            self.rejected += 1
+            return (1 - bucket[0]) / self.rate
+
+    def size(self):
+        return len(self.buckets)
+
+
+LOGIN_IP_LIMITER = TokenBucketLimiter(LOGIN_IP_RATE, LOGIN_IP_BURST)
+LOGIN_EMAIL_LIMITER = TokenBucketLimiter(LOGIN_EMAIL_RATE, LOGIN_EMAIL_BURST)
+
+
+def check_login_rate(client_ip, email):
+    """controlla i limiti per IP ed email prima di qualunque query o hash
+
+    Restituisce 0 se il tentativo e' consentito, altrimenti i secondi di Retry-After.
+    """
+    retry_after = LOGIN_IP_LIMITER.acquire(client_ip)
+    if retry_after:
+        return retry_after
+    email = (email or '').strip().lower()
+    if email:
+        return LOGIN_EMAIL_LIMITER.acquire(email)
+    return 0
+
+
+def get_rate_limit_stats():
+    """contatori delle richieste rifiutate e dimensione delle strutture"""
+    return {
+        'login_ip_rejected': LOGIN_IP_LIMITER.rejected,
+        'login_email_rejected': LOGIN_EMAIL_LIMITER.rejected,
+        'login_ip_keys': LOGIN_IP_LIMITER.size(),
+        'login_email_keys': LOGIN_EMAIL_LIMITER.size(),
+    }
@@ -0,0 +1,234 @@
+import hashlib
+import math
+import os
+import queue
+import threading
+import time
+
+from database import IntegrityError, get_db_connection
+
+# Configurazione registrazioni (tramite environment)
+REGISTRATION_BATCH_SIZE = int(os.getenv('REGISTRATION_BATCH_SIZE', '50'))
+REGISTRATION_BATCH_WAIT = float(os.getenv('REGISTRATION_BATCH_WAIT_MS', '20')) / 1000
+REGISTRATION_TIMEOUT = float(os.getenv('REGISTRATION_TIMEOUT', '10'))
+EMAIL_BLOOM_CAPACITY = int(os.getenv('EMAIL_BLOOM_CAPACITY', '1000000'))
+EMAIL_BLOOM_ERROR_RATE = float(os.getenv('EMAIL_BLOOM_ERROR_RATE', '0.01'))
+
+DUPLICATE_EMAIL_ERROR = 'Questa email è già registrata'
+
+
+class BloomFilter:
+    """Bloom filter: 'non presente' e' certo, 'forse presente' puo' essere un falso positivo"""
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class _Registration:
+    """una richiesta di registrazione in attesa del commit"""
+
+    def __init__(self, row):
+        self.row = row          # (email, password_hash, salt, nome, cognome)
+        self.done = threading.Event()
+        self.result = None
+        self.lock = threading.Lock()
+        self.claimed = False    # presa in carico dal batcher
+        self.cancelled = False  # abbandonata dalla richiesta (timeout)
+
+    def claim(self):
+        """il batcher la prende in carico; False se la richiesta ha gia' rinunciato"""
+        with self.lock:
+            if self.cancelled:
+                return False
+            self.claimed = True
+            return True
+
+    def cancel(self):
+        """la richiesta rinuncia; False se il batcher la sta gia' inserendo"""
+        with self.lock:
+            if self.claimed:
+                return False
+            self.cancelled = True
+            return True
+
+    def finish(self, result):
+        self.result = result
+        self.done.set()
+
+
+class RegistrationPipeline:
+    """Registrazioni con pre-controllo Bloom e commit di gruppo
+
+    Le email sicuramente nuove vengono accodate e inserite a blocchi con un'unica
+    executemany e un solo commit; il vincolo UNIQUE su users.email sostituisce la
+    SELECT di controllo. Le email 'forse presenti' vengono inserite singolarmente.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.bloom = None
+        self.lock = threading.Lock()
+        self.worker = None
+        self.batches = 0
+        self.committed = 0
+
+    def _warm_bloom(self):
+        bloom = BloomFilter(EMAIL_BLOOM_CAPACITY, EMAIL_BLOOM_ERROR_RATE)
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT email FROM users')
+        for (email,) in cursor:
+            bloom.add(email.lower())
+        conn.close()
+        return bloom
+
+    def _start(self):
+        with self.lock:
+            if self.bloom is None:
+                self.bloom = self._warm_bloom()
+            if self.worker is None:
+                self.worker = threading.Thread(target=self._run, name='registration-batcher', daemon=True)
+                self.worker.start()
+
+    def remember(self, emails):
+        """segna nel Bloom filter email inserite da altre vie (es. import massivo)"""
+        bloom = self.bloom
+        if bloom is not None:
+            for email in emails:
+                bloom.add(email.lower())
+
+    def register(self, email, password_hash, salt, nome, cognome):
+        """registra uno studente e restituisce il risultato per questa richiesta"""
+        if self.worker is None:
+            self._start()
+
+        row = (email, password_hash, salt, nome, cognome)
+        if email.lower() in self.bloom:
+            # probabile duplicato: inserimento singolo, non fa fallire un intero blocco
+            return self._insert_single(row)
+
+        item = _Registration(row)
+        self.queue.put(item)
+        if not item.done.wait(REGISTRATION_TIMEOUT):
+            if item.cancel():
+                # ancora in coda: il batcher la salta, nessun account creato
+                return {'success': False, 'error': 'Registrazione non completata, riprova più tardi'}
+            # commit gia' in corso: si attende l'esito reale (il batcher completa sempre le richieste prese)
+            item.done.wait()
+        return item.result
+
+    def _collect(self):
+        """attende la prima registrazione e raccoglie le altre arrivate entro REGISTRATION_BATCH_WAIT"""
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + REGISTRATION_BATCH_WAIT
+        while len(batch) < REGISTRATION_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._commit_batch(batch)
+            except Exception as e:
+                print(f"Errore registrazione a blocchi: {e}")
+                for item in batch:
+                    if not item.done.is_set():
+                        item.finish({'success': False, 'error': 'Errore durante la registrazione'})
+
+    def _commit_batch(self, batch):
+        # le richieste scadute in coda non vanno inserite
+        batch = [item for item in batch if item.claim()]
+        # duplicati nello stesso blocco: solo il primo viene inserito
+        unique, seen = [], set()
+        for item in batch:
+            key = item.row[0].lower()
+            if key in seen:
+                item.finish({'success': False, 'error': DUPLICATE_EMAIL_ERROR})
+            else:
+                seen.add(key)
+                unique.append(item)
+        if not unique:
+            return
+
+        emails = [item.row[0] for item in unique]
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.executemany(
+                'INSERT INTO users (email, password_hash, salt, nome, cognome, role) VALUES (%s, %s, %s, %s, %s, %s)',
+                [item.row + ('student',) for item in unique]
+            )
+            placeholders = ', '.join(['%s'] * len(emails))
+            cursor.execute(
+                f'INSERT INTO cv_data (user_id) SELECT id FROM users WHERE email IN ({placeholders})',
+                emails
+            )
+            conn.commit()
+        except IntegrityError:
+            # email registrata nel frattempo: si ripiega sugli inserimenti singoli
+            conn.rollback()
+            conn.close()
+            for item in unique:
+                item.finish(self._insert_single(item.row))
+            return
+        except BaseException:
+            # altri errori (es. connessione persa): la transazione non deve restare aperta
+            try:
+                conn.rollback()
+            finally:
+                conn.close()
+            raise
+        conn.close()
+
+        self.batches += 1
+        self.committed += len(unique)
+        for item in unique:
+            self.bloom.add(item.row[0].lower())
+            item.finish({'success': True})
+
+    def _insert_single(self, row):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                'INSERT INTO users (email, password_hash, salt, nome, cognome, role) VALUES (%s, %s, %s, %s, %s, %s)',
+                row + ('student',)
+            )
+            cursor.execute('INSERT INTO cv_data (user_id) VALUES (%s)', (cursor.lastrowid,))
+            conn.commit()
+        except IntegrityError:
+            conn.rollback()
+            return {'success': False, 'error': DUPLICATE_EMAIL_ERROR}
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        self.bloom.add(row[0].lower())
+        return {'success': True}
+
+
+REGISTRATION_PIPELINE = RegistrationPipeline()
@@ -0,0 +1,40 @@
+"""Dati della richiesta HTTP in corso, per thread (il server usa un thread per richiesta)."""
+import threading
+
+from db_instrument import QUERY_OBSERVERS
+
+_local = threading.local()
+
+
+class RequestContext:
+    def __init__(self):
+        self.db_time = 0.0
+        self.db_queries = 0
+        self.user_id = None
+        self.role = None
+        self.queries = None     # (Statement, chiamante), solo con SQL_PROFILER=1
+        self.trace = None       # tracing.Trace se la richiesta e' campionata
+
+
+def begin():
+    context = _local.context = RequestContext()
+    return context
+
+
+def current():
+    """contesto della richiesta del thread corrente (None fuori da una richiesta)"""
+    return getattr(_local, 'context', None)
+
+
+def end():
+    _local.context = None
+
+
+def _observe_query(statement):
+    context = getattr(_local, 'context', None)
+    if context is not None:
+        context.db_time += statement.elapsed
+        context.db_queries += 1
+
+
+QUERY_OBSERVERS.append(_observe_query)
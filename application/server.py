@@ -1,17 +1,34 @@
+import http.client
 import http.server
 import http.cookies
 import urllib.parse
+import hmac
 import json
 import mimetypes
 import secrets
 import os
+import random
 import re
+import socket
+import threading
+import time
+from collections import Counter
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import request_context
+import tracing
+from admission import ADMISSION, CRITICAL, EXPENSIVE, NORMAL
+from bulkhead import PDF_BULKHEAD, UPLOAD_BULKHEAD
+from profiler import PROFILER_TOKEN, REQUEST_PROFILES
+from sql_profiler import SQL_PROFILER, SQL_PROFILER_ENABLED
+from student_import import IMPORT_MAX_BODY
+from access_log import ACCESS_LOG_STATIC_SAMPLE, ACCESS_LOGGER
+from metrics import METRICS
+
 # Configurazione Server
-HOST = '0.0.0.0'
-PORT = 8080
+HOST = os.getenv('HOST', '0.0.0.0')
+PORT = int(os.getenv('PORT', '8080'))
 BASE_DIR = Path(__file__).parent
 UPLOAD_DIR = BASE_DIR / 'uploads' / 'cv'
 
@@ -23,9 +40,57 @@ UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 SECRET_KEY = secrets.token_hex(32)
 
+# limiti delle connessioni (client lenti o malevoli, es. slowloris)
+# secondi di inattivita' del socket oltre i quali la connessione viene chiusa
+REQUEST_IDLE_TIMEOUT = float(os.getenv('REQUEST_IDLE_TIMEOUT', '15'))
+# tempo massimo per ricevere request line e header
+REQUEST_HEADER_TIMEOUT = float(os.getenv('REQUEST_HEADER_TIMEOUT', '10'))
+# il body deve arrivare in BODY_GRACE secondi + Content-Length / BODY_MIN_RATE
+BODY_MIN_RATE = int(os.getenv('BODY_MIN_RATE', '10240'))       # byte/s
+BODY_GRACE = float(os.getenv('BODY_GRACE', '5'))
+MAX_HEADER_COUNT = int(os.getenv('MAX_HEADER_COUNT', '50'))
+MAX_HEADER_BYTES = int(os.getenv('MAX_HEADER_BYTES', str(16 * 1024)))
+MAX_REQUEST_BODY = int(os.getenv('MAX_REQUEST_BODY', str(MAX_FILE_SIZE + 1024 * 1024)))
+# route con un limite proprio sul body (l'import degli studenti legge il file man mano che lo elabora)
+ROUTE_MAX_BODY = {'/api/admin/import-students': IMPORT_MAX_BODY}
+# connessioni contemporanee per IP client (0 = nessun limite)
+MAX_CONNECTIONS_PER_IP = int(os.getenv('MAX_CONNECTIONS_PER_IP', '50'))
+
 # archivio della sessione (in-memory, for simplicity)
 SESSIONS = {}
 
+# /metrics e' riservato: sessione admin oppure questo token (Authorization: Bearer ...) per gli scraper
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# route note, usate come etichetta nelle metriche (gli altri path finiscono in 'other')
+METRIC_ROUTES = {
+    '/', '/home', '/index', '/login', '/register', '/privacy', '/user-dashboard', '/admin-dashboard',
+    '/admin-view-student', '/admin-sql-profile', '/logout', '/metrics', '/api/login', '/api/register', '/api/update-profile',
+    '/api/add-experience', '/api/delete-experience', '/api/cv-content', '/api/generate-cv',
+    '/api/upload-cv', '/api/download-cv', '/api/delete-cv', '/api/admin/delete-user',
+    '/api/admin/rate-limits', '/api/admin/export-cvs', '/api/admin/profile', '/api/admin/profile/requests',
+    '/api/admin/memory', '/api/admin/memory/top', '/api/admin/memory/diff', '/api/admin/memory/start',
+    '/api/admin/memory/stop', '/api/admin/memory/snapshot', '/api/admin/import-students',
+    '/api/admin/export-students', '/api/update-experience', '/api/experiences/batch', '/api/me',
+}
+STATIC_PREFIXES = ('/css/', '/js/', '/uploads/')
+# X-Response-Mode delle modifiche dalla dashboard: senza header (form classici) si risponde con il redirect
+PARTIAL_RESPONSE_MODES = ('fragment', 'delta')
+# route con un parametro nel path: nelle metriche diventano prefisso + '*'
+PARAM_ROUTE_PREFIXES = ('/api/admin/students/',)
+# priorita' nel controllo di ammissione (le altre route sono NORMAL); gli statici sono critici
+CRITICAL_ROUTES = {
+    '/', '/home', '/index', '/login', '/logout', '/api/login', '/user-dashboard', '/admin-dashboard',
+}
+EXPENSIVE_ROUTES = {
+    '/api/generate-cv', '/api/upload-cv', '/api/admin/export-cvs', '/api/admin/export-students',
+    '/api/admin/import-students', '/api/register', '/register',
+}
+# route con posti riservati (bulkhead.py)
+ROUTE_BULKHEADS = {'/api/generate-cv': PDF_BULKHEAD, '/api/upload-cv': UPLOAD_BULKHEAD}
+METRICS.gauge('sessions_active', 'Sessioni nell\'archivio in memoria', callback=lambda: len(SESSIONS))
+METRICS.counter('http_connections_rejected_total', 'Connessioni chiuse o rifiutate dai limiti', ('reason',))
+
 # verifica che lo schema del database esista 
 try:
     from database import create_tables
@@ -35,30 +100,319 @@ except Exception as e:
     #se non c'e' lo schema del database da' un warning al posto di spegnere tutto
     print(f"Database init warning: {e}")
 
+
+def _profile_etag(kind, user_id, version):
+    return f'"{kind}-{user_id}-v{version}"'
+
+
+def _etag_matches(if_none_match, etag):
+    """confronto debole (RFC 9110) tra If-None-Match e l'ETag corrente"""
+    if if_none_match.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in if_none_match.split(','))
+
     
+class _CountingWriter:
+    """conta i byte scritti sul socket (per l'access log)"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes = 0
+
+    def write(self, data):
+        self.bytes += len(data)
+        return self.raw.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+class _DeadlineReader:
+    """rfile con scadenza: ogni lettura aspetta al massimo fino a deadline (e mai piu' del timeout di inattivita')
+
+    Durante la lettura degli header conta anche righe e byte letti, oltre i
+    limiti solleva HTTPException (parse_request risponde 431).
+    """
+
+    def __init__(self, raw, sock, idle):
+        self.raw = raw
+        self.sock = sock
+        self.idle = idle
+        self.deadline = None
+        self.header_bytes = None      # byte ancora ammessi negli header (None fuori dagli header)
+        self.header_lines = None
+
+    def _arm(self):
+        timeout = self.idle
+        if self.deadline is not None:
+            remaining = self.deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout('richiesta troppo lenta')
+            timeout = min(timeout, remaining)
+        self.sock.settimeout(timeout)
+
+    def _count_timeout(self):
+        expired = self.deadline is not None and time.monotonic() >= self.deadline
+        METRICS.inc('http_connections_rejected_total', 'deadline' if expired else 'idle')
+
+    def read(self, size=-1):
+        # a blocchi, per ricontrollare la scadenza tra un recv e l'altro
+        chunks = []
+        left = size if size is not None and size >= 0 else float('inf')
+        try:
+            while left > 0:
+                self._arm()
+                chunk = self.raw.read1(min(left, 65536))
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                left -= len(chunk)
+        except socket.timeout:
+            self._count_timeout()
+            raise
+        finally:
+            self.sock.settimeout(self.idle)
+        return b''.join(chunks)
+
+    def readline(self, limit=-1):
+        if self.header_bytes is not None:
+            # una riga oltre il budget viene letta solo fino al primo byte di troppo
+            budget = max(self.header_bytes, 0) + 1
+            limit = budget if limit < 0 else min(limit, budget)
+        chunks = []
+        total = 0
+        try:
+            while limit < 0 or total < limit:
+                self._arm()
+                data = self.raw.peek(1)
+                if not data:
+                    break
+                end = data.find(b'\n')
+                take = end + 1 if end >= 0 else len(data)
+                if limit >= 0:
+                    take = min(take, limit - total)
+                chunk = self.raw.read(take)
+                chunks.append(chunk)
+                total += len(chunk)
+                if chunk.endswith(b'\n'):
+                    break
+        except socket.timeout:
+            self._count_timeout()
+            raise
+        finally:
+            self.sock.settimeout(self.idle)
+        if self.header_bytes is not None:
+            self.header_bytes -= total
+            self.header_lines -= 1
+            if self.header_bytes < 0 or self.header_lines < 0:
+                METRICS.inc('http_connections_rejected_total', 'headers')
+                raise http.client.HTTPException(
+                    f'header oltre i limiti ({MAX_HEADER_COUNT} righe, {MAX_HEADER_BYTES} byte)')
+        return b''.join(chunks)
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
 class CVHandler(http.server.BaseHTTPRequestHandler):
     """GESTIONE DELLE RICHIESTE HTTP"""
    # nasconde versioni del server e di python
     server_version="volevi sapere la versione eh O_O"
     sys_version = ""
+    # (id, cProfile) se la richiesta corrente e' profilata, vedi parse_request
+    _profile = None
+    # timeout del socket (StreamRequestHandler.setup)
+    timeout = REQUEST_IDLE_TIMEOUT
+
+    def setup(self):
+        super().setup()
+        self.rfile = _DeadlineReader(self.rfile, self.connection, REQUEST_IDLE_TIMEOUT)
+        self.wfile = _CountingWriter(self.wfile)
+
+    def handle_one_request(self):
+        """gestisce una richiesta e ne registra durata e status in metriche e access log"""
+        self._request_started = None
+        self._status = None
+        self._profile = None
+        self._admitted = False
+        self._bulkhead = None
+        self.wfile.bytes = 0
+        if isinstance(self.rfile, _DeadlineReader):
+            self.rfile.deadline = time.monotonic() + REQUEST_HEADER_TIMEOUT
+        context = request_context.begin()
+        try:
+            super().handle_one_request()
+        finally:
+            request_context.end()
+            if self._bulkhead is not None:
+                self._bulkhead.release()
+            if self._admitted:
+                ADMISSION.release()
+            if self._request_started is not None:
+                elapsed = time.perf_counter() - self._request_started
+                route = self._route_label()
+                status = self._status or 500
+                if self._profile is not None:
+                    REQUEST_PROFILES.finish(*self._profile, self.command, urllib.parse.urlparse(self.path).path,
+                                            status, elapsed)
+                METRICS.inc('http_requests_in_flight', value=-1)
+                METRICS.observe('http_request_duration_seconds', elapsed, self.command, route, str(status))
+                self._log_access(route, status, elapsed, context)
+                if context.trace is not None:
+                    tracing.finish(context.trace, f'{self.command} {route}', self._request_started + elapsed, {
+                        'method': self.command, 'route': route, 'status': status,
+                        'role': context.role, 'user_id': context.user_id, 'bytes': self.wfile.bytes,
+                    })
+                if SQL_PROFILER_ENABLED:
+                    SQL_PROFILER.finish_request(context, self.command, urllib.parse.urlparse(self.path).path,
+                                                status, elapsed)
+
+    def _log_access(self, route, status, elapsed, context):
+        sample = 1.0
+        path = urllib.parse.urlparse(self.path).path
+        if path.startswith(STATIC_PREFIXES):
+            # file statici: registrati solo a campione (non le route API con parametro)
+            sample = ACCESS_LOG_STATIC_SAMPLE
+            if sample < 1.0 and random.random() >= sample:
+                return
+        record = {
+            'ts': time.time(),
+            'client': self.client_address[0],
+            'method': self.command,
+            'path': path,
+            'route': route,
+            'status': status,
+            'bytes': self.wfile.bytes,
+            'latency_ms': round(elapsed * 1000, 2),
+            'db_ms': round(context.db_time * 1000, 2),
+            'db_queries': context.db_queries,
+            'role': context.role,
+            'user_id': context.user_id,
+        }
+        if sample < 1.0:
+            record['sample'] = sample
+        if context.trace is not None:
+            record['trace_id'] = context.trace.trace_id
+        ACCESS_LOGGER.log(record)
+
+    def parse_request(self):
+        limited = isinstance(self.rfile, _DeadlineReader)
+        if limited:
+            # +1: la riga vuota che chiude gli header
+            self.rfile.header_bytes = MAX_HEADER_BYTES
+            self.rfile.header_lines = MAX_HEADER_COUNT + 1
+        try:
+            ok = super().parse_request()
+        finally:
+            if limited:
+                self.rfile.header_bytes = self.rfile.header_lines = None
+        if ok and not self._check_body_length(limited, ROUTE_MAX_BODY.get(urllib.parse.urlparse(self.path).path, MAX_REQUEST_BODY)):
+            return False
+        if ok:
+            self._request_started = time.perf_counter()
+            METRICS.inc('http_requests_in_flight')
+            tracing.start()
+            if self.headers.get('X-Profile') and self._profile_allowed():
+                # cProfile di questa richiesta (una alla volta): id nell'header X-Profile-Id
+                self._profile = REQUEST_PROFILES.start()
+            path = urllib.parse.urlparse(self.path).path
+            with tracing.span('admission'):
+                self._admitted = ADMISSION.acquire(self._admission_priority(path))
+            if not self._admitted:
+                # scarto immediato: il body non viene letto e la connessione si chiude
+                self.close_connection = True
+                self._send_overloaded(path)
+                return False
+            bulkhead = ROUTE_BULKHEADS.get(path)
+            if bulkhead is not None:
+                with tracing.span('bulkhead', bulkhead=bulkhead.name):
+                    admitted = bulkhead.acquire()
+                if not admitted:
+                    self.close_connection = True
+                    self._send_overloaded(path, bulkhead.retry_after, bulkhead.message)
+                    return False
+                self._bulkhead = bulkhead
+        return ok
+
+    def _admission_priority(self, path):
+        if path in CRITICAL_ROUTES or path.startswith(STATIC_PREFIXES):
+            return CRITICAL
+        if path in EXPENSIVE_ROUTES:
+            return EXPENSIVE
+        return NORMAL
+
+    def _check_body_length(self, limited, max_body):
+        """rifiuta Content-Length non validi o troppo grandi e fissa la scadenza per la lettura del body"""
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.send_error(400, 'Content-Length non valido')
+            return False
+        if length > max_body:
+            METRICS.inc('http_connections_rejected_total', 'body_size')
+            self.close_connection = True
+            self.send_error(413, f'Richiesta oltre {max_body} byte')
+            return False
+        if limited:
+            self.rfile.deadline = time.monotonic() + BODY_GRACE + length / max(BODY_MIN_RATE, 1)
+        return True
+
+    def _profile_allowed(self):
+        token = self.headers.get('X-Profile', '')
+        if PROFILER_TOKEN and hmac.compare_digest(token.encode(), PROFILER_TOKEN.encode()):
+            return True
+        return self._get_session().get('role') == 'admin'
+
+    def end_headers(self):
+        if self._profile is not None:
+            self.send_header('X-Profile-Id', str(self._profile[0]))
+        context = request_context.current()
+        if context is not None and context.trace is not None:
+            self.send_header('X-Trace-Id', context.trace.trace_id)
+        super().end_headers()
+
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
+
+    def _route_label(self):
+        path = urllib.parse.urlparse(self.path).path
+        if path in METRIC_ROUTES:
+            return path
+        for prefix in STATIC_PREFIXES + PARAM_ROUTE_PREFIXES:
+            if path.startswith(prefix):
+                return prefix + '*'
+        return 'other'
     
-    def _set_headers(self, content_type='text/html', status=200):
+    def _set_headers(self, content_type='text/html', status=200, headers=None):
         """Set HTTP headers"""
         self.send_response(status)
         self.send_header('Content-type', content_type)
         self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
         self.send_header('Pragma', 'no-cache')
         self.send_header('Expires', '0')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
         self.end_headers()
     
     def _get_session(self):
         """Get dei dati della sessione corrente"""
+        with tracing.span('session'):
+            return self._lookup_session()
+
+    def _lookup_session(self):
         cookies = http.cookies.SimpleCookie(self.headers.get('Cookie'))
         session_id = cookies.get('session_id')
         if session_id and session_id.value in SESSIONS:
             session = SESSIONS[session_id.value]
             # Check scadenza della sessione
             if session.get('expires', 0) > datetime.now().timestamp():
+                context = request_context.current()
+                if context is not None:
+                    context.user_id = session.get('user_id')
+                    context.role = session.get('role')
                 return session
             else:
                 del SESSIONS[session_id.value]
@@ -103,7 +457,7 @@ class CVHandler(http.server.BaseHTTPRequestHandler):
             self.send_header('Set-Cookie', set_cookie)
         self.end_headers()
     
-    def _render_template(self, template_path, context=None):
+    def _render_template(self, template_path, context=None, status=200, headers=None):
         """visualizza i template"""
         if context is None:
             context = {}
@@ -113,18 +467,19 @@ class CVHandler(http.server.BaseHTTPRequestHandler):
             self._send_error(404, f"Template not found: {template_path}")
             return
         
-        with open(template_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+        with tracing.span('template', template=template_path):
+            with open(template_file, 'r', encoding='utf-8') as f:
+                content = f.read()
         
-     # rimpiazza le variabili --> {{variable}}
-        for key, value in context.items():
-            if str(value) == 'None':
-                content = content.replace('{{'+ key +'}}', '')
-            
-            else:
-                content = content.replace('{{' + key + '}}', str(value))
+         # rimpiazza le variabili --> {{variable}}
+            for key, value in context.items():
+                if str(value) == 'None':
+                    content = content.replace('{{'+ key +'}}', '')
+                
+                else:
+                    content = content.replace('{{' + key + '}}', str(value))
         
-        self._set_headers()
+        self._set_headers(status=status, headers=headers)
         self.wfile.write(content.encode('utf-8'))
     
     def _send_json(self, data, status=200):
@@ -132,6 +487,95 @@ class CVHandler(http.server.BaseHTTPRequestHandler):
         self._set_headers('application/json', status)
         self.wfile.write(json.dumps(data).encode('utf-8'))
     
+    def _send_profile_json(self, kind, user_id, role=None):
+        """profilo in JSON con ETag dalla versione dei dati; 304 se il client ha gia' la versione corrente"""
+        from handlers import get_profile_json, get_profile_version
+
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match:
+            # una sola lettura per chiave primaria invece delle quattro query del profilo
+            version = get_profile_version(user_id, role)
+            if version is not None and _etag_matches(if_none_match, _profile_etag(kind, user_id, version)):
+                self.send_response(304)
+                self.send_header('ETag', _profile_etag(kind, user_id, version))
+                self.send_header('Cache-Control', 'private, no-cache')
+                self.end_headers()
+                return
+
+        data = get_profile_json(user_id, role)
+        if data is None:
+            self._send_json({'success': False, 'error': 'Utente non trovato'}, 404)
+            return
+        body = json.dumps({'success': True, kind: data}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', _profile_etag(kind, user_id, data['version']))
+        # il browser conserva la risposta ma la rivalida a ogni richiesta
+        self.send_header('Cache-Control', 'private, no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_dashboard_update(self, result, fragments=None):
+        """esito di una modifica dalla dashboard
+
+        Senza X-Response-Mode: redirect alla dashboard (errori in JSON, come prima).
+        'fragment': solo l'HTML aggiornato, con l'id dell'elemento da sostituire in X-Fragment-Target
+        (204 se la modifica non cambia parti della pagina). 'delta': JSON con i frammenti per id
+        e i campi modificati. fragments e' chiamata solo se serve: {id elemento: html}.
+        """
+        mode = self.headers.get('X-Response-Mode', '').strip().lower()
+        if mode not in PARTIAL_RESPONSE_MODES:
+            if result.get('success'):
+                self._redirect(result.get('redirect') or '/user-dashboard')
+            else:
+                self._send_json(result)
+            return
+        if not result.get('success'):
+            self._send_json(result, 400)
+            return
+
+        from handlers import get_dashboard_delta
+        fragments = fragments() if fragments else {}
+        if mode == 'delta':
+            self._send_json({
+                'success': True, 'message': result.get('message', ''),
+                'fragments': fragments, 'data': get_dashboard_delta(result),
+            })
+        elif fragments:
+            target, fragment = next(iter(fragments.items()))
+            self._set_headers('text/html; charset=utf-8', headers={'X-Fragment-Target': target})
+            self.wfile.write(fragment.encode('utf-8'))
+        else:
+            self.send_response(204)
+            self.end_headers()
+
+    def _experiences_fragment(self, user_id, tipo):
+        from handlers import get_experiences_fragment
+        return {f'esperienze-{tipo}': get_experiences_fragment(user_id, tipo)}
+
+    def _send_rate_limited(self, path, retry_after):
+        """risposta 429 con Retry-After (JSON per le API, pagina di login per i form)"""
+        retry_after = max(1, int(retry_after + 0.999))
+        error = f'Troppi tentativi, riprova tra {retry_after} secondi'
+        headers = {'Retry-After': str(retry_after)}
+        if path.startswith('/api/'):
+            self._set_headers('application/json', 429, headers)
+            self.wfile.write(json.dumps({'success': False, 'error': error}).encode('utf-8'))
+        else:
+            self._render_template('templates/login.html', {'error': error, 'success': ''}, 429, headers)
+    
+    def _send_overloaded(self, path, retry_after=1, message='Server sovraccarico'):
+        """risposta 503 con Retry-After quando il server scarta la richiesta per sovraccarico"""
+        error = f'{message}, riprova tra {retry_after} secondi'
+        headers = {'Retry-After': str(retry_after)}
+        if path.startswith('/api/'):
+            self._set_headers('application/json', 503, headers)
+            self.wfile.write(json.dumps({'success': False, 'error': error}).encode('utf-8'))
+        else:
+            self._set_headers(status=503, headers=headers)
+            self.wfile.write(f'<!DOCTYPE html><html><body><h1>503</h1><p>{error}</p></body></html>'.encode('utf-8'))
+
     def _send_error(self, status, message):
         """Send error page"""
         self._set_headers(status=status)
@@ -178,6 +622,10 @@ class CVHandler(http.server.BaseHTTPRequestHandler):
     
     def _parse_multipart(self):
         """Ordina i dati letti in _parse_post_data """
+        with tracing.span('multipart'):
+            return self._split_multipart()
+
+    def _split_multipart(self):
         content_length = int(self.headers.get('Content-Length', 0))
         boundary = self.headers.get('Content-Type').split('boundary=')[1]
         
@@ -219,7 +667,7 @@ class CVHandler(http.server.BaseHTTPRequestHandler):
             mime_type = 'application/octet-stream'
         
         self._set_headers(mime_type)
-        with open(file_path, 'rb') as f:
+        with tracing.span('file.read', file=path), open(file_path, 'rb') as f:
             self.wfile.write(f.read())
 
 
@@ -246,29 +694,11 @@ class CVHandler(http.server.BaseHTTPRequestHandler):
         
         boundary = content_type.split('boundary=')[-1].encode()
         content_length = int(self.headers.get('Content-Length', 0))
-        body = self.rfile.read(content_length)
-
-        user_id = None
-        filename = None
-        file_data = None
-
-        for part in body.split(b'--' + boundary):
-            if b'Content-Disposition' not in part:
-                continue
-            try:
-                headers, data = part.split(b'\r\n\r\n', 1)
-            except ValueError:
-                continue
-            data = data.rstrip(b'\r\n')
-            header_text = headers.decode(errors='ignore')
-            if 'name="user_id"' in header_text:
-                user_id = data.decode()
-            elif 'name="cv_file"' in header_text:
-                start = header_text.find('filename="') + 10
-                end = header_text.find('"', start)
-                filename = header_text[start:end]
-                file_data = data
+        with tracing.span('upload.read_body', bytes=content_length):
+            body = self.rfile.read(content_length)
 
+        with tracing.span('multipart'):
+            user_id, filename, file_data = self._split_upload_body(body, boundary)
                 
         # ✅ Controlla campi obbligatori
         if not user_id or not filename or not file_data:
@@ -303,21 +733,50 @@ class CVHandler(http.server.BaseHTTPRequestHandler):
                 counter += 1
 
         # Salva effettivamente il file
-        with open(save_path, 'wb') as f:
+        with tracing.span('file.write', bytes=len(file_data)), open(save_path, 'wb') as f:
             f.write(file_data)
+        METRICS.inc('cv_uploads_total')
+        METRICS.inc('cv_upload_bytes_total', value=len(file_data))
 
         # Salva nel DB il nome effettivo
-        from database import get_db_connection
+        from database import bump_data_version, get_db_connection
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         relative_path = f"uploads/cv/{safe_filename}"
         cursor.execute("INSERT INTO user_cvs (user_id, cv_file_path) VALUES (%s, %s)", (user_id, relative_path))
+        bump_data_version(cursor, user_id)
         conn.commit()
         conn.close()
 
         self._send_json({'success': True, 'message': 'CV caricato con successo!'})
 
 
+    def _split_upload_body(self, body, boundary):
+        """estrae user_id, nome e contenuto del file dal body multipart dell'upload"""
+        user_id = None
+        filename = None
+        file_data = None
+
+        for part in body.split(b'--' + boundary):
+            if b'Content-Disposition' not in part:
+                continue
+            try:
+                headers, data = part.split(b'\r\n\r\n', 1)
+            except ValueError:
+                continue
+            data = data.rstrip(b'\r\n')
+            header_text = headers.decode(errors='ignore')
+            if 'name="user_id"' in header_text:
+                user_id = data.decode()
+            elif 'name="cv_file"' in header_text:
+                start = header_text.find('filename="') + 10
+                end = header_text.find('"', start)
+                filename = header_text[start:end]
+                file_data = data
+
+        return user_id, filename, file_data
+
+
    ## AGGIUNTA: Gestione download CV ###
     def _handle_download_cv(self, user_id):
         from database import get_cv_file
@@ -345,7 +804,7 @@ class CVHandler(http.server.BaseHTTPRequestHandler):
         self.send_header('Content-Type', 'application/pdf')
         self.send_header('Content-Disposition', f'inline; filename="{download_name}"')
         self.end_headers()
-        with open(file_path, 'rb') as f:
+        with tracing.span('file.read', file=download_name), open(file_path, 'rb') as f:
             self.wfile.write(f.read())
 
 
@@ -385,6 +844,126 @@ class CVHandler(http.server.BaseHTTPRequestHandler):
 
         self._send_json({'success': True, 'message': 'CV eliminato con successo'})
 
+
+    def _handle_export_cvs(self, query):
+        """Admin: invia in streaming uno ZIP con i CV (generati e caricati) degli studenti"""
+        from cv_export import get_export_students, stream_cv_zip
+
+        from pdf_generator import PDF_ENGINES
+        engine = query.get('engine')
+        if engine and engine not in PDF_ENGINES:
+            self._send_json({'success': False, 'error': 'Motore PDF non valido'}, 400)
+            return
+
+        students = get_export_students(query.get('q', ''))
+        if not students:
+            self._send_json({'success': False, 'error': 'Nessuno studente da esportare'}, 404)
+            return
+
+        stamp = datetime.now().strftime('%Y%m%d_%H%M')
+        # nessun Content-Length: la risposta termina con la chiusura della connessione
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/zip')
+        self.send_header('Content-Disposition', f'attachment; filename="cv_studenti_{stamp}.zip"')
+        self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
+        self.end_headers()
+        self.close_connection = True
+
+        try:
+            stream_cv_zip(self.wfile, students, engine)
+        except (BrokenPipeError, ConnectionResetError):
+            print("Export CV interrotto dal client")
+
+    def _handle_export_students(self, query):
+        """Admin: dati degli studenti in CSV o JSON lines (?format=), scritti man mano che escono dal DB"""
+        from student_export import EXPORT_FORMATS, stream_students
+
+        fmt = query.get('format', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            self._send_json({'success': False, 'error': 'Formato non valido (csv o jsonl)'}, 400)
+            return
+
+        stamp = datetime.now().strftime('%Y%m%d_%H%M')
+        content_type = 'text/csv; charset=utf-8' if fmt == 'csv' else 'application/x-ndjson; charset=utf-8'
+        # HTTP/1.0: niente chunked, la risposta termina con la chiusura della connessione
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Disposition', f'attachment; filename="studenti_{stamp}.{fmt}"')
+        self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
+        self.end_headers()
+        self.close_connection = True
+
+        try:
+            stream_students(self.wfile, fmt, query.get('q', ''))
+        except (BrokenPipeError, ConnectionResetError):
+            print("Export studenti interrotto dal client")
+
+    def _handle_sampling_profile(self, query):
+        """campiona gli stack di tutti i thread per ?seconds= secondi (collapsed stacks o JSON)"""
+        from profiler import PROFILER_DEFAULT_INTERVAL, collapsed, sample_stacks
+        try:
+            seconds = float(query.get('seconds', '10'))
+            interval = float(query['interval_ms']) / 1000 if 'interval_ms' in query else PROFILER_DEFAULT_INTERVAL
+        except ValueError:
+            self._send_json({'success': False, 'error': 'Parametri non validi'}, 400)
+            return
+        try:
+            stacks, samples = sample_stacks(seconds, interval, query.get('lines') == '1', query.get('idle') == '1')
+        except RuntimeError as e:
+            self._send_json({'success': False, 'error': str(e)}, 409)
+            return
+
+        if query.get('format') == 'json':
+            self._send_json({'success': True, 'samples': samples, 'stacks': dict(stacks.most_common())})
+            return
+        self._set_headers('text/plain; charset=utf-8', headers={'X-Profile-Samples': str(samples)})
+        self.wfile.write(collapsed(stacks).encode('utf-8'))
+
+    def _handle_memory(self, path, params):
+        """diagnostica memoria: stato e strutture, avvio/arresto tracemalloc, snapshot, top e diff"""
+        import memory
+        try:
+            limit = int(params.get('limit', 20))
+            frames = int(params.get('frames', memory.MEMORY_TRACE_FRAMES))
+            snapshot_id = int(params['snapshot']) if params.get('snapshot') else None
+            from_id = int(params['from']) if params.get('from') else None
+            to_id = int(params['to']) if params.get('to') else None
+        except ValueError:
+            self._send_json({'success': False, 'error': 'Parametri non validi'}, 400)
+            return
+        group_by = params.get('group', 'lineno')
+        if group_by not in memory.GROUP_BY:
+            self._send_json({'success': False, 'error': 'group deve essere lineno, filename o traceback'}, 400)
+            return
+
+        try:
+            if path == '/api/admin/memory':
+                result = {'status': memory.status(), 'structures': app_memory_structures()}
+            elif path == '/api/admin/memory/top' and self.command == 'GET':
+                result = {'top': memory.top(limit, group_by, snapshot_id)}
+            elif path == '/api/admin/memory/diff' and self.command == 'GET':
+                if from_id is None:
+                    self._send_json({'success': False, 'error': 'Parametro from mancante'}, 400)
+                    return
+                result = {'diff': memory.diff(from_id, to_id, limit, group_by)}
+            elif path == '/api/admin/memory/start' and self.command == 'POST':
+                result = {'started': memory.start(frames)}
+            elif path == '/api/admin/memory/stop' and self.command == 'POST':
+                result = {'stopped': memory.stop()}
+            elif path == '/api/admin/memory/snapshot' and self.command == 'POST':
+                result = {'snapshot': memory.take_snapshot(params.get('label', ''))}
+            else:
+                self._send_json({'success': False, 'error': 'Not found'}, 404)
+                return
+        except KeyError:
+            self._send_json({'success': False, 'error': 'Snapshot non trovato'}, 404)
+            return
+        except RuntimeError:
+            # tracemalloc non attivo
+            self._send_json({'success': False, 'error': 'tracemalloc non attivo: POST /api/admin/memory/start'}, 409)
+            return
+        self._send_json({'success': True, **result})
+
 ######################################################## Fine Gestione upload / Download CV .pdf ##########################################################################
 
 
@@ -501,11 +1080,94 @@ class CVHandler(http.server.BaseHTTPRequestHandler):
         
 
 
+        elif path == '/admin-sql-profile':
+            if not session.get('user_id') or session.get('role') != 'admin':
+                self._redirect('/')
+                return
+
+            if query.get('format') == 'json':
+                self._send_json({'success': True, 'profile': SQL_PROFILER.report()})
+                return
+
+            from handlers import get_admin_sql_profile_data
+            self._render_template('templates/admin-sql-profile.html', get_admin_sql_profile_data())
+
         elif path == '/logout':
             cookie = self._destroy_session()
             self._redirect('/', set_cookie=cookie)
         
         
+        elif path == '/metrics':
+            authorization = self.headers.get('Authorization', '')
+            token_ok = bool(METRICS_TOKEN) and hmac.compare_digest(authorization.encode(), f'Bearer {METRICS_TOKEN}'.encode())
+            if not token_ok and session.get('role') != 'admin':
+                self._send_error(403, "Forbidden")
+                return
+            self._set_headers('text/plain; version=0.0.4; charset=utf-8')
+            self.wfile.write(METRICS.render().encode('utf-8'))
+
+        elif path == '/api/admin/profile':
+            if not session.get('user_id') or session.get('role') != 'admin':
+                self._send_json({'success': False, 'error': 'Non autorizzato'}, 403)
+                return
+            self._handle_sampling_profile(query)
+
+        elif path == '/api/admin/profile/requests':
+            if not session.get('user_id') or session.get('role') != 'admin':
+                self._send_json({'success': False, 'error': 'Non autorizzato'}, 403)
+                return
+            if not query.get('id'):
+                self._send_json({'success': True, 'profiles': REQUEST_PROFILES.summary()})
+                return
+            result = REQUEST_PROFILES.get(int(query['id'])) if query['id'].isdigit() else None
+            if result is None:
+                self._send_json({'success': False, 'error': 'Profilo non trovato'}, 404)
+                return
+            self._set_headers('text/plain; charset=utf-8')
+            self.wfile.write(result['stats'].encode('utf-8'))
+
+        elif path.startswith('/api/admin/memory'):
+            if not session.get('user_id') or session.get('role') != 'admin':
+                self._send_json({'success': False, 'error': 'Non autorizzato'}, 403)
+                return
+            self._handle_memory(path, query)
+
+        elif path == '/api/admin/rate-limits':
+            if not session.get('user_id') or session.get('role') != 'admin':
+                self._send_json({'success': False, 'error': 'Non autorizzato'}, 403)
+                return
+            from rate_limit import get_rate_limit_stats
+            self._send_json({'success': True, 'stats': get_rate_limit_stats()})
+
+        elif path == '/api/admin/export-cvs':
+            if not session.get('user_id') or session.get('role') != 'admin':
+                self._send_json({'success': False, 'error': 'Non autorizzato'}, 403)
+                return
+            self._handle_export_cvs(query)
+
+        elif path == '/api/admin/export-students':
+            if not session.get('user_id') or session.get('role') != 'admin':
+                self._send_json({'success': False, 'error': 'Non autorizzato'}, 403)
+                return
+            self._handle_export_students(query)
+
+        elif path == '/api/me':
+            if not session.get('user_id'):
+                self._send_json({'success': False, 'error': 'Non autenticato'}, 401)
+                return
+            self._send_profile_json('user', session['user_id'])
+
+        elif path.startswith('/api/admin/students/'):
+            if not session.get('user_id') or session.get('role') != 'admin':
+                self._send_json({'success': False, 'error': 'Non autorizzato'}, 403)
+                return
+            student_id = path[len('/api/admin/students/'):]
+            if not student_id.isdigit():
+                self._send_json({'success': False, 'error': 'Studente non trovato'}, 404)
+                return
+            self._send_profile_json('student', int(student_id), 'student')
+
+
         elif path.startswith('/css/') or path.startswith('/js/') or path.startswith('/uploads/'):
             self._serve_static(path)
         
@@ -545,6 +1207,7 @@ class CVHandler(http.server.BaseHTTPRequestHandler):
         """gestisce le richieste POST"""
         parsed_path = urllib.parse.urlparse(self.path)
         path = parsed_path.path
+        query = dict(urllib.parse.parse_qsl(parsed_path.query))
         
         # Get session
         session = self._get_session()
@@ -554,6 +1217,8 @@ class CVHandler(http.server.BaseHTTPRequestHandler):
         content_type = self.headers.get('Content-Type', '')
         if self.path == '/api/upload-cv' and 'multipart/form-data' in content_type:
             post_data = {}  # _handle_upload_cv_form() leggerà il body direttamente
+        elif path == '/api/admin/import-students':
+            post_data = {}  # il file da importare viene letto in streaming
         else:
             post_data = self._parse_post_data()
 
@@ -562,11 +1227,19 @@ class CVHandler(http.server.BaseHTTPRequestHandler):
         from handlers import (
             handle_login, handle_register,handle_download_cv,
             handle_update_profile, handle_add_experience, handle_delete_experience,
-            handle_admin_delete_user
+            handle_update_experience, handle_experience_batch, handle_admin_delete_user
         )
         
 ######################################################## inizio gestione Login e Register ##########################################################################
         
+        # rate limit per IP ed email, prima di qualunque query o hash
+        if path in ('/login', '/api/login'):
+            from rate_limit import check_login_rate
+            retry_after = check_login_rate(self.client_address[0], post_data.get('email', ''))
+            if retry_after:
+                self._send_rate_limited(path, retry_after)
+                return
+
         # login basato su un form (HTML)
         if path == '/login':
             result = handle_login(post_data)
@@ -627,10 +1300,9 @@ class CVHandler(http.server.BaseHTTPRequestHandler):
                 return
             
             result = handle_update_profile(session.get('user_id'), post_data)
-            if result.get('success'):
-                self._redirect(result.get('redirect'))
-            else:
-                self._send_json(result)
+            self._send_dashboard_update(result, lambda: {
+                'benvenuto': f"Benvenuto, {result['profile']['nome']} {result['profile']['cognome']}",
+            })
 
         
         elif path == '/api/add-experience':
@@ -640,10 +1312,7 @@ class CVHandler(http.server.BaseHTTPRequestHandler):
             
           
             result = handle_add_experience(session.get('user_id'), post_data)
-            if result.get('success'):
-                self._redirect(result.get('redirect'))
-            else:
-                self._send_json(result)
+            self._send_dashboard_update(result, lambda: self._experiences_fragment(session.get('user_id'), result['tipo']))
 
         
 
@@ -660,28 +1329,55 @@ class CVHandler(http.server.BaseHTTPRequestHandler):
                 return
 
             result = handle_delete_experience(session.get('user_id'), exp_id)
-            if result.get('success'):
-                self._redirect(result.get('redirect'))
-            else:
-                self._send_json(result)
+            self._send_dashboard_update(result, lambda: self._experiences_fragment(session.get('user_id'), result['tipo']))
+
+        elif path == '/api/update-experience':
+            if not session.get('user_id'):
+                self._send_json({'success': False, 'error': 'Non autenticato'}, 401)
+                return
+            exp_id = post_data.get('id') or post_data.get('experience_id')
+            try:
+                exp_id = int(exp_id)
+            except (TypeError, ValueError):
+                self._send_json({'success': False, 'error': 'ID esperienza non valido'}, 400)
+                return
+            self._send_json(handle_update_experience(session.get('user_id'), exp_id, post_data))
+
+        elif path == '/api/experiences/batch':
+            # JSON: {"operations": [{"op": "add" | "update" | "delete", ...}, ...]}
+            if not session.get('user_id'):
+                self._send_json({'success': False, 'error': 'Non autenticato'}, 401)
+                return
+            operations = post_data if isinstance(post_data, list) else post_data.get('operations')
+            result = handle_experience_batch(session.get('user_id'), operations)
+            self._send_json(result, 200 if result['success'] else 400)
         
 
 
         elif path == '/api/cv-content':
             # mostra i CV content salvati (hobby, skills, languages) come JSON per gli utenti loggati
             if not session.get('user_id'):
-                self._redirect('/login')
+                if self.headers.get('X-Response-Mode'):
+                    self._send_json({'success': False, 'error': 'Non autenticato'}, 401)
+                else:
+                    self._redirect('/login')
                 return
             
             form_data = post_data.get('form', post_data) if isinstance(post_data, dict) and 'form' in post_data else post_data
             from handlers import add_cv_content
             result =add_cv_content(session.get('user_id'), form_data)
-            self._redirect('/user-dashboard')
+            self._send_dashboard_update(result)
         
 ######################################################## fine gestione Profilo Utente ###########################################################################       
 
 
         
+        elif path.startswith('/api/admin/memory'):
+            if not session.get('user_id') or session.get('role') != 'admin':
+                self._send_json({'success': False, 'error': 'Non autorizzato'}, 403)
+                return
+            self._handle_memory(path, {**query, **post_data})
+
         elif path == '/api/admin/delete-user':
                 if not session.get('user_id') or session.get('role') != 'admin':
                     self._send_json({'success': False, 'error': 'Non autorizzato'}, 403)
@@ -700,6 +1396,12 @@ class CVHandler(http.server.BaseHTTPRequestHandler):
                 
                 result = handle_admin_delete_user(user_id)
                 self._send_json(result)
+
+        elif path == '/api/admin/import-students':
+            if not session.get('user_id') or session.get('role') != 'admin':
+                self._send_json({'success': False, 'error': 'Non autorizzato'}, 403)
+                return
+            self._handle_import_students(query, content_type)
         
 
 
@@ -712,8 +1414,15 @@ class CVHandler(http.server.BaseHTTPRequestHandler):
             
             user_id = post_data.get('user_id')
 
+            # motore PDF selezionabile per richiesta (?engine=fast o campo engine)
+            from pdf_generator import PDF_ENGINES
+            engine = post_data.get('engine') or query.get('engine')
+            if engine and engine not in PDF_ENGINES:
+                self._send_json({'success': False, 'error': 'Motore PDF non valido'}, 400)
+                return
+
             from handlers import handle_download_cv
-            result = handle_download_cv(session['user_id'])
+            result = handle_download_cv(session['user_id'], engine)
 
             if not result['success']:
                 self._send_json(result, 500)
@@ -737,17 +1446,116 @@ class CVHandler(http.server.BaseHTTPRequestHandler):
 
 
 
+    def _handle_import_students(self, query, content_type):
+        """import massivo: body CSV (text/csv) o JSON lines (application/x-ndjson), oppure ?format="""
+        from handlers import handle_admin_import_students
+        from student_import import IMPORT_FORMATS, open_body
+
+        fmt = query.get('format')
+        if not fmt:
+            fmt = 'jsonl' if 'json' in content_type else 'csv'
+        if fmt not in IMPORT_FORMATS:
+            self._send_json({'success': False, 'error': 'Formato non valido (csv o jsonl)'}, 400)
+            return
+        content_length = int(self.headers.get('Content-Length', 0))
+        if not content_length:
+            self._send_json({'success': False, 'error': 'File da importare mancante'}, 400)
+            return
+
+        if isinstance(self.rfile, _DeadlineReader):
+            # il body si legge mentre si calcolano gli hash: niente scadenza complessiva,
+            # resta il timeout di inattivita' sulla singola lettura
+            self.rfile.deadline = None
+        with tracing.span('import', format=fmt, bytes=content_length):
+            result = handle_admin_import_students(open_body(self.rfile, content_length), fmt)
+        # import interrotto: riepilogo parziale (le righe gia' inserite restano)
+        self._send_json(result, 200 if result['success'] else 500)
+
+    def log_request(self, code='-', size='-'):
+        """le richieste vengono registrate a fine gestione, vedi _log_access"""
+
     def log_message(self, format, *args):
-        """Log HTTP requests"""
-        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {format % args}")
+        """messaggi di errore di http.server, nello stesso access log (JSON)"""
+        ACCESS_LOGGER.log({'ts': time.time(), 'client': self.client_address[0], 'message': format % args})
+
+
+def app_memory_structures():
+    """numero di elementi e byte occupati dalle strutture in memoria dell'applicazione"""
+    from memory import deep_size
+    from handlers import AUTH_CACHE
+    from rate_limit import LOGIN_EMAIL_LIMITER, LOGIN_IP_LIMITER
+    from registration import REGISTRATION_PIPELINE
+
+    now = datetime.now().timestamp()
+    bloom = REGISTRATION_PIPELINE.bloom
+    return {
+        'sessions': {
+            'count': len(SESSIONS),
+            # le sessioni scadute vengono rimosse solo quando il loro cookie viene riusato
+            'expired': sum(1 for session in list(SESSIONS.values()) if session.get('expires', 0) <= now),
+            'bytes': deep_size(SESSIONS),
+        },
+        'auth_cache': {'count': len(AUTH_CACHE), 'bytes': deep_size(AUTH_CACHE.data)},
+        'rate_limit_ip': {'count': LOGIN_IP_LIMITER.size(), 'bytes': deep_size(LOGIN_IP_LIMITER.buckets)},
+        'rate_limit_email': {'count': LOGIN_EMAIL_LIMITER.size(), 'bytes': deep_size(LOGIN_EMAIL_LIMITER.buckets)},
+        'registration_bloom': {'bytes': len(bloom.bits) if bloom is not None else 0},
+        'registration_queue': {'count': REGISTRATION_PIPELINE.queue.qsize()},
+        'access_log_queue': {'count': ACCESS_LOGGER.queue.qsize()},
+        'sql_profiler': {
+            'count': len(SQL_PROFILER.recent) + len(SQL_PROFILER.flagged),
+            'bytes': deep_size([list(SQL_PROFILER.recent), list(SQL_PROFILER.flagged), SQL_PROFILER.totals]),
+        },
+        'request_profiles': {
+            'count': len(REQUEST_PROFILES.results), 'bytes': deep_size(list(REQUEST_PROFILES.results)),
+        },
+    }
 
 
 def init_database():
-    """inizializza il database (MySQL)"""
-    from database import create_tables, create_default_users
+    """inizializza il database (MySQL oppure SQLite, vedi DB_BACKEND)"""
+    from database import DB_BACKEND, create_tables, create_default_users
     create_tables()
     create_default_users()
-    print("✓ Database initialized (MySQL)")
+    print(f"✓ Database initialized ({DB_BACKEND})")
+
+
+class CVServer(http.server.ThreadingHTTPServer):
+    """ThreadingHTTPServer con un limite di connessioni contemporanee per IP client"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connections = Counter()
+        self.connections_lock = threading.Lock()
+
+    def verify_request(self, request, client_address):
+        if MAX_CONNECTIONS_PER_IP <= 0:
+            return True
+        with self.connections_lock:
+            if self.connections[client_address[0]] >= MAX_CONNECTIONS_PER_IP:
+                rejected = True
+            else:
+                self.connections[client_address[0]] += 1
+                rejected = False
+        if rejected:
+            METRICS.inc('http_connections_rejected_total', 'per_ip')
+            try:
+                # socket appena accettato: il buffer di invio e' vuoto, la scrittura non blocca
+                request.setblocking(False)
+                request.send(b'HTTP/1.0 429 Too Many Requests\r\nRetry-After: 1\r\nContent-Length: 0\r\n\r\n')
+            except OSError:
+                pass
+            return False
+        return True
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            if MAX_CONNECTIONS_PER_IP > 0:
+                with self.connections_lock:
+                    self.connections[client_address[0]] -= 1
+                    if self.connections[client_address[0]] <= 0:
+                        del self.connections[client_address[0]]
 
 
 def main():
@@ -758,8 +1566,8 @@ def main():
     # chiama l'inizializzazione del database
     init_database()
     
-    # Start server
-    server = http.server.HTTPServer((HOST, PORT), CVHandler)
+    # Start server (un thread per richiesta: export e PDF lunghi non bloccano gli altri utenti)
+    server = CVServer((HOST, PORT), CVHandler)
     print(f"""
 ╔════════════════════════════════════════════════════════════╗
 ║  📄 CV Management System - Python Server                   ║
@@ -0,0 +1,155 @@
+"""Profiler SQL per richiesta, con segnalazione dei probabili N+1 e log delle query lente.
+
+Si attiva con SQL_PROFILER=1. Per ogni richiesta HTTP vengono raccolte le
+query eseguite (testo normalizzato, durata, righe, funzione chiamante); le
+richieste che superano il budget di query o di tempo DB, o che ripetono la
+stessa query molte volte, vengono segnalate. I risultati sono visibili agli
+admin in /admin-sql-profile.
+"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+import request_context
+from access_log import AccessLogger
+from db_instrument import QUERY_OBSERVERS
+
+SQL_PROFILER_ENABLED = os.getenv('SQL_PROFILER', '0') == '1'
+# budget per richiesta oltre il quale la richiesta viene segnalata
+SQL_PROFILER_MAX_QUERIES = int(os.getenv('SQL_PROFILER_MAX_QUERIES', '20'))
+SQL_PROFILER_MAX_DB_MS = float(os.getenv('SQL_PROFILER_MAX_DB_MS', '200'))
+# la stessa query eseguita almeno tante volte nella richiesta = probabile N+1
+SQL_PROFILER_REPEAT = int(os.getenv('SQL_PROFILER_REPEAT', '5'))
+SQL_PROFILER_HISTORY = int(os.getenv('SQL_PROFILER_HISTORY', '100'))
+SQL_SLOW_QUERY_MS = float(os.getenv('SQL_SLOW_QUERY_MS', '100'))
+# '-' = stdout, un percorso = file, 'off' = disattivato
+SQL_SLOW_LOG = os.getenv('SQL_SLOW_LOG', '-')
+
+# moduli del livello database: il chiamante e' il primo frame fuori da questi
+_DB_MODULES = {'db_instrument.py', 'db_faults.py', 'db_sqlite.py', 'sql_profiler.py'}
+
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+
+
+@lru_cache(maxsize=2048)
+def normalize(sql):
+    """testo della query senza valori: WHERE id = 5 e WHERE id = %s diventano WHERE id = ?"""
+    sql = _STRING_RE.sub('?', sql).replace('%s', '?')
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _LIST_RE.sub('(?, ...)', sql)
+    return ' '.join(sql.split())
+
+
+def _caller():
+    frame = sys._getframe(2)
+    while frame is not None and os.path.basename(frame.f_code.co_filename) in _DB_MODULES:
+        frame = frame.f_back
+    if frame is None:
+        return ''
+    return f'{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}'
+
+
+class SQLProfiler:
+    def __init__(self, history):
+        self.recent = deque(maxlen=history)     # profili delle ultime richieste con query
+        self.flagged = deque(maxlen=history)    # solo quelle oltre il budget
+        self.totals = {}                        # query normalizzata -> [esecuzioni, ms totali, ms max, righe]
+        self.lock = threading.Lock()
+        self.slow_log = AccessLogger(SQL_SLOW_LOG, 10000, 'drop')
+
+    def observe(self, statement):
+        context = request_context.current()
+        if context is not None:
+            if context.queries is None:
+                context.queries = []
+            context.queries.append((statement, _caller()))
+        elif statement.elapsed * 1000 >= SQL_SLOW_QUERY_MS:
+            # query fuori da una richiesta (es. registrazioni a blocchi)
+            self._log_slow(statement, _caller(), None)
+
+    def _log_slow(self, statement, caller, path):
+        self.slow_log.log({
+            'ts': time.time(), 'type': 'slow_query', 'ms': round(statement.elapsed * 1000, 2),
+            'sql': normalize(statement.sql), 'rows': statement.rows, 'failed': statement.failed,
+            'caller': caller, 'path': path,
+        })
+
+    def finish_request(self, context, method, path, status, elapsed):
+        """chiude il profilo della richiesta (le righe lette sono ormai tutte contate)"""
+        queries = context.queries
+        if not queries:
+            return
+        groups = {}
+        db_time = 0.0
+        for statement, caller in queries:
+            db_time += statement.elapsed
+            if statement.elapsed * 1000 >= SQL_SLOW_QUERY_MS:
+                self._log_slow(statement, caller, path)
+            key = normalize(statement.sql)
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = {
+                    'sql': key, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0, 'callers': [],
+                }
+            ms = statement.elapsed * 1000
+            group['count'] += 1
+            group['total_ms'] += ms
+            group['max_ms'] = max(group['max_ms'], ms)
+            group['rows'] += statement.rows
+            if caller and caller not in group['callers']:
+                group['callers'].append(caller)
+
+        for group in groups.values():
+            group['total_ms'] = round(group['total_ms'], 3)
+            group['max_ms'] = round(group['max_ms'], 3)
+
+        flags = []
+        if len(queries) > SQL_PROFILER_MAX_QUERIES:
+            flags.append(f'{len(queries)} query (budget {SQL_PROFILER_MAX_QUERIES})')
+        if db_time * 1000 > SQL_PROFILER_MAX_DB_MS:
+            flags.append(f'{db_time * 1000:.0f} ms di DB (budget {SQL_PROFILER_MAX_DB_MS:.0f})')
+        repeated = [g for g in groups.values() if g['count'] >= SQL_PROFILER_REPEAT and g['sql'] != 'COMMIT']
+        if repeated:
+            flags.append('probabile N+1: ' + '; '.join(f"{g['count']}x {g['sql'][:60]}" for g in repeated))
+
+        profile = {
+            'ts': time.time(), 'method': method, 'path': path, 'status': status,
+            'latency_ms': round(elapsed * 1000, 2), 'queries': len(queries),
+            'db_ms': round(db_time * 1000, 2), 'flags': flags,
+            'statements': sorted(groups.values(), key=lambda g: -g['total_ms']),
+        }
+        with self.lock:
+            self.recent.append(profile)
+            if flags:
+                self.flagged.append(profile)
+            for group in groups.values():
+                total = self.totals.setdefault(group['sql'], [0, 0.0, 0.0, 0])
+                total[0] += group['count']
+                total[1] += group['total_ms']
+                total[2] = max(total[2], group['max_ms'])
+                total[3] += group['rows']
+
+    def report(self, top=30):
+        with self.lock:
+            totals = sorted(self.totals.items(), key=lambda item: -item[1][1])[:top]
+            return {
+                'enabled': SQL_PROFILER_ENABLED,
+                'flagged': list(reversed(self.flagged)),
+                'recent': list(reversed(self.recent)),
+                'top_queries': [
+                    {'sql': sql, 'count': count, 'total_ms': round(total_ms, 2),
+                     'avg_ms': round(total_ms / count, 3), 'max_ms': round(max_ms, 2), 'rows': rows}
+                    for sql, (count, total_ms, max_ms, rows) in totals
+                ],
+            }
+
+
+SQL_PROFILER = SQLProfiler(SQL_PROFILER_HISTORY)
+if SQL_PROFILER_ENABLED:
+    QUERY_OBSERVERS.append(SQL_PROFILER.observe)
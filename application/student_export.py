@@ -0,0 +1,105 @@
+"""Export degli studenti in CSV o JSON lines, in streaming.
+
+Le righe arrivano da un cursore non bufferizzato (lato server con MySQL)
+a blocchi di EXPORT_FETCH_SIZE e vengono codificate e inviate man mano:
+la memoria usata non dipende dal numero di studenti e il download parte
+con la prima riga.
+"""
+import csv
+import html
+import io
+import json
+import os
+from datetime import date, datetime
+
+from cv_export import student_filter
+from database import DB_BACKEND, get_db_connection
+
+EXPORT_FETCH_SIZE = int(os.getenv('EXPORT_FETCH_SIZE', '1000'))
+# byte accumulati prima di ogni scrittura sul socket
+EXPORT_STREAM_CHUNK = 64 * 1024
+EXPORT_FORMATS = ('csv', 'jsonl')
+
+EXPORT_COLUMNS = (
+    'id', 'email', 'nome', 'cognome', 'telefono', 'indirizzo', 'citta', 'data_nascita', 'nazionalita',
+    'linkedin_url', 'patente', 'skills', 'languages', 'esperienze_lavoro', 'esperienze_formazione',
+)
+# le esperienze sono aggregate prima del join: una riga per studente
+_EXPORT_QUERY = """
+    SELECT u.id, u.email, u.nome, u.cognome, cv.telefono, cv.indirizzo, cv.citta, cv.data_nascita,
+           cv.nazionalita, cv.linkedin_url, cv.patente, cv.skills, cv.languages,
+           COALESCE(e.lavoro, 0), COALESCE(e.formazione, 0)
+    FROM users u
+    LEFT JOIN cv_data cv ON u.id = cv.user_id
+    LEFT JOIN (
+        SELECT user_id, SUM(tipo = 'lavoro') AS lavoro, SUM(tipo = 'formazione') AS formazione
+        FROM experiences
+        GROUP BY user_id
+    ) e ON e.user_id = u.id
+    {where}
+    ORDER BY u.id
+"""
+# caratteri iniziali che un foglio di calcolo interpreterebbe come formula
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def iter_students(search=''):
+    """righe (tuple in ordine EXPORT_COLUMNS) lette a blocchi dal cursore"""
+    where, params = student_filter(search)
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        if DB_BACKEND == 'mysql':
+            # con un client lento MySQL aspetta la lettura del risultato oltre i 60 s di default
+            cursor.execute('SET SESSION net_write_timeout = 600')
+        cursor.execute(_EXPORT_QUERY.format(where=where), params)
+        while True:
+            rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        conn.close()
+
+
+def _text(value):
+    """valori come nel profilo (sanitize_input salva entita' HTML), date in ISO"""
+    if value is None:
+        return None
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, str):
+        return html.unescape(value)
+    return value
+
+
+def _csv_cell(value):
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_students(wfile, fmt, search=''):
+    """scrive l'export su wfile a blocchi e restituisce il numero di studenti"""
+    buffer = io.StringIO()
+    if fmt == 'csv':
+        # BOM: Excel riconosce l'UTF-8
+        buffer.write('\ufeff')
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+    count = 0
+    for row in iter_students(search):
+        values = [_text(value) for value in row]
+        if fmt == 'csv':
+            writer.writerow([_csv_cell(value) for value in values])
+        else:
+            buffer.write(json.dumps(dict(zip(EXPORT_COLUMNS, values)), ensure_ascii=False))
+            buffer.write('\n')
+        count += 1
+        if buffer.tell() >= EXPORT_STREAM_CHUNK:
+            wfile.write(buffer.getvalue().encode('utf-8'))
+            buffer.seek(0)
+            buffer.truncate()
+    wfile.write(buffer.getvalue().encode('utf-8'))
+    wfile.flush()
+    return count
@@ -0,0 +1,309 @@
+"""Import massivo degli studenti da CSV o JSON lines.
+
+Le righe vengono lette in streaming e validate con le stesse regole della
+registrazione; le password sono calcolate in parallelo da un pool di
+thread (scrypt e PBKDF2 rilasciano il GIL) e gli utenti inseriti a blocchi
+di IMPORT_BATCH_SIZE con executemany, un commit per blocco. Le righe non
+valide o gia' registrate finiscono nell'elenco degli errori senza fermare
+l'import.
+
+Colonne obbligatorie: email, password, nome, cognome. Facoltative (cv_data):
+telefono, indirizzo, data_nascita (AAAA-MM-GG), citta, nazionalita, linkedin_url.
+
+Uso da riga di comando (dalla cartella application):
+    python student_import.py studenti.csv
+    python student_import.py --format jsonl studenti.jsonl
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from database import (
+    HASH_WORKERS, IntegrityError, get_db_connection, hash_password, salt_generation,
+    sanitize_input, validate_email, validate_password
+)
+
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '500'))
+IMPORT_HASH_WORKERS = int(os.getenv('IMPORT_HASH_WORKERS', str(HASH_WORKERS)))
+# errori riportati nella risposta (gli altri vengono solo contati)
+IMPORT_MAX_ERRORS = int(os.getenv('IMPORT_MAX_ERRORS', '1000'))
+# dimensione massima del file inviato a /api/admin/import-students
+IMPORT_MAX_BODY = int(os.getenv('IMPORT_MAX_BODY', str(200 * 1024 * 1024)))
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+REQUIRED_FIELDS = ('email', 'password', 'nome', 'cognome')
+CV_FIELDS = ('telefono', 'indirizzo', 'data_nascita', 'citta', 'nazionalita', 'linkedin_url')
+# come in handle_update_profile: data e URL non passano da sanitize_input
+_RAW_CV_FIELDS = {'data_nascita', 'linkedin_url'}
+
+DUPLICATE_EMAIL_ERROR = 'Questa email è già registrata'
+
+
+class _BodyReader(io.RawIOBase):
+    """i primi length byte di uno stream binario (il body della richiesta, senza leggere oltre)"""
+
+    def __init__(self, stream, length):
+        self.stream = stream
+        self.left = length
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.left <= 0:
+            return 0
+        data = self.stream.read(min(len(buffer), self.left))
+        self.left -= len(data)
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def open_body(stream, length):
+    """file di testo letto in streaming dal body: le righe arrivano man mano che il client le invia"""
+    return io.TextIOWrapper(io.BufferedReader(_BodyReader(stream, length), 64 * 1024),
+                            encoding='utf-8-sig', errors='replace', newline='')
+
+
+def parse_rows(lines, fmt):
+    """(numero di riga, dict oppure messaggio di errore) per ogni record"""
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        missing = [f for f in REQUIRED_FIELDS if f not in (reader.fieldnames or ())]
+        if missing:
+            yield 1, f"Intestazione CSV senza le colonne: {', '.join(missing)}"
+            return
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line_no, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_no, 'JSON non valido'
+            continue
+        if not isinstance(record, dict):
+            yield line_no, 'Ogni riga deve essere un oggetto JSON'
+            continue
+        yield line_no, record
+
+
+def validate_row(record):
+    """(riga pronta per l'inserimento, None) oppure (None, errore), con le regole di handle_register"""
+    values = {k: str(v if v is not None else '').strip() for k, v in record.items() if isinstance(k, str)}
+    nome = sanitize_input(values.get('nome', ''))
+    cognome = sanitize_input(values.get('cognome', ''))
+    email = values.get('email', '')
+    password = record.get('password') or ''
+
+    if not all([nome, cognome, email, password]):
+        return None, 'Tutti i campi sono obbligatori'
+    if len(nome) < 2 or len(cognome) < 2:
+        return None, 'Nome e cognome devono contenere almeno 2 caratteri'
+    if not validate_email(email):
+        return None, 'Email non valida'
+    valid, error = validate_password(str(password))
+    if not valid:
+        return None, error
+
+    cv = []
+    for field in CV_FIELDS:
+        value = values.get(field, '')
+        if field not in _RAW_CV_FIELDS:
+            value = sanitize_input(value)
+        cv.append(value or None)
+    data_nascita = cv[CV_FIELDS.index('data_nascita')]
+    if data_nascita:
+        try:
+            datetime.strptime(data_nascita, '%Y-%m-%d')
+        except ValueError:
+            return None, 'Data di nascita non valida (AAAA-MM-GG)'
+    return {'email': email, 'password': str(password), 'nome': nome, 'cognome': cognome, 'cv': cv}, None
+
+
+def _hash(password):
+    salt = salt_generation()
+    return hash_password(password, salt), salt
+
+
+class StudentImporter:
+    """esegue un import: blocchi di righe valide, hash in parallelo, inserimento a blocchi"""
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE, workers=IMPORT_HASH_WORKERS, on_imported=None):
+        self.batch_size = max(1, batch_size)
+        self.workers = max(1, workers)
+        # chiamata con le email di ogni blocco inserito (cache di login, Bloom delle registrazioni)
+        self.on_imported = on_imported
+        self.imported = 0
+        self.failed = 0
+        self.batches = 0
+        self.errors = []
+        self.last_line = 0
+        self.pending = 0           # righe valide non ancora inserite
+        self.aborted = None
+
+    def error(self, line_no, email, message):
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({'line': line_no, 'email': email, 'error': message})
+
+    def run(self, lines, fmt):
+        if fmt not in IMPORT_FORMATS:
+            raise ValueError(f'formato non valido: {fmt}')
+        try:
+            self._run(lines, fmt)
+        except Exception as e:
+            # lettura del body o database: le righe gia' inserite restano, il riepilogo dice dove si e' fermato
+            self.aborted = f'{type(e).__name__}: {e}'
+            print(f"Import studenti interrotto alla riga {self.last_line}: {self.aborted}")
+        return self.result()
+
+    def _run(self, lines, fmt):
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='import-hash') as pool:
+            try:
+                self._read_rows(pool, lines, fmt)
+            except BaseException:
+                # gli hash delle righe che non verranno inserite non servono piu'
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    def _read_rows(self, pool, lines, fmt):
+        seen = set()
+        batch = []
+        previous = None
+        for line_no, record in parse_rows(lines, fmt):
+            self.last_line = line_no
+            if isinstance(record, str):
+                self.error(line_no, None, record)
+                continue
+            row, error = validate_row(record)
+            if error:
+                self.error(line_no, record.get('email'), error)
+                continue
+            key = row['email'].lower()
+            if key in seen:
+                self.error(line_no, row['email'], 'Email ripetuta nel file')
+                continue
+            seen.add(key)
+            row['line'] = line_no
+            row['hash'] = pool.submit(_hash, row.pop('password'))
+            batch.append(row)
+            self.pending += 1
+            if len(batch) >= self.batch_size:
+                # il blocco precedente si inserisce mentre il pool calcola gli hash di questo
+                if previous:
+                    self._insert_batch(previous)
+                    self.pending -= len(previous)
+                previous, batch = batch, []
+        for pending in (previous, batch):
+            if pending:
+                self._insert_batch(pending)
+                self.pending -= len(pending)
+
+    def _insert_batch(self, batch):
+        for row in batch:
+            row['hash'], row['salt'] = row['hash'].result()
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            # email gia' presenti: errore di riga, il resto del blocco prosegue
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(f'SELECT email FROM users WHERE email IN ({placeholders})', [r['email'] for r in batch])
+            existing = {email.lower() for (email,) in cursor.fetchall()}
+            rows = []
+            for row in batch:
+                if row['email'].lower() in existing:
+                    self.error(row['line'], row['email'], DUPLICATE_EMAIL_ERROR)
+                else:
+                    rows.append(row)
+            if not rows:
+                return
+            try:
+                self._insert_rows(cursor, rows)
+                conn.commit()
+            except IntegrityError:
+                # email registrata nel frattempo: si ripiega sugli inserimenti singoli
+                conn.rollback()
+                rows = [row for row in rows if self._insert_single(conn, cursor, row)]
+        finally:
+            conn.close()
+
+        self.batches += 1
+        self.imported += len(rows)
+        if self.on_imported and rows:
+            self.on_imported([row['email'] for row in rows])
+
+    def _insert_rows(self, cursor, rows):
+        cursor.executemany(
+            'INSERT INTO users (email, password_hash, salt, nome, cognome, role) VALUES (%s, %s, %s, %s, %s, %s)',
+            [(r['email'], r['hash'], r['salt'], r['nome'], r['cognome'], 'student') for r in rows]
+        )
+        placeholders = ', '.join(['%s'] * len(rows))
+        cursor.execute(f'SELECT id, email FROM users WHERE email IN ({placeholders})', [r['email'] for r in rows])
+        ids = {email.lower(): user_id for user_id, email in cursor.fetchall()}
+        cursor.executemany(
+            f"INSERT INTO cv_data (user_id, {', '.join(CV_FIELDS)}) VALUES (%s{', %s' * len(CV_FIELDS)})",
+            [(ids[r['email'].lower()], *r['cv']) for r in rows]
+        )
+
+    def _insert_single(self, conn, cursor, row):
+        try:
+            self._insert_rows(cursor, [row])
+            conn.commit()
+            return True
+        except IntegrityError:
+            conn.rollback()
+            self.error(row['line'], row['email'], DUPLICATE_EMAIL_ERROR)
+            return False
+
+    def result(self):
+        result = {
+            'success': self.aborted is None, 'imported': self.imported, 'failed': self.failed,
+            'batches': self.batches, 'errors': self.errors, 'errors_truncated': self.failed > len(self.errors),
+        }
+        if self.aborted:
+            result.update(error=f'Import interrotto alla riga {self.last_line}: {self.aborted}',
+                          last_line=self.last_line, not_imported=self.pending)
+        return result
+
+
+def import_students(lines, fmt, on_imported=None):
+    """importa gli studenti dalle righe di testo indicate e restituisce il riepilogo"""
+    return StudentImporter(on_imported=on_imported).run(lines, fmt)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import massivo degli studenti da CSV o JSON lines')
+    parser.add_argument('file', help="file da importare ('-' = stdin)")
+    parser.add_argument('--format', choices=IMPORT_FORMATS,
+                        help="formato del file (default: dall'estensione, altrimenti csv)")
+    parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=IMPORT_HASH_WORKERS, help='thread per gli hash')
+    opts = parser.parse_args()
+
+    fmt = opts.format or ('jsonl' if opts.file.endswith(('.jsonl', '.ndjson')) else 'csv')
+    importer = StudentImporter(opts.batch_size, opts.workers)
+    if opts.file == '-':
+        result = importer.run(sys.stdin, fmt)
+    else:
+        with open(opts.file, newline='', encoding='utf-8-sig') as f:
+            result = importer.run(f, fmt)
+
+    for error in result['errors']:
+        print(f"riga {error['line']}: {error['email'] or '-'}: {error['error']}", file=sys.stderr)
+    if not result['success']:
+        print(result['error'], file=sys.stderr)
+    print(f"Importati {result['imported']} studenti in {result['batches']} blocchi, {result['failed']} righe scartate")
+    return 0 if result['success'] and not result['failed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
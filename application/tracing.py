@@ -0,0 +1,159 @@
+"""Tracing in-process delle richieste, con export degli span su file.
+
+Una richiesta su TRACE_SAMPLE_RATE viene tracciata: lo span radice copre
+l'intera richiesta, gli span figli le fasi interne (sessione, query,
+template, multipart, file, PDF). A fine richiesta gli span vengono scritti
+in modo asincrono come JSON lines nel formato "Trace Event" di Chrome
+(un evento "X" per span, tempi in microsecondi). Per aprirli in Perfetto o
+chrome://tracing basta racchiuderli in un array:
+
+    jq -s '{traceEvents: .}' data/traces.jsonl > trace.json
+"""
+import itertools
+import json
+import os
+import random
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+import request_context
+from access_log import AccessLogger
+from db_instrument import QUERY_OBSERVERS, query_label
+from sql_profiler import normalize
+
+# frazione delle richieste tracciate (0 = tracing disattivato, 1 = tutte)
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0'))
+# '-' = stdout, un percorso = file, 'off' = disattivato
+TRACE_FILE = os.getenv('TRACE_FILE', str(Path(__file__).parent / 'data' / 'traces.jsonl'))
+TRACE_QUEUE_SIZE = int(os.getenv('TRACE_QUEUE_SIZE', '1000'))
+# oltre questo numero di span per richiesta i successivi vengono solo contati
+TRACE_MAX_SPANS = int(os.getenv('TRACE_MAX_SPANS', '500'))
+
+_PID = os.getpid()
+_ids = itertools.count(1)
+_NULL_SPAN = nullcontext()
+
+
+class Trace:
+    """span di una richiesta; i tempi sono perf_counter, convertiti in epoch all'export"""
+
+    def __init__(self):
+        self.trace_id = '%016x' % random.getrandbits(64)
+        self.number = next(_ids)
+        self.wall = time.time()
+        self.origin = time.perf_counter()
+        self.spans = []         # (id, parent, nome, inizio, fine, tag)
+        self.stack = [0]        # 0 = span radice
+        self.next_id = 1
+        self.dropped = 0
+
+    def add(self, name, start, end, tags):
+        if len(self.spans) >= TRACE_MAX_SPANS:
+            self.dropped += 1
+            return None
+        span_id = self.next_id
+        self.next_id += 1
+        self.spans.append((span_id, self.stack[-1], name, start, end, tags))
+        return span_id
+
+
+class _Span:
+    __slots__ = ('trace', 'name', 'tags', 'start', 'span_id')
+
+    def __init__(self, trace, name, tags):
+        self.trace = trace
+        self.name = name
+        self.tags = tags
+
+    def __enter__(self):
+        # l'id viene riservato subito: gli span interni lo usano come padre
+        trace = self.trace
+        self.span_id = trace.next_id
+        trace.next_id += 1
+        trace.stack.append(self.span_id)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        trace = self.trace
+        trace.stack.pop()
+        if exc_type is not None:
+            self.tags['error'] = exc_type.__name__
+        if len(trace.spans) >= TRACE_MAX_SPANS:
+            trace.dropped += 1
+        else:
+            trace.spans.append((self.span_id, trace.stack[-1], self.name, self.start, end, self.tags))
+        return False
+
+
+def start():
+    """decide il campionamento della richiesta corrente; restituisce il Trace o None"""
+    if TRACE_SAMPLE_RATE <= 0 or random.random() >= TRACE_SAMPLE_RATE:
+        return None
+    context = request_context.current()
+    if context is None:
+        return None
+    context.trace = Trace()
+    return context.trace
+
+
+def span(name, **tags):
+    """context manager per uno span figlio; non fa nulla se la richiesta non e' tracciata"""
+    context = request_context.current()
+    trace = context.trace if context is not None else None
+    if trace is None:
+        return _NULL_SPAN
+    return _Span(trace, name, tags)
+
+
+def finish(trace, name, end, tags):
+    """chiude lo span radice e accoda tutti gli span della richiesta per l'export"""
+    tags['trace_id'] = trace.trace_id
+    if trace.dropped:
+        tags['dropped_spans'] = trace.dropped
+    trace.spans.append((0, None, name, trace.origin, end, tags))
+    TRACE_EXPORTER.log(trace)
+
+
+def _observe_query(statement):
+    context = request_context.current()
+    trace = context.trace if context is not None else None
+    if trace is not None:
+        end = time.perf_counter()
+        operation, table = query_label(statement.sql)
+        # lo Statement resta referenziato: le righe lette dopo la notifica arrivano all'export
+        trace.add(f'db {operation} {table}'.strip(), end - statement.elapsed, end, statement)
+
+
+def _events(trace):
+    root_tags = trace.spans[-1][5]
+    shared = {'route': root_tags.get('route'), 'role': root_tags.get('role')}
+    for span_id, parent, name, start, end, tags in trace.spans:
+        args = {'trace_id': trace.trace_id, 'span_id': span_id, **shared}
+        if parent is not None:
+            args['parent_id'] = parent
+        if isinstance(tags, dict):
+            args.update(tags)
+            category = 'http' if parent is None else 'app'
+        else:
+            args.update(sql=normalize(tags.sql), rows=tags.rows, failed=tags.failed)
+            category = 'db'
+        yield {
+            'name': name, 'cat': category, 'ph': 'X',
+            'ts': round((trace.wall + start - trace.origin) * 1e6),
+            'dur': round((end - start) * 1e6, 1),
+            'pid': _PID, 'tid': trace.number, 'args': args,
+        }
+
+
+def _format(trace):
+    return '\n'.join(json.dumps(event, ensure_ascii=False, separators=(',', ':'), default=str)
+                     for event in _events(trace))
+
+
+TRACE_EXPORTER = AccessLogger(TRACE_FILE if TRACE_SAMPLE_RATE > 0 else 'off', TRACE_QUEUE_SIZE, 'drop',
+                              formatter=_format, name='trace-export')
+if TRACE_SAMPLE_RATE > 0:
+    QUERY_OBSERVERS.append(_observe_query)
@@ -0,0 +1,72 @@
+"""Confronto di throughput tra i motori PDF del CV ('reportlab' e 'fast').
+
+Uso (dalla root del repository):
+    python benchmarks/bench_pdf_engines.py [--iterations 200] [--experiences 8]
+
+I dati del CV sono generati in memoria: non serve il database.
+"""
+import argparse
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'application'))
+
+from pdf_generator import build_cv_pdf  # noqa: E402
+from pdf_fast import render_cv_pdf  # noqa: E402
+
+
+def sample_cv(n_experiences):
+    """utente, cv_data ed esperienze di esempio"""
+    user = {'id': 1, 'nome': 'Mario', 'cognome': 'Rossi', 'email': 'mario.rossi@test.it'}
+    cv = {
+        'telefono': '+39 123 456 7890',
+        'linkedin_url': 'https://www.linkedin.com/in/mariorossi',
+        'citta': 'Milano',
+        'skills': 'Python, SQL, JavaScript, Project Management, Docker, Linux',
+        'languages': 'Italiano (madrelingua), Inglese (fluente), Francese (intermedio)',
+        'patente': 'B, automunito',
+        'hobby': 'Escursionismo, fotografia e volontariato. ' * 4,
+    }
+    experiences = []
+    for i in range(n_experiences):
+        experiences.append({
+            'tipo': 'lavoro' if i % 2 else 'formazione',
+            'titolo': f'Posizione numero {i}',
+            'azienda_istituto': f'Azienda o Istituto {i} S.r.l.',
+            'data_inizio': date(2015 + i % 8, 1 + i % 12, 1),
+            'data_fine': None if i == 0 else date(2016 + i % 8, 1 + i % 12, 1),
+            'is_current': 1 if i == 0 else 0,
+            'descrizione': 'Sviluppo e manutenzione di servizi web, analisi dei requisiti con il cliente. ' * 2,
+        })
+    return user, cv, experiences
+
+
+def bench(render, args, iterations):
+    render(*args)  # warm-up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        size = len(render(*args))
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--experiences', type=int, default=8)
+    opts = parser.parse_args()
+
+    data = sample_cv(opts.experiences)
+    results = {}
+    for name, render in (('reportlab', build_cv_pdf), ('fast', render_cv_pdf)):
+        rate, size = bench(render, data, opts.iterations)
+        results[name] = rate
+        print(f"{name:<10} {rate:10.1f} PDF/s   ({size} byte)")
+
+    print(f"speedup    {results['fast'] / results['reportlab']:10.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+"""Generatore di dati sintetici per i test di scala.
+
+Carica nello schema esistente N studenti con cv_data (competenze, lingue,
+hobby), un numero variabile di esperienze per utente e, opzionalmente, CV
+caricati con piccoli PDF segnaposto su disco. Gli inserimenti sono multi-riga
+(--method multirow) oppure tramite LOAD DATA LOCAL INFILE (--method load-data).
+
+Uso (dalla root del repository, con DB_HOST/DB_USER/DB_PASSWORD/DB_NAME):
+    python benchmarks/generate_data.py --students 100000 --experiences poisson:10
+    python benchmarks/generate_data.py --students 5000 --cv-share 0.3 --method load-data
+    DB_BACKEND=sqlite python benchmarks/generate_data.py --students 10000
+
+Con DB_BACKEND=sqlite sono disponibili solo --method multirow e i controlli standard.
+
+Gli studenti hanno email studente{n}@bench.local e password Bench123!
+(le stesse usate da load_test.py --seeded N).
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / 'application'
+sys.path.insert(0, str(APP_DIR))
+
+import database  # noqa: E402
+
+SEEDED_EMAIL = 'studente{n}@bench.local'
+SEEDED_PASSWORD = 'Bench123!'
+
+NOMI = ['Marco', 'Giulia', 'Luca', 'Francesca', 'Alessandro', 'Chiara', 'Matteo', 'Sara', 'Davide',
+        'Martina', 'Andrea', 'Elena', 'Simone', 'Valentina', 'Federico', 'Alessia', 'Lorenzo', 'Giorgia']
+COGNOMI = ['Rossi', 'Russo', 'Ferrari', 'Esposito', 'Bianchi', 'Romano', 'Colombo', 'Ricci', 'Marino',
+           'Greco', 'Bruno', 'Gallo', 'Conti', 'De Luca', 'Mancini', 'Costa', 'Giordano', 'Rizzo']
+CITTA = ['Milano', 'Roma', 'Torino', 'Napoli', 'Bologna', 'Firenze', 'Genova', 'Bari', 'Padova', 'Verona']
+SKILLS = ['Python', 'Java', 'SQL', 'JavaScript', 'Excel', 'Docker', 'Linux', 'Project Management',
+          'Marketing Digitale', 'Photoshop', 'C++', 'Contabilità', 'Public Speaking', 'Git']
+LINGUE = ['Italiano (madrelingua)', 'Inglese (fluente)', 'Inglese (intermedio)', 'Francese (base)',
+          'Spagnolo (intermedio)', 'Tedesco (base)']
+HOBBY = ['Appassionato di escursionismo e fotografia.', 'Volontariato in associazioni locali.',
+         'Suono la chitarra in una band.', 'Pratico nuoto a livello agonistico.',
+         'Lettura, cinema e viaggi.']
+TITOLI_LAVORO = ['Sviluppatore Junior', 'Stagista Marketing', 'Cameriere', 'Analista Dati',
+                 'Addetto Vendite', 'Tecnico Informatico', 'Receptionist']
+TITOLI_FORMAZIONE = ['Diploma di Maturità', 'Laurea Triennale in Informatica', 'Laurea in Economia',
+                     'Master in Data Science', 'Corso di Inglese B2']
+AZIENDE = ['Acme S.r.l.', 'Tech Solutions S.p.A.', 'Bar Centrale', 'Università di Milano',
+           'Politecnico di Torino', 'Liceo Scientifico Galilei', 'Studio Verdi']
+
+PLACEHOLDER_PDF = (
+    b'%PDF-1.4\n1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n'
+    b'2 0 obj\n<< /Type /Pages /Kids [] /Count 0 >>\nendobj\ntrailer\n<< /Root 1 0 R >>\n%%EOF\n'
+)
+
+USER_COLUMNS = ('id', 'email', 'password_hash', 'salt', 'nome', 'cognome', 'role')
+CV_COLUMNS = ('user_id', 'telefono', 'indirizzo', 'data_nascita', 'citta', 'linkedin_url',
+              'patente', 'hobby', 'skills', 'languages')
+EXPERIENCE_COLUMNS = ('user_id', 'tipo', 'titolo', 'azienda_istituto', 'data_inizio', 'data_fine',
+                      'descrizione', 'is_current')
+USER_CV_COLUMNS = ('user_id', 'cv_file_path')
+
+
+def parse_distribution(spec):
+    """'fixed:5', 'uniform:0:10' oppure 'poisson:4' -> funzione che estrae un numero"""
+    kind, _, args = spec.partition(':')
+    values = [float(v) for v in args.split(':') if v]
+    if kind == 'fixed':
+        return lambda rnd: int(values[0])
+    if kind == 'uniform':
+        return lambda rnd: rnd.randint(int(values[0]), int(values[1]))
+    if kind == 'poisson':
+        limit = math.exp(-values[0])
+
+        def poisson(rnd):
+            k, p = 0, rnd.random()
+            while p > limit:
+                k += 1
+                p *= rnd.random()
+            return k
+        return poisson
+    raise ValueError(f'distribuzione non valida: {spec}')
+
+
+def random_date(rnd, start_year, end_year):
+    start = date(start_year, 1, 1)
+    return start + timedelta(days=rnd.randint(0, (date(end_year, 12, 31) - start).days))
+
+
+class Writer:
+    """inserisce le righe a blocchi: INSERT multi-riga oppure LOAD DATA LOCAL INFILE
+
+    Le tabelle sono sempre scritte nell'ordine indicato, per rispettare le chiavi esterne.
+    """
+
+    def __init__(self, conn, method, batch_size, tables):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.method = method
+        self.batch_size = batch_size
+        self.tables = tables
+        self.rows = {table: [] for table in tables}
+        self.columns = {}
+        self.files = {}
+        self.counts = {table: 0 for table in tables}
+
+    def add(self, table, columns, row):
+        self.counts[table] += 1
+        self.columns[table] = columns
+        if self.method == 'load-data':
+            if table not in self.files:
+                self.files[table] = tempfile.NamedTemporaryFile('w', suffix='.tsv', delete=False,
+                                                                encoding='utf-8', newline='')
+            self.files[table].write('\t'.join(_tsv(v) for v in row) + '\n')
+            return
+        self.rows[table].append(row)
+        if len(self.rows[table]) >= self.batch_size:
+            self._insert_pending()
+
+    def _insert_pending(self):
+        for table in self.tables:
+            rows = self.rows[table]
+            if not rows:
+                continue
+            columns = self.columns[table]
+            placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+            sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES " + ', '.join([placeholders] * len(rows))
+            self.cursor.execute(sql, [value for row in rows for value in row])
+            rows.clear()
+
+    def _load_files(self):
+        for table in self.tables:
+            handle = self.files.pop(table, None)
+            if handle is None:
+                continue
+            handle.close()
+            self.cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} CHARACTER SET utf8mb4 "
+                f"FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' ({', '.join(self.columns[table])})",
+                (handle.name,)
+            )
+            os.unlink(handle.name)
+
+    def flush(self):
+        """scrive tutto cio' che e' in sospeso e chiude la transazione"""
+        if self.method == 'load-data':
+            self._load_files()
+        else:
+            self._insert_pending()
+        self.conn.commit()
+
+
+def _tsv(value):
+    if value is None:
+        return '\\N'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+
+def connect(method):
+    if method == 'load-data':
+        import mysql.connector
+        return mysql.connector.connect(
+            host=database.MYSQL_HOST, user=database.MYSQL_USER, password=database.MYSQL_PASSWORD,
+            database=database.MYSQL_DB, port=database.MYSQL_PORT, autocommit=False,
+            allow_local_infile=True,
+        )
+    return database.get_db_connection()
+
+
+def generate(opts):
+    rnd = random.Random(opts.seed)
+    experiences_per_user = parse_distribution(opts.experiences)
+    upload_dir = APP_DIR / 'uploads' / 'cv'
+    upload_dir.mkdir(parents=True, exist_ok=True)
+
+    # un solo hash per tutti: calcolarne milioni con il KDF richiederebbe ore
+    salt = database.salt_generation()
+    password_hash = database.hash_password(SEEDED_PASSWORD, salt)
+
+    conn = connect(opts.method)
+    cursor = conn.cursor()
+    cursor.execute('SELECT COALESCE(MAX(id), 0) FROM users')
+    next_id = cursor.fetchone()[0] + 1
+    cursor.execute("SELECT COUNT(*) FROM users WHERE email LIKE 'studente%@bench.local'")
+    first_n = cursor.fetchone()[0] + 1
+    cursor.close()
+    if opts.fast_checks:
+        conn.cursor().execute('SET unique_checks = 0, foreign_key_checks = 0')
+
+    writer = Writer(conn, opts.method, opts.batch_size, ('users', 'cv_data', 'experiences', 'user_cvs'))
+    started = time.perf_counter()
+    total_experiences = 0
+
+    for i in range(opts.students):
+        user_id = next_id + i
+        n = first_n + i
+        nome, cognome = rnd.choice(NOMI), rnd.choice(COGNOMI)
+        writer.add('users', USER_COLUMNS, (
+            user_id, SEEDED_EMAIL.format(n=n), password_hash, salt, nome, cognome, 'student'
+        ))
+        writer.add('cv_data', CV_COLUMNS, (
+            user_id,
+            f'+39 3{rnd.randint(10, 99)} {rnd.randint(100000, 999999)}',
+            f'Via {rnd.choice(COGNOMI)} {rnd.randint(1, 200)}',
+            random_date(rnd, 1985, 2006).isoformat(),
+            rnd.choice(CITTA),
+            f'https://www.linkedin.com/in/{nome.lower()}-{cognome.lower().replace(" ", "")}-{n}',
+            rnd.choice(['B', 'A, B', '', 'B, automunito']),
+            ' '.join(rnd.sample(HOBBY, rnd.randint(1, 3))),
+            ', '.join(rnd.sample(SKILLS, rnd.randint(2, 7))),
+            ', '.join(rnd.sample(LINGUE, rnd.randint(1, 3))),
+        ))
+
+        for _ in range(experiences_per_user(rnd)):
+            tipo = rnd.choice(['lavoro', 'formazione'])
+            inizio = random_date(rnd, 2005, 2024)
+            is_current = rnd.random() < 0.15
+            fine = None if is_current else inizio + timedelta(days=rnd.randint(30, 1500))
+            writer.add('experiences', EXPERIENCE_COLUMNS, (
+                user_id, tipo,
+                rnd.choice(TITOLI_LAVORO if tipo == 'lavoro' else TITOLI_FORMAZIONE),
+                rnd.choice(AZIENDE), inizio.isoformat(), fine.isoformat() if fine else None,
+                'Attività svolte: ' + ', '.join(rnd.sample(SKILLS, 3)) + '.', int(is_current),
+            ))
+            total_experiences += 1
+
+        if rnd.random() < opts.cv_share:
+            filename = f'bench_{user_id}.pdf'
+            (upload_dir / filename).write_bytes(PLACEHOLDER_PDF)
+            writer.add('user_cvs', USER_CV_COLUMNS, (user_id, f'uploads/cv/{filename}'))
+
+        if (i + 1) % opts.commit_every == 0:
+            writer.flush()
+            elapsed = time.perf_counter() - started
+            print(f'  {i + 1}/{opts.students} studenti, {total_experiences} esperienze ({elapsed:.1f}s)')
+
+    writer.flush()
+    if opts.fast_checks:
+        conn.cursor().execute('SET unique_checks = 1, foreign_key_checks = 1')
+    conn.close()
+
+    elapsed = time.perf_counter() - started
+    print(f'✓ Caricati {writer.counts} in {elapsed:.1f}s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--experiences', default='poisson:4',
+                        help="esperienze per studente: fixed:N, uniform:MIN:MAX, poisson:MEDIA")
+    parser.add_argument('--cv-share', type=float, default=0.3, help='quota di studenti con un CV caricato')
+    parser.add_argument('--method', choices=['multirow', 'load-data'], default='multirow')
+    parser.add_argument('--batch-size', type=int, default=1000, help='righe per INSERT multi-riga')
+    parser.add_argument('--commit-every', type=int, default=10000, help='studenti per transazione')
+    parser.add_argument('--fast-checks', action='store_true',
+                        help='disattiva unique_checks e foreign_key_checks durante il caricamento')
+    parser.add_argument('--seed', type=int, default=42)
+    opts = parser.parse_args()
+    if database.DB_BACKEND == 'sqlite' and (opts.method == 'load-data' or opts.fast_checks):
+        parser.error('--method load-data e --fast-checks richiedono il backend MySQL')
+
+    generate(opts)
+
+
+if __name__ == '__main__':
+    main()
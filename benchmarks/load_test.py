@@ -0,0 +1,452 @@
+"""Benchmark HTTP end-to-end del server con mix realistici di richieste.
+
+Avvia server.py (oppure usa un server gia' attivo con --url), effettua il login
+di studenti e admin, e genera traffico concorrente sulle route principali.
+Il report (JSON) contiene throughput e latenze p50/p95/p99 per route.
+
+Uso (dalla root del repository, con un database locale configurato tramite
+DB_HOST/DB_USER/DB_PASSWORD/DB_NAME):
+    python benchmarks/load_test.py --concurrency 16 --duration 60 --mix mixed --output risultati.json
+    python benchmarks/load_test.py --url http://localhost:8080 --register 50
+    python benchmarks/load_test.py --db-faults '[{"match": "^SELECT", "latency_ms": "lognormal:5:1"}]'
+
+Gli account usati sono quelli di create_default_users, quelli indicati con
+--account email:password, quelli del generatore di dati (--seeded N) e quelli
+registrati all'avvio con --register N.
+
+Ogni utente virtuale fa un login, tutti dallo stesso IP e spesso con la stessa
+email. Il server avviato dal benchmark riceve quindi limiti alti per i login
+(LOGIN_IP_BURST, LOGIN_EMAIL_BURST) e nessun limite di connessioni per IP
+(MAX_CONNECTIONS_PER_IP=0), sovrascrivibili con --server-env. Con --url valgono
+i limiti del server: un login rifiutato con 429 viene ripetuto dopo Retry-After,
+ma oltre --concurrency 50 conviene impostare MAX_CONNECTIONS_PER_IP=0.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / 'application'
+
+DEFAULT_STUDENTS = [('student@test.it', 'Student123!')]
+DEFAULT_ADMINS = [('admin@cvmanagement.it', 'Admin123!')]
+# account creati da benchmarks/generate_data.py
+SEEDED_EMAIL = 'studente{n}@bench.local'
+SEEDED_PASSWORD = 'Bench123!'
+
+# pesi delle operazioni per ruolo
+STUDENT_WEIGHTS = {
+    'home': 5, 'user_dashboard': 40, 'static_css': 5, 'update_profile': 10,
+    'add_experience': 12, 'delete_experience': 8, 'cv_content': 5,
+    'upload_cv': 5, 'generate_cv': 10,
+}
+ADMIN_WEIGHTS = {'admin_dashboard': 40, 'admin_view_student': 60}
+
+MIXES = {
+    'student': {'student': STUDENT_WEIGHTS},
+    'admin': {'admin': ADMIN_WEIGHTS},
+    'mixed': {'student': STUDENT_WEIGHTS, 'admin': ADMIN_WEIGHTS},
+    'read': {
+        'student': {'home': 10, 'user_dashboard': 80, 'static_css': 10},
+        'admin': ADMIN_WEIGHTS,
+    },
+    'pdf': {'student': {'generate_cv': 80, 'user_dashboard': 20}},
+}
+
+# ambiente di default del server avviato dal benchmark (--server-env ha la precedenza)
+SERVER_ENV_DEFAULTS = {
+    'LOGIN_IP_BURST': '100000',
+    'LOGIN_EMAIL_BURST': '100000',
+    'MAX_CONNECTIONS_PER_IP': '0',
+}
+# tentativi di login rifiutati con 429 prima di rinunciare
+LOGIN_RETRIES = 10
+
+PLACEHOLDER_PDF = (
+    b'%PDF-1.4\n1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n'
+    b'2 0 obj\n<< /Type /Pages /Kids [] /Count 0 >>\nendobj\ntrailer\n<< /Root 1 0 R >>\n%%EOF\n'
+)
+
+
+class Client:
+    """client HTTP minimale con cookie di sessione (il server chiude ogni connessione)"""
+
+    def __init__(self, base_url, timeout):
+        parsed = urllib.parse.urlparse(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.timeout = timeout
+        self.cookie = None
+        self.retry_after = None
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            data = response.read()
+            self.retry_after = response.getheader('Retry-After')
+            set_cookie = response.getheader('Set-Cookie')
+            if set_cookie and set_cookie.startswith('session_id='):
+                self.cookie = set_cookie.split(';', 1)[0]
+            return response.status, data
+        finally:
+            conn.close()
+
+    def form(self, path, fields):
+        body = urllib.parse.urlencode(fields)
+        return self.request('POST', path, body, {'Content-Type': 'application/x-www-form-urlencoded'})
+
+    def json(self, path, payload):
+        return self.request('POST', path, json.dumps(payload), {'Content-Type': 'application/json'})
+
+    def multipart(self, path, fields, files):
+        boundary = uuid.uuid4().hex
+        parts = []
+        for name, value in fields.items():
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+            )
+        for name, (filename, content) in files.items():
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                f'Content-Type: application/pdf\r\n\r\n'.encode() + content + b'\r\n'
+            )
+        parts.append(f'--{boundary}--\r\n'.encode())
+        return self.request('POST', path, b''.join(parts),
+                            {'Content-Type': f'multipart/form-data; boundary={boundary}'})
+
+
+class VirtualUser:
+    """un utente loggato che esegue le operazioni del mix"""
+
+    def __init__(self, client, role, email, weights, opts):
+        self.client = client
+        self.role = role
+        self.email = email
+        self.opts = opts
+        self.names = list(weights)
+        self.weights = [weights[n] for n in self.names]
+        self.experience_ids = []
+        self.student_ids = []
+        self.user_id = None
+
+    def next_operation(self):
+        return random.choices(self.names, self.weights)[0]
+
+    # === operazioni studente ===
+    def op_home(self):
+        return self.client.request('GET', '/')
+
+    def op_static_css(self):
+        return self.client.request('GET', '/css/style.css')
+
+    def op_user_dashboard(self):
+        status, body = self.client.request('GET', '/user-dashboard')
+        ids = re.findall(rb'deleteExperience\((\d+)\)', body)
+        if ids:
+            self.experience_ids = [int(i) for i in ids]
+        match = re.search(rb'name="user_id" value="(\d+)"', body)
+        if match:
+            self.user_id = match.group(1).decode()
+        return status, body
+
+    def op_update_profile(self):
+        return self.client.form('/api/update-profile', {
+            'nome': 'Bench', 'cognome': 'Utente', 'email': self.email,
+            'data_nascita': '2000-01-01', 'telefono': '+39 000 000 0000',
+            'citta': 'Milano', 'indirizzo': 'Via Roma 1', 'linkedin_url': '',
+        })
+
+    def op_add_experience(self):
+        return self.client.form('/api/add-experience', {
+            'tipo': random.choice(['lavoro', 'formazione']),
+            'titolo': 'Esperienza di benchmark', 'azienda': 'Azienda Bench',
+            'data_inizio': '2020-01-01', 'data_fine': '2021-01-01',
+            'descrizione': 'Inserita dal benchmark di carico',
+        })
+
+    def op_delete_experience(self):
+        if not self.experience_ids:
+            return self.op_add_experience()
+        exp_id = self.experience_ids.pop()
+        return self.client.form('/api/delete-experience', {'id': exp_id})
+
+    def op_cv_content(self):
+        return self.client.form('/api/cv-content', {
+            'summary': 'Profilo di benchmark', 'patente': 'B',
+            'skills': 'Python, SQL, Docker', 'languages': 'Italiano, Inglese',
+        })
+
+    def op_upload_cv(self):
+        return self.client.multipart(
+            '/api/upload-cv',
+            {'user_id': self.user_id or '0'},
+            {'cv_file': ('bench.pdf', PLACEHOLDER_PDF)},
+        )
+
+    def op_generate_cv(self):
+        path = '/api/generate-cv'
+        if self.opts.pdf_engine:
+            path += f'?engine={self.opts.pdf_engine}'
+        return self.client.request('POST', path, b'', {'Content-Length': '0'})
+
+    # === operazioni admin ===
+    def op_admin_dashboard(self):
+        status, body = self.client.request('GET', '/admin-dashboard')
+        ids = re.findall(rb'admin-view-student\?id=(\d+)', body)
+        if ids:
+            self.student_ids = [int(i) for i in ids]
+        return status, body
+
+    def op_admin_view_student(self):
+        if not self.student_ids:
+            return self.op_admin_dashboard()
+        return self.client.request('GET', f'/admin-view-student?id={random.choice(self.student_ids)}')
+
+
+class Stats:
+    """latenze raccolte per route (thread-safe)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+
+    def record(self, route, latency, ok):
+        with self.lock:
+            self.samples.setdefault(route, []).append(latency)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+    def report(self, elapsed):
+        routes = {}
+        everything = []
+        for route, samples in sorted(self.samples.items()):
+            everything.extend(samples)
+            routes[route] = _summary(samples, self.errors.get(route, 0), elapsed)
+        return {
+            'elapsed_s': round(elapsed, 3),
+            'total': _summary(everything, sum(self.errors.values()), elapsed),
+            'routes': routes,
+        }
+
+
+def _percentile(sorted_samples, pct):
+    index = max(0, min(len(sorted_samples) - 1, int(round(pct / 100.0 * len(sorted_samples) + 0.5)) - 1))
+    return sorted_samples[index]
+
+
+def _summary(samples, errors, elapsed):
+    if not samples:
+        return {'count': 0, 'errors': errors}
+    ordered = sorted(samples)
+    return {
+        'count': len(ordered),
+        'errors': errors,
+        'throughput_rps': round(len(ordered) / elapsed, 2),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 2),
+        'p50_ms': round(_percentile(ordered, 50) * 1000, 2),
+        'p95_ms': round(_percentile(ordered, 95) * 1000, 2),
+        'p99_ms': round(_percentile(ordered, 99) * 1000, 2),
+        'max_ms': round(ordered[-1] * 1000, 2),
+    }
+
+
+def login(base_url, email, password, timeout):
+    client = Client(base_url, timeout)
+    for _ in range(LOGIN_RETRIES):
+        status, body = client.json('/api/login', {'email': email, 'password': password})
+        if status != 429:
+            break
+        # rate limit dei login (server avviato con --url): si riprova dopo Retry-After
+        time.sleep(float(client.retry_after or 1))
+    if status != 200 or not client.cookie:
+        raise RuntimeError(f'login fallito per {email}: {status} {body[:200]!r}')
+    return client
+
+
+def register_students(base_url, count, timeout):
+    """registra nuovi studenti tramite /api/register e restituisce le credenziali"""
+    accounts = []
+    run_id = uuid.uuid4().hex[:8]
+    for i in range(count):
+        email = f'bench_{run_id}_{i}@bench.local'
+        client = Client(base_url, timeout)
+        status, body = client.json('/api/register', {
+            'nome': 'Bench', 'cognome': f'Utente{i}', 'email': email,
+            'password': SEEDED_PASSWORD, 'password_confirm': SEEDED_PASSWORD,
+        })
+        if status != 200:
+            raise RuntimeError(f'registrazione fallita per {email}: {status} {body[:200]!r}')
+        accounts.append((email, SEEDED_PASSWORD))
+    return accounts
+
+
+def fault_stats(base_url, timeout):
+    """quanto e' stato iniettato da ogni regola DB_FAULTS (contatori db_faults_* di /metrics)"""
+    email, password = DEFAULT_ADMINS[0]
+    try:
+        status, body = login(base_url, email, password, timeout).request('GET', '/metrics')
+    except (RuntimeError, OSError):
+        # anche il login puo' subire i guasti iniettati
+        return None
+    if status != 200:
+        return None
+    stats = {}
+    pattern = re.compile(r'db_faults_(matched|delay_seconds|injected)_total\{rule="(.*?)"(?:,kind="(\w+)")?\} (\S+)')
+    for line in body.decode('utf-8').splitlines():
+        match = pattern.match(line)
+        if match:
+            family, rule, kind, value = match.groups()
+            stats.setdefault(rule, {})[kind or family] = float(value)
+    return stats
+
+
+def start_server(port, env_overrides):
+    env = dict(os.environ, HOST='127.0.0.1', PORT=str(port), **env_overrides)
+    process = subprocess.Popen(
+        [sys.executable, 'server.py'], cwd=APP_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('il server si e\' chiuso durante l\'avvio')
+        try:
+            status, _ = Client(base_url, 2).request('GET', '/')
+            if status == 200:
+                return process, base_url
+        except OSError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('il server non risponde entro 30 secondi')
+
+
+def run(opts):
+    process = None
+    if opts.url:
+        base_url = opts.url.rstrip('/')
+    else:
+        overrides = dict(SERVER_ENV_DEFAULTS)
+        overrides.update(item.split('=', 1) for item in opts.server_env)
+        if opts.db_faults:
+            overrides['DB_FAULTS'] = opts.db_faults
+        process, base_url = start_server(opts.port, overrides)
+
+    try:
+        students = list(DEFAULT_STUDENTS)
+        admins = list(DEFAULT_ADMINS)
+        for account in opts.account:
+            email, password = account.split(':', 1)
+            students.append((email, password))
+        students += [(SEEDED_EMAIL.format(n=n), SEEDED_PASSWORD) for n in range(1, opts.seeded + 1)]
+        if opts.register:
+            students += register_students(base_url, opts.register, opts.timeout)
+
+        mix = MIXES[opts.mix]
+        roles = [role for role in ('student', 'admin') if role in mix]
+        stats = Stats()
+        stop_at = None
+        users = []
+        for i in range(opts.concurrency):
+            if len(roles) == 2:
+                role = 'admin' if i < round(opts.concurrency * opts.admin_share) else 'student'
+            else:
+                role = roles[0]
+            pool = admins if role == 'admin' else students
+            email, password = pool[i % len(pool)]
+            client = login(base_url, email, password, opts.timeout)
+            users.append(VirtualUser(client, role, email, mix[role], opts))
+
+        counter = {'remaining': opts.requests}
+        counter_lock = threading.Lock()
+
+        def worker(user):
+            while True:
+                if stop_at is not None and time.monotonic() >= stop_at:
+                    return
+                if opts.requests:
+                    with counter_lock:
+                        if counter['remaining'] <= 0:
+                            return
+                        counter['remaining'] -= 1
+                operation = user.next_operation()
+                start = time.perf_counter()
+                try:
+                    status, _ = getattr(user, 'op_' + operation)()
+                    ok = status < 400
+                except OSError:
+                    ok = False
+                stats.record(operation, time.perf_counter() - start, ok)
+
+        if not opts.requests:
+            stop_at = time.monotonic() + opts.duration
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(user,), daemon=True) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        report = stats.report(elapsed)
+        report['config'] = {
+            'mix': opts.mix, 'concurrency': opts.concurrency, 'duration_s': opts.duration,
+            'requests': opts.requests, 'pdf_engine': opts.pdf_engine, 'base_url': base_url,
+            'server_env': opts.server_env, 'db_faults': opts.db_faults,
+        }
+        if opts.db_faults:
+            report['db_faults'] = fault_stats(base_url, opts.timeout)
+        return report
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='server gia\' avviato (altrimenti viene avviato server.py)')
+    parser.add_argument('--port', type=int, default=8099, help='porta del server avviato dal benchmark')
+    parser.add_argument('--server-env', action='append', default=[], metavar='NOME=VALORE',
+                        help='variabili d\'ambiente per il server avviato (es. PDF_ENGINE=fast)')
+    parser.add_argument('--db-faults', metavar='REGOLE',
+                        help='regole DB_FAULTS (JSON o file) per simulare un database lento o instabile')
+    parser.add_argument('--mix', choices=sorted(MIXES), default='mixed')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=30, help='secondi di test')
+    parser.add_argument('--requests', type=int, default=0, help='numero totale di richieste (al posto di --duration)')
+    parser.add_argument('--admin-share', type=float, default=0.25, help='quota di utenti admin nei mix misti')
+    parser.add_argument('--account', action='append', default=[], metavar='EMAIL:PASSWORD')
+    parser.add_argument('--seeded', type=int, default=0, help='usa i primi N studenti di generate_data.py')
+    parser.add_argument('--register', type=int, default=0, help='registra N nuovi studenti prima del test')
+    parser.add_argument('--pdf-engine', choices=['reportlab', 'fast'])
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--output', help='file JSON del report (default: stdout)')
+    opts = parser.parse_args()
+
+    report = run(opts)
+    text = json.dumps(report, indent=2)
+    if opts.output:
+        Path(opts.output).write_text(text + '\n', encoding='utf-8')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+"""Micro-benchmark dei percorsi CPU principali, con controllo delle regressioni.
+
+Misura rendering dei template, tabelle HTML, sanitize_input, parsing
+multipart, divisione del body dell'upload e generazione del PDF (con la
+lettura dal database sostituita da dati in memoria), su input small, medium
+e huge.
+
+Uso (dalla root del repository):
+    python benchmarks/microbench.py                 # stampa i risultati
+    python benchmarks/microbench.py --save          # aggiorna la baseline
+    python benchmarks/microbench.py --check         # esce con codice 1 se qualcosa e' peggiorato
+    python benchmarks/microbench.py --check --tolerance 0.3 --filter pdf
+
+La baseline (microbench_baseline.json) dipende dalla macchina: va rigenerata
+con --save sulla macchina usata per il controllo.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from datetime import date
+from email.message import Message
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / 'application'
+sys.path.insert(0, str(APP_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+BASELINE_FILE = Path(__file__).resolve().parent / 'microbench_baseline.json'
+SIZES = {'small': 1, 'medium': 20, 'huge': 500}
+
+
+def _load_app():
+    """importa i moduli dell'applicazione senza toccare il database"""
+    import database
+    database.create_tables = lambda: None   # server.py lo chiama all'import
+    import server
+    import handlers
+    import pdf_generator
+    return server, handlers, database, pdf_generator
+
+
+server, handlers, database, pdf_generator = _load_app()
+from bench_pdf_engines import sample_cv  # noqa: E402
+
+
+class BenchHandler(server.CVHandler):
+    """CVHandler senza socket: la risposta finisce in un buffer in memoria"""
+
+    def __init__(self, headers=None, body=b''):
+        self.wfile = io.BytesIO()
+        self.rfile = io.BytesIO(body)
+        self.request_version = 'HTTP/1.0'
+        self.requestline = 'GET / HTTP/1.0'
+        self.command = 'GET'
+        self.client_address = ('127.0.0.1', 0)
+        self.headers = Message()
+        for name, value in (headers or {}).items():
+            self.headers[name] = value
+
+    def log_message(self, format, *args):
+        pass
+
+
+# === Dati di input ===
+def students(n):
+    return [{
+        'id': i, 'nome': f'Nome{i}', 'cognome': f"Cognome'{i}", 'email': f'studente{i}@bench.local',
+        'data_nascita': date(2000, 1, 1 + i % 28), 'cv_file_path': 'uploads/cv/x.pdf' if i % 3 else None,
+    } for i in range(n * 10)]
+
+
+def experiences(n):
+    return [{
+        'id': i, 'tipo': 'lavoro' if i % 2 else 'formazione', 'titolo': f'Titolo <{i}>',
+        'azienda_istituto': 'Azienda S.r.l.', 'data_inizio': date(2015, 1, 1), 'data_fine': date(2016, 1, 1),
+        'is_current': 0, 'descrizione': 'Descrizione: attività svolte; risultati "ottenuti". ' * 3,
+    } for i in range(n * 4)]
+
+
+def multipart_body(n):
+    boundary = 'benchboundary1234'
+    content = b'%PDF-1.4\n' + os.urandom(n * 4096)
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="user_id"\r\n\r\n42\r\n'
+        f'--{boundary}\r\nContent-Disposition: form-data; name="cv_file"; filename="cv.pdf"\r\n'
+        f'Content-Type: application/pdf\r\n\r\n'
+    ).encode() + content + f'\r\n--{boundary}--\r\n'.encode()
+    return boundary, body
+
+
+def dashboard_context(n):
+    exps = experiences(n)
+    return {
+        'user_nome': 'Mario', 'user_cognome': 'Rossi', 'user_email': 'mario@test.it',
+        'telefono': '123', 'data_nascita': '2000-01-01', 'citta': 'Milano', 'indirizzo': 'Via Roma 1',
+        'linkedin_url': '', 'success_message': '', 'error_message': '', 'cv_section': '',
+        'cv_patente': 'B', 'cv_hobby': 'Lettura ' * n * 10, 'cv_skills': 'Python, SQL', 'cv_languages': 'Inglese',
+        'esperienze_lavorative': handlers._render_experiences(exps, 'lavoro'),
+        'esperienze_formative': handlers._render_experiences(exps, 'formazione'),
+        'user_id': 1, 'user_cv_list': '',
+    }
+
+
+# === Benchmark: ognuno restituisce la funzione da misurare ===
+def bench_render_template(n):
+    context = dashboard_context(n)
+
+    def run():
+        BenchHandler()._render_template('templates/user-dashboard.html', context)
+    return run
+
+
+def bench_render_students_table(n):
+    rows = students(n)
+    return lambda: handlers._render_students_table(rows)
+
+
+def bench_render_experiences(n):
+    exps = experiences(n)
+    return lambda: handlers._render_experiences(exps, 'lavoro')
+
+
+def bench_sanitize_input(n):
+    text = 'Testo <b>con</b> caratteri "speciali"; url: http://x.it/./a ' * n * 10
+    return lambda: database.sanitize_input(text)
+
+
+def bench_parse_multipart(n):
+    boundary, body = multipart_body(n)
+    headers = {'Content-Type': f'multipart/form-data; boundary={boundary}', 'Content-Length': str(len(body))}
+
+    def run():
+        BenchHandler(headers, body)._parse_multipart()
+    return run
+
+
+def bench_upload_body_split(n):
+    boundary, body = multipart_body(n)
+    handler = BenchHandler()
+    return lambda: handler._split_upload_body(body, boundary.encode())
+
+
+def _bench_pdf(engine):
+    def factory(n):
+        data = sample_cv(n * 2)
+        pdf_generator._fetch_user_full = lambda user_id: data
+        return lambda: pdf_generator.generate_cv_pdf(1, engine)
+    return factory
+
+
+BENCHMARKS = {
+    'render_template': bench_render_template,
+    'render_students_table': bench_render_students_table,
+    'render_experiences': bench_render_experiences,
+    'sanitize_input': bench_sanitize_input,
+    'parse_multipart': bench_parse_multipart,
+    'upload_body_split': bench_upload_body_split,
+    'generate_cv_pdf_reportlab': _bench_pdf('reportlab'),
+    'generate_cv_pdf_fast': _bench_pdf('fast'),
+}
+
+
+def measure(func, min_time, repeat):
+    """tempo minimo per chiamata (secondi) su repeat serie calibrate a min_time"""
+    func()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if time.perf_counter() - start >= min_time / repeat or loops >= 1 << 20:
+            break
+        loops *= 2
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best
+
+
+def run_all(name_filter, min_time, repeat):
+    results = {}
+    for name, factory in BENCHMARKS.items():
+        if name_filter and name_filter not in name:
+            continue
+        for size, n in SIZES.items():
+            key = f'{name}[{size}]'
+            results[key] = measure(factory(n), min_time, repeat)
+            print(f'{key:<42} {results[key] * 1e6:12.1f} µs')
+    return results
+
+
+def check(results, baseline, tolerance):
+    """confronta con la baseline: restituisce l'elenco delle regressioni"""
+    regressions = []
+    for key, value in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            print(f'  (nessuna baseline per {key})')
+            continue
+        ratio = value / reference
+        if ratio > 1 + tolerance:
+            regressions.append(key)
+            print(f'✗ {key}: {reference * 1e6:.1f} µs -> {value * 1e6:.1f} µs ({(ratio - 1) * 100:+.0f}%)')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--save', action='store_true', help='salva i risultati come nuova baseline')
+    parser.add_argument('--check', action='store_true', help='fallisce se un benchmark peggiora oltre la tolleranza')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='peggioramento ammesso (0.25 = 25%%)')
+    parser.add_argument('--filter', default='', help='esegue solo i benchmark che contengono questo testo')
+    parser.add_argument('--min-time', type=float, default=0.5, help='secondi di misura per benchmark')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=str(BASELINE_FILE))
+    opts = parser.parse_args()
+
+    results = run_all(opts.filter, opts.min_time, opts.repeat)
+    baseline_path = Path(opts.baseline)
+
+    if opts.save:
+        baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+        baseline.update(results)
+        baseline_path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+        print(f'✓ Baseline salvata in {baseline_path}')
+
+    if opts.check:
+        if not baseline_path.exists():
+            print(f'Baseline non trovata: {baseline_path} (creala con --save)')
+            sys.exit(2)
+        regressions = check(results, json.loads(baseline_path.read_text()), opts.tolerance)
+        if regressions:
+            print(f'{len(regressions)} benchmark oltre la tolleranza del {opts.tolerance * 100:.0f}%')
+            sys.exit(1)
+        print('✓ Nessuna regressione')
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,8 @@ CREATE TABLE IF NOT EXISTS users (
     nome VARCHAR(100) NOT NULL,
     cognome VARCHAR(100) NOT NULL,
     role ENUM('student', 'admin') DEFAULT 'student',
+    -- incrementata a ogni modifica dei dati dello studente (ETag delle API JSON)
+    data_version INT NOT NULL DEFAULT 0,
     INDEX idx_email (email),
     INDEX idx_role (role)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,24 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'application'))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+# i test usano sempre il backend SQLite, mai il MySQL configurato nell'ambiente
+os.environ['DB_BACKEND'] = 'sqlite'
+os.environ['DB_FAULTS'] = ''
+os.environ.setdefault('SQLITE_PATH', os.path.join(tempfile.mkdtemp(prefix='cv-tests-'), 'cv_management.db'))
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """database SQLite vuoto (con lo schema) in una cartella temporanea"""
+    import db_sqlite
+    monkeypatch.setattr(db_sqlite, 'SQLITE_PATH', str(tmp_path / 'cv_management.db'))
+    db_sqlite.create_tables()
+    return db_sqlite
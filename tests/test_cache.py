@@ -0,0 +1,34 @@
+"""Generazioni di TTLCache: un valore letto prima di una delete non entra in cache."""
+from cache import MISSING, TTLCache
+
+
+def test_set_skipped_after_delete():
+    cache = TTLCache(maxsize=10, ttl=60, negative_ttl=30)
+    generation = cache.generation('a@test.it')
+    # registrazione completata durante la query: invalidate_login_cache
+    cache.delete('a@test.it')
+    cache.set('a@test.it', None, generation)
+    assert cache.get('a@test.it') is MISSING
+
+    cache.set('a@test.it', {'id': 1}, cache.generation('a@test.it'))
+    assert cache.get('a@test.it') == {'id': 1}
+
+
+def test_evicted_generation_stays_invalid():
+    cache = TTLCache(maxsize=2, ttl=60)
+    generation = cache.generation('a')
+    cache.delete('a')
+    cache.delete('b', 'c', 'd')   # 'a' esce da generations
+    cache.set('a', None, generation)
+    assert cache.get('a') is MISSING
+
+    cache.set('a', 1, cache.generation('a'))
+    assert cache.get('a') == 1
+
+
+def test_clear_invalidates_pending_reads():
+    cache = TTLCache(maxsize=10, ttl=60)
+    generation = cache.generation('a')
+    cache.clear()
+    cache.set('a', None, generation)
+    assert cache.get('a') is MISSING
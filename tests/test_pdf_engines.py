@@ -0,0 +1,47 @@
+"""I motori PDF 'reportlab' e 'fast' devono produrre lo stesso testo."""
+import io
+import re
+
+import pytest
+
+pypdf = pytest.importorskip('pypdf')
+
+from bench_pdf_engines import sample_cv  # noqa: E402
+from database import sanitize_input  # noqa: E402
+from pdf_fast import render_cv_pdf  # noqa: E402
+from pdf_generator import build_cv_pdf  # noqa: E402
+
+
+def _text(pdf):
+    """testo estratto dal PDF, senza la riga con l'ora di generazione"""
+    reader = pypdf.PdfReader(io.BytesIO(pdf))
+    text = '\n'.join(page.extract_text() for page in reader.pages)
+    # il bullet di reportlab viene estratto come \x7f, quello di pdf_fast come •
+    text = text.replace('\x7f', '•')
+    return re.sub(r'Generato il [^\n]*', '', text).split()
+
+
+def _stored_cv():
+    """dati del CV come li salva il database (passati da sanitize_input)"""
+    user, cv, experiences = sample_cv(3)
+    cv['skills'] = 'C++; Python: avanzato'
+    cv['hobby'] = 'Lettura; arte "moderna" e ./script <b>'
+    experiences[0]['azienda_istituto'] = "L'Azienda"
+    experiences[0]['descrizione'] = 'Ruolo: backend; team di 5 persone'
+    cv = {key: sanitize_input(value) for key, value in cv.items()}
+    for exp in experiences:
+        for key in ('titolo', 'azienda_istituto', 'descrizione'):
+            exp[key] = sanitize_input(exp[key])
+    return user, cv, experiences
+
+
+def test_same_text_for_entity_encoded_input():
+    data = _stored_cv()
+    assert _text(render_cv_pdf(*data)) == _text(build_cv_pdf(*data))
+
+
+def test_fast_engine_decodes_entities():
+    text = ' '.join(_text(render_cv_pdf(*_stored_cv())))
+    assert 'Ruolo: backend;' in text
+    assert 'Python: avanzato' in text
+    assert '&#' not in text and '&quot' not in text and '&lt' not in text
@@ -0,0 +1,160 @@
+"""Bloom filter e commit di gruppo delle registrazioni (backend SQLite)."""
+import pytest
+
+import registration
+from database import OperationalError, get_db_connection
+from registration import DUPLICATE_EMAIL_ERROR, BloomFilter, RegistrationPipeline, _Registration
+
+
+def _row(email):
+    return (email, 'hash', 'salt', 'Nome', 'Cognome')
+
+
+def _pipeline():
+    """pipeline senza thread del batcher: i blocchi si committano a mano"""
+    pipeline = RegistrationPipeline()
+    pipeline.bloom = BloomFilter(1000, 0.01)
+    return pipeline
+
+
+def _emails():
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT u.email FROM users u JOIN cv_data c ON c.user_id = u.id ORDER BY u.email')
+    emails = [email for (email,) in cursor.fetchall()]
+    conn.close()
+    return emails
+
+
+def test_bloom_no_false_negatives():
+    bloom = BloomFilter(5000, 0.01)
+    emails = [f'studente{i}@test.it' for i in range(5000)]
+    for email in emails:
+        bloom.add(email)
+    assert all(email in bloom for email in emails)
+
+    # a capacita' piena i falsi positivi restano vicini a error_rate
+    false_positives = sum(f'altro{i}@test.it' in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_duplicate_in_batch(sqlite_db):
+    pipeline = _pipeline()
+    batch = [_Registration(_row('a@test.it')), _Registration(_row('A@test.it')), _Registration(_row('b@test.it'))]
+    pipeline._commit_batch(batch)
+
+    assert [item.result for item in batch] == [
+        {'success': True}, {'success': False, 'error': DUPLICATE_EMAIL_ERROR}, {'success': True},
+    ]
+    assert _emails() == ['a@test.it', 'b@test.it']
+    assert pipeline.batches == 1
+
+
+def test_existing_email_falls_back_to_single_inserts(sqlite_db):
+    pipeline = _pipeline()
+    # registrata per altra via: il Bloom filter non la conosce, l'executemany fallisce
+    assert pipeline._insert_single(_row('preso@test.it')) == {'success': True}
+    pipeline.bloom = BloomFilter(1000, 0.01)
+
+    batch = [_Registration(_row(email)) for email in ('uno@test.it', 'preso@test.it', 'due@test.it')]
+    pipeline._commit_batch(batch)
+
+    assert [item.result for item in batch] == [
+        {'success': True}, {'success': False, 'error': DUPLICATE_EMAIL_ERROR}, {'success': True},
+    ]
+    assert _emails() == ['due@test.it', 'preso@test.it', 'uno@test.it']
+    assert pipeline.batches == 0
+    assert all(email in pipeline.bloom for email in ('uno@test.it', 'due@test.it'))
+
+
+def test_abandoned_registration_is_skipped(sqlite_db, monkeypatch):
+    monkeypatch.setattr(registration, 'REGISTRATION_TIMEOUT', 0.05)
+    pipeline = _pipeline()
+    pipeline.worker = object()   # batcher fermo: la richiesta resta in coda e scade
+
+    result = pipeline.register(*_row('lento@test.it'))
+    assert result['success'] is False and result['error'] != DUPLICATE_EMAIL_ERROR
+
+    other = _Registration(_row('altro@test.it'))
+    pipeline.queue.put(other)
+    batch = pipeline._collect()
+    pipeline._commit_batch(batch)
+
+    assert len(batch) == 2 and not batch[0].done.is_set()
+    assert other.result == {'success': True}
+    assert _emails() == ['altro@test.it']
+    # la stessa email si puo' registrare di nuovo
+    assert pipeline._insert_single(_row('lento@test.it')) == {'success': True}
+
+
+def test_claimed_registration_cannot_be_cancelled():
+    item = _Registration(_row('a@test.it'))
+    assert item.claim()
+    assert not item.cancel()
+
+    item = _Registration(_row('b@test.it'))
+    assert item.cancel()
+    assert not item.claim()
+
+
+class _SpyConnection:
+    """connessione reale che registra rollback/close e fallisce sull'insert di cv_data"""
+
+    def __init__(self, calls):
+        self.conn = get_db_connection()
+        self.calls = calls
+
+    def cursor(self, **kwargs):
+        cursor = self.conn.cursor(**kwargs)
+        execute = cursor.execute
+
+        def failing_execute(sql, params=()):
+            if 'cv_data' in sql:
+                raise OperationalError('connessione persa')
+            return execute(sql, params)
+        cursor.execute = failing_execute
+        return cursor
+
+    def commit(self):
+        self.calls.append('commit')
+        self.conn.commit()
+
+    def rollback(self):
+        self.calls.append('rollback')
+        self.conn.rollback()
+
+    def close(self):
+        self.calls.append('close')
+        self.conn.close()
+
+
+def test_db_error_rolls_back_and_closes(sqlite_db, monkeypatch):
+    calls = []
+    monkeypatch.setattr(registration, 'get_db_connection', lambda: _SpyConnection(calls))
+    pipeline = _pipeline()
+    batch = [_Registration(_row('a@test.it')), _Registration(_row('b@test.it'))]
+
+    with pytest.raises(OperationalError):
+        pipeline._commit_batch(batch)
+    assert calls == ['rollback', 'close']
+    assert _emails() == []
+    assert 'a@test.it' not in pipeline.bloom
+
+    # nel thread del batcher le richieste ricevono comunque una risposta
+    batch = [_Registration(_row('c@test.it'))]
+    batches = iter([batch])
+
+    def collect():
+        try:
+            return next(batches)
+        except StopIteration:
+            raise _StopBatcher from None
+    monkeypatch.setattr(pipeline, '_collect', collect)
+    with pytest.raises(_StopBatcher):
+        pipeline._run()
+    assert batch[0].result == {'success': False, 'error': 'Errore durante la registrazione'}
+    assert calls == ['rollback', 'close'] * 2
+
+
+class _StopBatcher(BaseException):
+    """interrompe il ciclo infinito di _run dopo un blocco"""